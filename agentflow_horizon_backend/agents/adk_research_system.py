@@ -1,6 +1,9 @@
 """Multi-Agent Research System using Google ADK"""
-from google.adk.agents import LlmAgent, SequentialAgent, ParallelAgent
+from google.adk.agents import LlmAgent, SequentialAgent
 from google.adk.tools import google_search
+from agents.pipeline import Pipeline, PipelineNode
+from utils.telemetry import observe_llm_sizes, span, start_trace
+from functools import cached_property
 import os
 import logging
 
@@ -11,18 +14,39 @@ class ADKResearchSystem:
         self.api_key = api_key
         os.environ['GOOGLE_API_KEY'] = api_key
         os.environ['GOOGLE_GENAI_USE_VERTEXAI'] = 'FALSE'
-        
-        # Create specialized agents
-        self.researcher = self._create_researcher_agent()
-        self.summarizer = self._create_summarizer_agent()
-        self.analyzer = self._create_analyzer_agent()
-        self.refiner = self._create_refiner_agent()
-        
-        # Create sequential orchestrator
-        self.orchestrator = SequentialAgent(
+    
+    # Agents and the API client are built on first use and then reused
+    @cached_property
+    def researcher(self) -> LlmAgent:
+        return self._create_researcher_agent()
+    
+    @cached_property
+    def summarizer(self) -> LlmAgent:
+        return self._create_summarizer_agent()
+    
+    @cached_property
+    def analyzer(self) -> LlmAgent:
+        return self._create_analyzer_agent()
+    
+    @cached_property
+    def refiner(self) -> LlmAgent:
+        return self._create_refiner_agent()
+    
+    @cached_property
+    def orchestrator(self) -> SequentialAgent:
+        return SequentialAgent(
             name="research_orchestrator",
             sub_agents=[self.researcher, self.summarizer, self.analyzer, self.refiner]
         )
+    
+    @cached_property
+    def client(self):
+        from google.genai import Client
+        return Client(api_key=self.api_key)
+    
+    def warm_up(self):
+        """Build the agents, pipeline and client ahead of the first request"""
+        return self.orchestrator, self.pipeline, self.client
         
     def _create_researcher_agent(self) -> LlmAgent:
         """Agent that gathers information"""
@@ -101,83 +125,84 @@ class ADKResearchSystem:
             description="Refines and synthesizes all findings into final output"
         )
     
-    async def research(self, query: str) -> dict:
-        """Execute multi-agent research workflow"""
-        try:
-            logger.info(f"Starting ADK research for query: {query}")
-            
-            # For now, we'll manually orchestrate since ADK runner needs special setup
-            # In production, you'd use: runner = Runner(agent=self.orchestrator)
-            # response = await runner.run(query)
-            
-            # Temporary direct approach using individual agents
-            from google.genai import Client
-            client = Client(api_key=self.api_key)
-            
-            # Step 1: Research
-            research_prompt = f"Research this query thoroughly: {query}"
-            research_response = client.models.generate_content(
-                model="gemini-2.0-flash",
-                contents=research_prompt
-            )
-            research_findings = research_response.text
-            
-            # Step 2: Summarize
-            summary_prompt = f"Summarize these research findings concisely:\n\n{research_findings}"
-            summary_response = client.models.generate_content(
-                model="gemini-2.0-flash",
-                contents=summary_prompt
-            )
-            summary = summary_response.text
-            
-            # Step 3: Analyze
-            analysis_prompt = f"""Analyze the following content and extract:
+    @cached_property
+    def pipeline(self) -> Pipeline:
+        """research -> (summarize | analyze) -> refine, with summary and analysis fanned out"""
+        model = "gemini-2.0-flash"
+        return Pipeline([
+            PipelineNode("research", "Research this query thoroughly: {query}", model=model),
+            PipelineNode(
+                "summarize",
+                "Summarize these research findings concisely:\n\n{research}",
+                depends_on=["research"], model=model, context_tokens=4096,
+            ),
+            PipelineNode(
+                "analyze",
+                """Analyze the following content and extract:
             1. Named entities (people, organizations, dates, locations)
             2. Sentiment and tone
             3. Key patterns
             
             Content:
-            {summary}"""
-            analysis_response = client.models.generate_content(
-                model="gemini-2.0-flash",
-                contents=analysis_prompt
-            )
-            analysis = analysis_response.text
-            
-            # Step 4: Refine and synthesize
-            refine_prompt = f"""Synthesize the following information into a comprehensive final answer for the query: "{query}"
+            {research}""",
+                depends_on=["research"], model=model, context_tokens=4096,
+            ),
+            PipelineNode(
+                "refine",
+                """Synthesize the following information into a comprehensive final answer for the query: "{query}"
             
             Research Findings:
-            {research_findings[:500]}...
+            {research}
             
             Summary:
-            {summary}
+            {summarize}
             
             Analysis:
-            {analysis}
+            {analyze}
             
             Provide a well-structured final response with:
             - Executive Summary
             - Detailed Findings  
             - Key Entities
             - Sentiment
-            - Conclusion"""
+            - Conclusion""",
+                depends_on=["research", "summarize", "analyze"], model=model, context_tokens=3072,
+            ),
+        ], self._generate)
+    
+    async def _generate(self, model: str, prompt: str):
+        """One call on the shared client's async API; returns (text, token usage)"""
+        with span("llm.adk"):
+            response = await self.client.aio.models.generate_content(model=model, contents=prompt)
+        observe_llm_sizes("adk_pipeline", prompt, response.text or "")
+        usage = getattr(response, "usage_metadata", None)
+        return response.text or "", {
+            "prompt_tokens": getattr(usage, "prompt_token_count", 0) or 0,
+            "output_tokens": getattr(usage, "candidates_token_count", 0) or 0,
+        }
+    
+    async def research(self, query: str) -> dict:
+        """Execute multi-agent research workflow"""
+        try:
+            logger.info(f"Starting ADK research for query: {query}")
             
-            final_response = client.models.generate_content(
-                model="gemini-2.0-flash",
-                contents=refine_prompt
-            )
-            final_answer = final_response.text
+            # The agents above describe each role; the calls themselves go through
+            # the DAG pipeline on the shared client (ADK's Runner needs session setup)
+            with start_trace("adk_research") as (trace, _):
+                run = await self.pipeline.run({"query": query})
             
             return {
                 "success": True,
                 "query": query,
-                "research_findings": research_findings[:500],
-                "summary": summary,
-                "analysis": analysis,
-                "final_answer": final_answer,
+                "research_findings": run["research"][:500],
+                "summary": run["summarize"],
+                "analysis": run["analyze"],
+                "final_answer": run["refine"],
                 "agent_system": "Google ADK",
-                "orchestration": "Sequential"
+                "orchestration": "DAG",
+                "nodes": run.report(),
+                "total_ms": run.total_ms,
+                "trace": trace.to_dict()
             }
             
         except Exception as e:
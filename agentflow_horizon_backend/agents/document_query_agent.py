@@ -1,21 +1,33 @@
 """Document Query Agent using Google ADK and ChromaDB (ChatPDF-like)"""
 from google.adk.agents import LlmAgent
+from functools import cached_property
 import os
 import logging
-from typing import List, Dict
+from typing import List, Dict, Optional
 from database.chroma_client import ChromaDBClient
+from utils.reranker import Reranker, confidence_from, default_reranker
+from utils.telemetry import observe_llm_sizes, span, traced
 
 logger = logging.getLogger(__name__)
 
 class DocumentQueryAgent:
-    def __init__(self, api_key: str, chroma_client: ChromaDBClient):
+    def __init__(self, api_key: str, chroma_client: ChromaDBClient, reranker: Optional[Reranker] = None):
         self.api_key = api_key
         self.chroma = chroma_client
+        # Shared process-wide cross-encoder (None unless RERANK=true)
+        self.reranker = reranker if reranker is not None else default_reranker()
         os.environ['GOOGLE_API_KEY'] = api_key
         os.environ['GOOGLE_GENAI_USE_VERTEXAI'] = 'FALSE'
-        
-        # Create specialized document query agent
-        self.agent = self._create_query_agent()
+    
+    # The agent and API client are built on first use and then reused
+    @cached_property
+    def agent(self) -> LlmAgent:
+        return self._create_query_agent()
+    
+    @cached_property
+    def client(self):
+        from google.genai import Client
+        return Client(api_key=self.api_key)
     
     def _create_query_agent(self) -> LlmAgent:
         """Create document query agent using Google ADK"""
@@ -34,13 +46,18 @@ class DocumentQueryAgent:
             description="Answers questions about uploaded documents using RAG"
         )
     
-    async def query_document(self, query: str, n_results: int = 5) -> dict:
-        """Query uploaded documents using RAG approach"""
+    @traced("agent.document_query")
+    async def query_document(self, query: str, n_results: int = 5, doc_ids: List[str] = None) -> dict:
+        """Query uploaded documents using RAG approach; `doc_ids` limits the search to those documents"""
         try:
             logger.info(f"Querying documents for: {query}")
             
             # Step 1: Retrieve relevant chunks from ChromaDB
-            retrieval_results = self.chroma.query(query, n_results=n_results)
+            where = None
+            if doc_ids:
+                where = {"doc_id": doc_ids[0]} if len(doc_ids) == 1 else {"doc_id": {"$in": list(doc_ids)}}
+            depth = max(n_results, self.reranker.candidates) if self.reranker else n_results
+            retrieval_results = await self.chroma.aquery(query, n_results=depth, where=where)
             
             if not retrieval_results['documents'] or not retrieval_results['documents'][0]:
                 return {
@@ -52,13 +69,20 @@ class DocumentQueryAgent:
                     "confidence_score": 0.0
                 }
             
-            # Step 2: Combine retrieved chunks into context
-            context_chunks = retrieval_results['documents'][0]
+            # Step 2: Rerank the candidates (if configured) and combine the best into context
+            hits = [{"text": text, "distance": distance} for text, distance in zip(
+                retrieval_results['documents'][0],
+                retrieval_results['distances'][0] if retrieval_results['distances'] else [None] * depth
+            )]
+            reranked = False
+            if self.reranker:
+                hits, reranked = await self.reranker.arerank(query, hits)
+            hits = hits[:n_results]
+            context_chunks = [hit["text"] for hit in hits]
             context = "\n\n---\n\n".join(context_chunks)
             
             # Step 3: Use Gemini through ADK to answer based on context
-            from google.genai import Client
-            client = Client(api_key=self.api_key)
+            client = self.client
             
             prompt = f"""Context from uploaded documents:
             
@@ -76,16 +100,22 @@ class DocumentQueryAgent:
             
             Answer:"""
             
-            response = client.models.generate_content(
-                model="gemini-2.0-flash",
-                contents=prompt
-            )
+            with span("llm.adk"):
+                response = client.models.generate_content(
+                    model="gemini-2.0-flash",
+                    contents=prompt
+                )
             
             answer = response.text
+            observe_llm_sizes("document_query_agent", prompt, answer)
             
-            # Calculate confidence score based on relevance
-            avg_distance = sum(retrieval_results['distances'][0]) / len(retrieval_results['distances'][0]) if retrieval_results['distances'] else 1.0
-            confidence_score = max(0.0, min(1.0, 1.0 - avg_distance))
+            # Confidence is the cross-encoder relevance of the chunks used; without
+            # reranking it falls back to 1 - average vector distance
+            confidence_score = confidence_from(hits)
+            if confidence_score is None:
+                distances = [hit["distance"] for hit in hits if hit["distance"] is not None]
+                avg_distance = sum(distances) / len(distances) if distances else 1.0
+                confidence_score = max(0.0, min(1.0, 1.0 - avg_distance))
             
             return {
                 "success": True,
@@ -94,6 +124,8 @@ class DocumentQueryAgent:
                 "answer": answer,
                 "confidence_score": round(confidence_score, 2),
                 "chunks_retrieved": len(context_chunks),
+                "reranked": reranked,
+                "chunk_scores": [hit.get("relevance") for hit in hits],
                 "agent_system": "Google ADK + ChromaDB RAG"
             }
             
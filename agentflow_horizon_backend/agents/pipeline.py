@@ -0,0 +1,178 @@
+"""Declarative DAG engine for multi-step LLM agent pipelines"""
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from utils.telemetry import span
+from utils.token_counter import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# generate(model, prompt) -> (text, {"prompt_tokens": int, "output_tokens": int})
+GenerateFn = Callable[[str, str], Awaitable[Tuple[str, dict]]]
+
+
+@dataclass
+class PipelineNode:
+    """One LLM step.
+
+    `prompt` is a str.format template over the pipeline inputs and the outputs
+    of `depends_on`. Dependency outputs are trimmed so together they fit in
+    `context_tokens` (split evenly between dependencies).
+    """
+    name: str
+    prompt: str
+    depends_on: Sequence[str] = ()
+    model: str = "gemini-2.0-flash"
+    context_tokens: int = 2048
+
+
+@dataclass
+class NodeResult:
+    name: str
+    text: str
+    latency_ms: float
+    prompt_tokens: int = 0
+    output_tokens: int = 0
+    cached: bool = False
+
+    def report(self) -> dict:
+        return {
+            "latency_ms": self.latency_ms,
+            "prompt_tokens": self.prompt_tokens,
+            "output_tokens": self.output_tokens,
+            "cached": self.cached,
+        }
+
+
+@dataclass
+class PipelineRun:
+    results: Dict[str, NodeResult] = field(default_factory=dict)
+    total_ms: float = 0.0
+
+    def __getitem__(self, name: str) -> str:
+        return self.results[name].text
+
+    def report(self) -> dict:
+        return {name: result.report() for name, result in self.results.items()}
+
+
+def trim_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to roughly `max_tokens`, preferring to end on a line or sentence"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    cut = text[:max_tokens * 4]
+    boundary = max(cut.rfind("\n"), cut.rfind(". "))
+    if boundary > len(cut) // 2:
+        cut = cut[:boundary + 1]
+    return cut.rstrip() + " ..."
+
+
+class Pipeline:
+    """Runs a DAG of PipelineNodes, each as soon as its dependencies finish.
+
+    Independent nodes (fan-out) run concurrently and a node with several
+    dependencies (fan-in) waits for all of them. Outputs are cached by a hash
+    of (model, rendered prompt), so re-running a pipeline whose prefix has not
+    changed skips those LLM calls.
+    """
+
+    def __init__(self, nodes: List[PipelineNode], generate: GenerateFn, cache_size: int = 256):
+        self.nodes = {node.name: node for node in nodes}
+        if len(self.nodes) != len(nodes):
+            raise ValueError("Pipeline node names must be unique")
+        for node in nodes:
+            missing = [dep for dep in node.depends_on if dep not in self.nodes]
+            if missing:
+                raise ValueError(f"Node {node.name} depends on unknown nodes: {missing}")
+        self._check_acyclic()
+        self.generate = generate
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Tuple[str, dict]]" = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _check_acyclic(self):
+        visiting, done = set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Pipeline has a cycle through {name}")
+            visiting.add(name)
+            for dep in self.nodes[name].depends_on:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.nodes:
+            visit(name)
+
+    def render(self, node: PipelineNode, inputs: dict, outputs: Dict[str, str]) -> str:
+        per_dependency = node.context_tokens // max(1, len(node.depends_on))
+        context = {dep: trim_to_tokens(outputs[dep], per_dependency) for dep in node.depends_on}
+        return node.prompt.format(**inputs, **context)
+
+    async def _run_node(self, node: PipelineNode, inputs: dict, tasks: Dict[str, asyncio.Task]) -> NodeResult:
+        dependencies = await asyncio.gather(*(tasks[dep] for dep in node.depends_on))
+        outputs = {result.name: result.text for result in dependencies}
+        prompt = self.render(node, inputs, outputs)
+        key = hashlib.sha256(f"{node.model}\x00{prompt}".encode("utf-8")).hexdigest()
+
+        started = time.perf_counter()
+        cached = self._cache.get(key)
+        with span(f"pipeline.{node.name}", cached=cached is not None):
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+                text, usage = cached[0], {}  # no tokens spent on a cache hit
+            else:
+                self.cache_misses += 1
+                text, usage = await self.generate(node.model, prompt)
+                self._cache[key] = (text, usage)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return NodeResult(
+            name=node.name,
+            text=text,
+            latency_ms=round((time.perf_counter() - started) * 1000, 1),
+            prompt_tokens=usage.get("prompt_tokens", 0),
+            output_tokens=usage.get("output_tokens", 0),
+            cached=cached is not None,
+        )
+
+    async def run(self, inputs: dict, outputs: Optional[Sequence[str]] = None) -> PipelineRun:
+        """Run the nodes needed for `outputs` (all nodes by default)"""
+        wanted = set()
+        stack = list(outputs or self.nodes)
+        while stack:
+            name = stack.pop()
+            if name not in wanted:
+                wanted.add(name)
+                stack.extend(self.nodes[name].depends_on)
+
+        started = time.perf_counter()
+        tasks: Dict[str, asyncio.Task] = {}
+        # Nodes only await tasks of their dependencies, so creation order does not matter
+        for name in self.nodes:
+            if name in wanted:
+                tasks[name] = asyncio.ensure_future(self._run_node(self.nodes[name], inputs, tasks))
+        try:
+            results = await asyncio.gather(*tasks.values())
+        except Exception:
+            for task in tasks.values():
+                task.cancel()
+            raise
+        run = PipelineRun({result.name: result for result in results})
+        run.total_ms = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(f"Pipeline finished in {run.total_ms}ms "
+                    f"({sum(r.cached for r in results)}/{len(results)} nodes cached)")
+        return run
+
+    def stats(self) -> dict:
+        return {"cache_entries": len(self._cache), "cache_hits": self.cache_hits, "cache_misses": self.cache_misses}
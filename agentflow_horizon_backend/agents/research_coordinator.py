@@ -1,72 +1,107 @@
 from agents.retriever_agent import RetrieverAgent
 from agents.summarizer_agent import SummarizerAgent
 from utils.llm_helper import GeminiHelper
+from utils.telemetry import span, start_trace
+from typing import Awaitable, Dict, Optional
+import asyncio
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
 class ResearchCoordinator:
-    def __init__(self, retriever: RetrieverAgent, summarizer: SummarizerAgent, llm_helper: GeminiHelper):
+    """Runs the research pipeline as a small dependency graph.
+
+    retrieve -> summarize -> (entities | sentiment | synthesis), where the last
+    three only depend on the summary and run concurrently. Every step has its
+    own timeout; a failed or timed-out branch is reported under `errors` and the
+    rest of the result is still returned. Per-step wall times are in `timings_ms`
+    and the full span tree (agents, Chroma, embedding, Gemini calls) in `trace`.
+    """
+
+    def __init__(self, retriever: RetrieverAgent, summarizer: SummarizerAgent, llm_helper: GeminiHelper,
+                 step_timeout: float = 30.0, step_timeouts: Optional[Dict[str, float]] = None):
         self.retriever = retriever
         self.summarizer = summarizer
         self.llm = llm_helper
-    
+        self.step_timeout = step_timeout
+        self.step_timeouts = step_timeouts or {}
+
+    async def _step(self, name: str, awaitable: Awaitable, timings: dict, errors: dict):
+        """Await one step under its timeout; returns None (and records why) on failure"""
+        started = time.perf_counter()
+        try:
+            with span(f"research.{name}"):
+                return await asyncio.wait_for(awaitable, self.step_timeouts.get(name, self.step_timeout))
+        except asyncio.TimeoutError:
+            errors[name] = "timed out"
+            logger.warning(f"Research step {name} timed out")
+        except Exception as e:
+            errors[name] = str(e)
+            logger.error(f"Research step {name} failed: {str(e)}")
+        finally:
+            timings[name] = round((time.perf_counter() - started) * 1000, 1)
+        return None
+
     async def research(self, query: str) -> dict:
         """Coordinate multi-agent research pipeline"""
+        # Joins the request's trace when called from an endpoint
+        with start_trace("research") as (trace, _):
+            result = await self._research(query)
+        result["trace"] = trace.to_dict()
+        return result
+
+    async def _research(self, query: str) -> dict:
+        started = time.perf_counter()
+        timings, errors = {}, {}
         try:
             logger.info(f"Starting research for query: {query}")
-            
+
             # Step 1: Retrieve relevant documents
-            retrieval_result = await self.retriever.retrieve(query, n_results=5)
-            
+            retrieval_result = await self._step(
+                "retrieve", self.retriever.retrieve(query, n_results=5), timings, errors
+            ) or {"success": False, "documents": []}
+
             if not retrieval_result['success'] or not retrieval_result['documents']:
                 # If no documents in DB, generate direct answer
                 logger.info("No documents found, generating direct answer")
-                answer = await self.llm.call_model(
+                answer = await self._step("answer", self.llm.call_model(
                     f"Provide a comprehensive answer to: {query}",
                     "You are a research assistant. Provide detailed, accurate information."
-                )
-                return {
-                    "success": True,
-                    "query": query,
-                    "retrieved_documents": [],
-                    "summary": answer,
-                    "entities": await self.llm.extract_entities(answer),
-                    "sentiment": await self.llm.analyze_sentiment(answer),
-                    "final_answer": answer,
-                    "source": "direct_generation"
-                }
-            
+                ), timings, errors)
+                entities = sentiment = None
+                if answer:
+                    entities, sentiment = await asyncio.gather(
+                        self._step("entities", self.llm.extract_entities(answer), timings, errors),
+                        self._step("sentiment", self.llm.analyze_sentiment(answer), timings, errors),
+                    )
+                return self._result(query, [], answer, entities, sentiment, answer,
+                                    "direct_generation", timings, errors, started)
+
             # Step 2: Combine retrieved documents
             combined_text = "\n\n".join([doc['text'] for doc in retrieval_result['documents']])
-            
-            # Step 3: Summarize
-            summary_result = await self.summarizer.summarize(combined_text)
-            summary = summary_result.get('summary', '')
-            
-            # Step 4: Extract entities
-            entities = await self.llm.extract_entities(summary)
-            
-            # Step 5: Analyze sentiment
-            sentiment = await self.llm.analyze_sentiment(summary)
-            
-            # Step 6: Generate final synthesis
-            final_answer = await self.llm.call_model(
-                f"Based on this information:\n{summary}\n\nProvide a comprehensive answer to: {query}",
-                "You are a research synthesis assistant. Provide clear, structured answers."
+
+            # Step 3: Summarize (fall back to the raw documents if it fails)
+            summary_result = await self._step(
+                "summarize", self.summarizer.summarize(combined_text), timings, errors
+            ) or {}
+            if summary_result and not summary_result.get('success', True):
+                errors["summarize"] = summary_result.get('message', 'summarization failed')
+            summary = summary_result.get('summary') or combined_text
+
+            # Step 4: Entities, sentiment and the final synthesis only need the summary
+            entities, sentiment, final_answer = await asyncio.gather(
+                self._step("entities", self.llm.extract_entities(summary), timings, errors),
+                self._step("sentiment", self.llm.analyze_sentiment(summary), timings, errors),
+                self._step("synthesis", self.llm.call_model(
+                    f"Based on this information:\n{summary}\n\nProvide a comprehensive answer to: {query}",
+                    "You are a research synthesis assistant. Provide clear, structured answers."
+                ), timings, errors),
             )
-            
-            return {
-                "success": True,
-                "query": query,
-                "retrieved_documents": retrieval_result['documents'],
-                "summary": summary,
-                "entities": entities,
-                "sentiment": sentiment,
-                "final_answer": final_answer,
-                "source": "rag_pipeline"
-            }
-            
+
+            return self._result(query, retrieval_result['documents'], summary, entities, sentiment,
+                                final_answer, "rag_pipeline", timings, errors, started)
+
         except Exception as e:
             logger.error(f"Research coordinator error: {str(e)}")
             return {
@@ -74,3 +109,22 @@ class ResearchCoordinator:
                 "message": str(e),
                 "query": query
             }
+
+    @staticmethod
+    def _result(query, documents, summary, entities, sentiment, final_answer, source, timings, errors, started):
+        timings["total"] = round((time.perf_counter() - started) * 1000, 1)
+        result = {
+            "success": final_answer is not None,
+            "query": query,
+            "retrieved_documents": documents,
+            "summary": summary,
+            "entities": entities,
+            "sentiment": sentiment,
+            "final_answer": final_answer,
+            "source": source,
+            "timings_ms": timings,
+        }
+        if errors:
+            result["errors"] = errors
+            result["partial"] = True
+        return result
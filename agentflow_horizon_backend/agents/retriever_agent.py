@@ -1,16 +1,23 @@
 from database.chroma_client import ChromaDBClient
+from utils.reranker import Reranker, default_reranker
+from utils.telemetry import traced
+from typing import Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
 class RetrieverAgent:
-    def __init__(self, chroma_client: ChromaDBClient):
+    def __init__(self, chroma_client: ChromaDBClient, reranker: Optional[Reranker] = None):
         self.chroma = chroma_client
+        # Shared process-wide cross-encoder (None unless RERANK=true)
+        self.reranker = reranker if reranker is not None else default_reranker()
     
+    @traced("agent.retriever")
     async def retrieve(self, query: str, n_results: int = 5) -> dict:
-        """Retrieve relevant documents for a query"""
+        """Retrieve relevant documents for a query, reranked when a reranker is configured"""
         try:
-            results = self.chroma.query(query, n_results=n_results)
+            depth = max(n_results, self.reranker.candidates) if self.reranker else n_results
+            results = await self.chroma.aquery(query, n_results=depth)
             
             if not results['documents'] or not results['documents'][0]:
                 return {
@@ -27,10 +34,16 @@ class RetrieverAgent:
                     "distance": results['distances'][0][i] if results['distances'] else None
                 })
             
+            reranked = False
+            if self.reranker:
+                documents, reranked = await self.reranker.arerank(query, documents)
+            documents = documents[:n_results]
+            
             logger.info(f"Retrieved {len(documents)} documents for query")
             return {
                 "success": True,
-                "documents": documents
+                "documents": documents,
+                "reranked": reranked
             }
         except Exception as e:
             logger.error(f"Retriever error: {str(e)}")
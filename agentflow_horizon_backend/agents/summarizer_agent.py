@@ -1,4 +1,5 @@
 from utils.llm_helper import GeminiHelper
+from utils.telemetry import traced
 import logging
 
 logger = logging.getLogger(__name__)
@@ -7,6 +8,7 @@ class SummarizerAgent:
     def __init__(self, llm_helper: GeminiHelper):
         self.llm = llm_helper
     
+    @traced("agent.summarizer")
     async def summarize(self, text: str) -> dict:
         """Summarize the given text"""
         try:
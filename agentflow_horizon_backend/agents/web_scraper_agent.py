@@ -1,36 +1,28 @@
-import requests
-from bs4 import BeautifulSoup
 from utils.llm_helper import GeminiHelper
+from utils.http_fetcher import HttpFetcher, default_fetcher
+from utils.html_extract import extract_text
+from utils.telemetry import span, traced
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
 class WebScraperAgent:
-    def __init__(self, llm_helper: GeminiHelper):
+    def __init__(self, llm_helper: GeminiHelper, fetcher: HttpFetcher = None):
         self.llm = llm_helper
+        self.fetcher = fetcher or default_fetcher()
     
+    @traced("agent.web_scraper")
     async def scrape_and_summarize(self, url: str) -> dict:
         """Scrape web content and summarize"""
         try:
-            # Fetch the webpage
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            # Parse HTML
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style"]):
-                script.decompose()
-            
-            # Get text
-            text = soup.get_text(separator='\n', strip=True)
+            # Fetch the webpage over the shared pooled client
+            page = await self.fetcher.fetch(url)
             
-            # Limit text length
-            text = text[:10000]  # First 10k chars
+            # Parsing is CPU-bound, keep it off the event loop; it stops at the first 10k chars of content
+            with span("scrape.extract"):
+                extracted = await asyncio.to_thread(extract_text, page.content, 10000, page.encoding)
+            text = extracted.text
             
             # Summarize
             summary = await self.llm.summarize(text)
@@ -0,0 +1,102 @@
+"""Prompt context: old character slicing vs the token-budgeted ContextPacker.
+
+Chunks a synthetic document with the ingestion chunker (so neighbouring
+chunks overlap), adds near-duplicate copies as a second upload would, and
+for many random retrievals compares the old assembly (1500 chars per chunk,
+2000 chars total) with ContextPacker at the same nominal budget: context
+tokens, tokens spent on duplicated text, contexts cut mid-sentence and
+packing time.
+
+    python benchmarks/bench_context_packer.py --budget 500 --trials 500
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.context_packer import ContextPacker  # noqa: E402
+from utils.text_chunker import TextChunker  # noqa: E402
+from utils.token_counter import token_counter_for  # noqa: E402
+
+TOPICS = ("pump", "valve", "sensor", "bearing", "filter", "controller", "motor", "seal")
+
+
+def make_document(rng: random.Random, sentences: int) -> str:
+    parts = []
+    for i in range(sentences):
+        topic = rng.choice(TOPICS)
+        parts.append(f"The {topic} unit {rng.randint(100, 999)} must be inspected every {rng.randint(2, 48)} "
+                     f"weeks and replaced after {rng.randint(1, 9)} years of service.")
+        if i % 6 == 5:
+            parts.append("\n\n")
+    return " ".join(parts)
+
+
+def old_context(hits) -> str:
+    context_text = ""
+    for hit in hits:
+        context_text += hit["text"][:1500] + "\n\n"
+    return context_text[:2000]
+
+
+def duplicated_words(text: str) -> int:
+    sentences = [sentence.strip() for sentence in text.replace("\n", " ").split(".") if sentence.strip()]
+    seen, duplicated = set(), 0
+    for sentence in sentences:
+        if sentence in seen:
+            duplicated += len(sentence.split())
+        seen.add(sentence)
+    return duplicated
+
+
+def main(args):
+    rng = random.Random(11)
+    document = make_document(rng, args.sentences)
+    chunker = TextChunker(max_tokens=256, overlap_tokens=32)
+    chunks = [
+        {"text": chunk.text, "metadata": {"doc_id": "doc", **chunk.metadata()}}
+        for chunk in chunker.chunk(document)
+    ]
+    # A re-upload of the same file: identical text under another document id
+    copies = [{"text": chunk["text"], "metadata": {**chunk["metadata"], "doc_id": "copy"}} for chunk in chunks]
+    count_tokens = token_counter_for(args.model)
+    packer = ContextPacker(args.budget, count_tokens)
+
+    rows = {"old": [], "packed": []}
+    cut = {"old": 0, "packed": 0}
+    duplicated = {"old": 0, "packed": 0}
+    pack_ms = []
+    for _ in range(args.trials):
+        start = rng.randrange(len(chunks) - 3)
+        hits = chunks[start:start + 3] + [copies[start + 1]] + rng.sample(chunks, 2)
+        for rank, hit in enumerate(hits):
+            hit["score"] = 1.0 / (rank + 1)
+        old = old_context(hits)
+        started = time.perf_counter()
+        packed = packer.pack([dict(hit) for hit in hits])
+        pack_ms.append((time.perf_counter() - started) * 1000)
+        for name, text in (("old", old), ("packed", packed.text)):
+            rows[name].append(count_tokens(text))
+            cut[name] += not text.rstrip().endswith((".", "!", "?"))
+            duplicated[name] += duplicated_words(text)
+
+    counter_name = getattr(count_tokens, "model_name", None) and "local tokenizer" or "estimate"
+    print(f"chunks={len(chunks)} trials={args.trials} budget={args.budget} tokens counted with {counter_name}")
+    for name in ("old", "packed"):
+        print(f"{name:<7} context tokens mean {statistics.mean(rows[name]):>6.1f} max {max(rows[name]):>5}   "
+              f"cut mid-sentence {cut[name] / args.trials:>6.1%}   duplicated words/context "
+              f"{duplicated[name] / args.trials:>6.1f}")
+    print(f"pack time p50 {statistics.median(pack_ms):.3f} ms, max {max(pack_ms):.3f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget", type=int, default=500)
+    parser.add_argument("--trials", type=int, default=500)
+    parser.add_argument("--sentences", type=int, default=2000)
+    parser.add_argument("--model", default="gemini-2.5-flash-lite")
+    main(parser.parse_args())
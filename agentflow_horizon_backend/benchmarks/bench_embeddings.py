@@ -0,0 +1,107 @@
+"""CPU benchmark for the batched embedding engine.
+
+Reports documents/sec for one-at-a-time vs batched encoding, and queries/sec
+for sequential query embeds vs concurrent micro-batched `embed_query` calls.
+
+    python benchmarks/bench_embeddings.py --docs 2000 --queries 500
+    python benchmarks/bench_embeddings.py --backend synthetic   # no model download
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.embedding_engine import EmbeddingEngine, sentence_transformer_encoder  # noqa: E402
+
+WORDS = ("agent retrieval vector index model latency throughput document chunk sentence "
+         "paragraph budget gemini context query embedding overlap token search ranking").split()
+
+
+def synthetic_encoder(dim: int = 384, call_overhead_ms: float = 2.0, per_text_us: float = 50.0):
+    """Stand-in encoder with a fixed per-call cost plus a per-text cost"""
+    projection = np.random.default_rng(0).standard_normal((256, dim)).astype(np.float32)
+
+    def encode(texts):
+        time.sleep(call_overhead_ms / 1000 + len(texts) * per_text_us / 1e6)
+        counts = np.zeros((len(texts), 256), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.split():
+                counts[row, hash(word) % 256] += 1
+        return counts @ projection
+    return encode
+
+
+def build_encoder(args):
+    if args.backend == "synthetic":
+        return synthetic_encoder()
+    from sentence_transformers import SentenceTransformer
+    return sentence_transformer_encoder(SentenceTransformer(args.model, device="cpu"), args.batch_size)
+
+
+def make_texts(count: int, rng: random.Random, low: int, high: int):
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high))) for _ in range(count)]
+
+
+async def concurrent_queries(engine: EmbeddingEngine, queries, clients: int) -> float:
+    semaphore = asyncio.Semaphore(clients)
+
+    async def one(text):
+        async with semaphore:
+            return await engine.embed_query(text)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(text) for text in queries))
+    return time.perf_counter() - started
+
+
+def main(args):
+    rng = random.Random(1)
+    docs = make_texts(args.docs, rng, 40, 200)
+    queries = make_texts(args.queries, rng, 4, 12)
+    encoder = build_encoder(args)
+    engine = EmbeddingEngine(encoder, model_name=args.model, batch_size=args.batch_size, max_wait_ms=args.max_wait_ms)
+    engine.encode(docs[:8])  # warm up
+
+    sample = docs[:max(1, args.docs // 10)]
+    started = time.perf_counter()
+    for text in sample:
+        engine.encode([text])
+    single_docs = len(sample) / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    vectors = engine.encode(docs)
+    batched_docs = len(docs) / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for text in queries:
+        engine.encode([text])
+    sequential_queries = len(queries) / (time.perf_counter() - started)
+
+    print(f"backend={args.backend} model={args.model} batch={args.batch_size} dim={vectors.shape[1]} "
+          f"dtype={vectors.dtype}")
+    print(f"documents/sec  one-at-a-time: {single_docs:>9.1f}   batched: {batched_docs:>9.1f}")
+    print(f"queries/sec    sequential   : {sequential_queries:>9.1f}")
+    for clients in args.clients:
+        engine.query_batches = engine.queries_batched = 0
+        elapsed = asyncio.run(concurrent_queries(engine, queries, clients))
+        print(f"queries/sec    {clients:>3} clients  : {len(queries) / elapsed:>9.1f}   "
+              f"(avg micro-batch {engine.stats()['avg_query_batch']})")
+    engine.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=["sentence-transformers", "synthetic"], default="sentence-transformers")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--clients", type=int, nargs="+", default=[8, 32, 64])
+    main(parser.parse_args())
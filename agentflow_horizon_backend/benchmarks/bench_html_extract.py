@@ -0,0 +1,72 @@
+"""Pages/sec and peak memory of HTML-to-text extraction on a saved-page corpus.
+
+Compares the previous scraping code path (BeautifulSoup + html.parser over
+the whole page, then truncate) with utils.html_extract using each available
+parser and the same character budget.
+
+    python benchmarks/bench_html_extract.py --max-chars 5000 --repeat 20
+    python benchmarks/bench_html_extract.py --corpus /path/to/saved/pages
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.html_extract import available_parsers, extract_text  # noqa: E402
+
+CORPUS_DIR = Path(__file__).resolve().parent / "html_corpus"
+
+
+def bs4_extract(content: bytes, max_chars: int) -> str:
+    """What scrape_website did before: parse everything, strip scripts, truncate"""
+    soup = BeautifulSoup(content, 'html.parser')
+    for script in soup(["script", "style"]):
+        script.decompose()
+    text = soup.get_text()
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return ' '.join(chunk for chunk in chunks if chunk)[:max_chars]
+
+
+def measure(name, extract, pages, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for content in pages:
+            extract(content)
+    rate = len(pages) * repeat / (time.perf_counter() - started)
+
+    peak = 0
+    for content in pages:
+        tracemalloc.start()
+        extract(content)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    print(f"{name:<34} {rate:9.1f} pages/s   peak {peak / 1024:8.1f} KiB")
+
+
+def main(args):
+    files = sorted(Path(args.corpus).glob("*.htm*"))
+    if not files:
+        sys.exit(f"No .html files in {args.corpus}")
+    pages = [path.read_bytes() for path in files]
+    print(f"{len(pages)} pages, {sum(map(len, pages)) / 1024:.0f} KiB, budget {args.max_chars} chars")
+
+    measure("bs4 html.parser (before)", lambda c: bs4_extract(c, args.max_chars), pages, args.repeat)
+    for parser in available_parsers():
+        measure(f"html_extract {parser}", lambda c: extract_text(c, args.max_chars, "utf-8", parser),
+                pages, args.repeat)
+        measure(f"html_extract {parser} (no cap)",
+                lambda c: extract_text(c, 10 ** 9, "utf-8", parser), pages, args.repeat)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", default=str(CORPUS_DIR))
+    parser.add_argument("--max-chars", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    main(parser.parse_args())
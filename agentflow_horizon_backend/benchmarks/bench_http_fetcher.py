@@ -0,0 +1,112 @@
+"""Throughput of the pooled async fetcher against a local stub HTTP server.
+
+The stub serves gzip-compressed HTML over HTTP/1.1 keep-alive after a fixed
+delay. Compares the old pattern (blocking requests.get, new connection per
+call, run inline) with HttpFetcher at several concurrency levels, and checks
+that oversized bodies are cut at the size cap.
+
+    python benchmarks/bench_http_fetcher.py --requests 200 --latency-ms 20
+"""
+import argparse
+import asyncio
+import gzip
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.http_fetcher import HttpFetcher  # noqa: E402
+
+PAGE = ("<html><head><title>Stub</title></head><body>"
+        + "<p>Pooled connections keep scraping fast.</p>" * 400 + "</body></html>").encode()
+
+
+def start_stub_server(latency_ms: float) -> ThreadingHTTPServer:
+    compressed = gzip.compress(PAGE)
+    huge = gzip.compress(PAGE * 50)
+    connections = []
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            super().setup()
+            connections.append(1)
+
+        def do_GET(self):
+            time.sleep(latency_ms / 1000)
+            body = huge if self.path.startswith("/huge") else compressed
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    class StubServer(ThreadingHTTPServer):
+        daemon_threads = True
+        request_queue_size = 256
+
+    server = StubServer(("127.0.0.1", 0), StubHandler)
+    server.connections = connections
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def old_style(url: str, count: int) -> float:
+    started = time.perf_counter()
+    for _ in range(count):
+        response = requests.get(url, timeout=10)
+        response.raise_for_status()
+    return count / (time.perf_counter() - started)
+
+
+async def pooled(fetcher: HttpFetcher, url: str, count: int, clients: int) -> float:
+    semaphore = asyncio.Semaphore(clients)
+
+    async def one():
+        async with semaphore:
+            await fetcher.fetch(url)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(count)))
+    return count / (time.perf_counter() - started)
+
+
+async def run_pooled(args, url: str, server):
+    fetcher = HttpFetcher(max_per_host=max(args.clients), max_bytes=len(PAGE) * 4)
+    for clients in args.clients:
+        before = len(server.connections)
+        rate = await pooled(fetcher, url, args.requests, clients)
+        print(f"HttpFetcher {clients:>3} clients   : {rate:8.1f} req/s  "
+              f"({len(server.connections) - before} new connections)")
+    huge = await fetcher.fetch(url.replace("/page", "/huge"))
+    print(f"size cap: read {len(huge.content)} bytes, truncated={huge.truncated}")
+    await fetcher.aclose()
+
+
+def main(args):
+    server = start_stub_server(args.latency_ms)
+    url = f"http://127.0.0.1:{server.server_address[1]}/page"
+    before = len(server.connections)
+    rate = old_style(url, max(1, args.requests // 4))
+    print(f"requests.get sequential : {rate:8.1f} req/s  ({len(server.connections) - before} new connections)")
+    asyncio.run(run_pooled(args, url, server))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32])
+    main(parser.parse_args())
@@ -0,0 +1,188 @@
+"""Recall and latency of vector-only, BM25-only and hybrid (RRF) retrieval.
+
+Builds a synthetic product corpus where every chunk carries a part code
+(e.g. "QX-4821") plus a description drawn from topic vocabulary, and asks
+two kinds of questions: exact-code lookups and paraphrased descriptions
+(synonyms of the words in the chunk). Reports recall@k for each query type
+and per-query latency, plus BM25 build / incremental-add / snapshot costs.
+
+    python benchmarks/bench_hybrid_search.py --docs 5000 --queries 300
+    python benchmarks/bench_hybrid_search.py --backend sentence-transformers   # real embeddings
+"""
+import argparse
+import os
+import random
+import statistics
+import string
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database.bm25_index import BM25Index, reciprocal_rank_fusion  # noqa: E402
+
+# Each concept has several surface forms; documents use one, paraphrased queries another
+CONCEPTS = [
+    ("battery", "cell", "power pack"), ("waterproof", "water resistant", "splash proof"),
+    ("lightweight", "portable", "compact"), ("wireless", "cordless", "bluetooth"),
+    ("durable", "rugged", "sturdy"), ("fast", "quick", "rapid"), ("quiet", "silent", "low noise"),
+    ("cheap", "affordable", "budget"), ("warranty", "guarantee", "coverage"), ("screen", "display", "panel"),
+    ("camera", "lens", "sensor"), ("kitchen", "cooking", "culinary"), ("outdoor", "camping", "hiking"),
+    ("office", "workplace", "desk"), ("gaming", "esports", "play"), ("audio", "sound", "speaker"),
+    ("storage", "capacity", "memory"), ("charging", "recharge", "charger"), ("steel", "metal", "alloy"),
+    ("children", "kids", "youth"),
+]
+FILLER = "the product features a design for daily use with reliable performance and simple setup".split()
+
+
+def make_code(rng: random.Random) -> str:
+    return "".join(rng.choices(string.ascii_uppercase, k=2)) + "-" + str(rng.randint(1000, 9999))
+
+
+def make_corpus(count: int, rng: random.Random):
+    docs, codes, concepts = [], [], []
+    for _ in range(count):
+        code = make_code(rng)
+        picked = rng.sample(range(len(CONCEPTS)), 4)
+        words = [CONCEPTS[c][0] for c in picked] + rng.sample(FILLER, 8)
+        rng.shuffle(words)
+        docs.append(f"Part {code}: " + " ".join(words) + ".")
+        codes.append(code)
+        concepts.append(picked)
+    return docs, codes, concepts
+
+
+def make_queries(codes, concepts, count: int, rng: random.Random):
+    """(query text, relevant doc index, kind)"""
+    queries = []
+    for _ in range(count):
+        target = rng.randrange(len(codes))
+        if rng.random() < 0.5:
+            queries.append((f"What is the warranty on {codes[target]}?", target, "exact-code"))
+        else:
+            forms = [rng.choice(CONCEPTS[c][1:]) for c in concepts[target]]
+            queries.append(("looking for something " + " ".join(forms), target, "paraphrase"))
+    return queries
+
+
+def synthetic_encoder(dim: int = 256):
+    """Stand-in for a sentence embedder: synonyms share a direction, unknown tokens
+    such as part codes only contribute weak noise (as with subword embeddings)"""
+    rng = np.random.default_rng(0)
+    concept_vectors = rng.standard_normal((len(CONCEPTS), dim)).astype(np.float32)
+    lookup = {}
+    for index, forms in enumerate(CONCEPTS):
+        for form in forms:
+            for word in form.split():
+                lookup[word] = index
+
+    def encode(texts):
+        vectors = np.zeros((len(texts), dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().replace(":", " ").replace("?", " ").split():
+                if word in lookup:
+                    vectors[row] += concept_vectors[lookup[word]]
+                else:
+                    vectors[row] += 0.15 * np.random.default_rng(abs(hash(word)) % 2**32).standard_normal(dim)
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+    return encode
+
+
+def build_encoder(args):
+    if args.backend == "synthetic":
+        return synthetic_encoder()
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(args.model, device="cpu")
+    return lambda texts: model.encode(texts, batch_size=64, normalize_embeddings=True)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main(args):
+    rng = random.Random(7)
+    docs, codes, concepts = make_corpus(args.docs, rng)
+    ids = [f"doc_{i}" for i in range(len(docs))]
+    queries = make_queries(codes, concepts, args.queries, rng)
+    encoder = build_encoder(args)
+
+    doc_vectors = np.asarray(encoder(docs), dtype=np.float32)
+    query_vectors = np.asarray(encoder([text for text, _, _ in queries]), dtype=np.float32)
+
+    index = BM25Index()
+    started = time.perf_counter()
+    index.add(ids, docs)
+    build_s = time.perf_counter() - started
+
+    hits = {mode: {"exact-code": 0, "paraphrase": 0} for mode in ("vector", "bm25", "hybrid")}
+    totals = {"exact-code": 0, "paraphrase": 0}
+    latency = {"vector": [], "bm25": [], "hybrid": []}
+    for (text, target, kind), query_vector in zip(queries, query_vectors):
+        totals[kind] += 1
+        started = time.perf_counter()
+        scores = doc_vectors @ query_vector
+        top = np.argpartition(-scores, args.candidates)[:args.candidates]
+        vector_ids = [ids[i] for i in top[np.argsort(-scores[top])]]
+        vector_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        bm25_ids = [chunk_id for chunk_id, _ in index.search(text, args.candidates)]
+        bm25_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        fused = [chunk_id for chunk_id, _ in reciprocal_rank_fusion([vector_ids, bm25_ids], k=args.rrf_k)]
+        fuse_ms = (time.perf_counter() - started) * 1000
+
+        latency["vector"].append(vector_ms)
+        latency["bm25"].append(bm25_ms)
+        latency["hybrid"].append(vector_ms + bm25_ms + fuse_ms)
+        relevant = ids[target]
+        hits["vector"][kind] += relevant in vector_ids[:args.k]
+        hits["bm25"][kind] += relevant in bm25_ids[:args.k]
+        hits["hybrid"][kind] += relevant in fused[:args.k]
+
+    print(f"backend={args.backend} docs={len(docs)} queries={len(queries)} k={args.k} "
+          f"candidates={args.candidates} rrf_k={args.rrf_k}")
+    print(f"{'mode':<8} {'recall@k code':>14} {'recall@k para':>14} {'recall@k all':>13} {'p50 ms':>8} {'p95 ms':>8}")
+    for mode in ("vector", "bm25", "hybrid"):
+        code = hits[mode]["exact-code"] / max(totals["exact-code"], 1)
+        para = hits[mode]["paraphrase"] / max(totals["paraphrase"], 1)
+        overall = sum(hits[mode].values()) / len(queries)
+        print(f"{mode:<8} {code:>14.3f} {para:>14.3f} {overall:>13.3f} "
+              f"{statistics.median(latency[mode]):>8.3f} {percentile(latency[mode], 0.95):>8.3f}")
+
+    extra_docs, _, _ = make_corpus(args.batch, rng)
+    started = time.perf_counter()
+    index.add([f"extra_{i}" for i in range(len(extra_docs))], extra_docs)
+    add_ms = (time.perf_counter() - started) * 1000
+
+    path = os.path.join(tempfile.mkdtemp(), "bm25_index.npz")
+    index.persist_path = path
+    started = time.perf_counter()
+    index.save()
+    save_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    BM25Index(path).load()
+    load_ms = (time.perf_counter() - started) * 1000
+    print(f"bm25 build {build_s * 1000:.0f} ms ({len(docs) / build_s:.0f} chunks/s), "
+          f"incremental add of {args.batch}: {add_ms:.1f} ms, terms={index.stats()['terms']}")
+    print(f"snapshot {os.path.getsize(path) / 1024:.1f} KiB, save {save_ms:.0f} ms, load {load_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=["synthetic", "sentence-transformers"], default="synthetic")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, default=3, help="results passed to the LLM (n_results)")
+    parser.add_argument("--candidates", type=int, default=20, help="candidates per retriever before fusion")
+    parser.add_argument("--rrf-k", type=int, default=60)
+    parser.add_argument("--batch", type=int, default=64, help="chunks per incremental add")
+    main(parser.parse_args())
@@ -0,0 +1,123 @@
+"""Load benchmark for the LLM gateway against a stubbed local model server.
+
+Starts a tiny HTTP server that answers every request after a fixed delay,
+then drives the gateway with an increasing number of concurrent clients and
+compares it with the old behaviour of calling the model inline on the loop.
+
+    python benchmarks/bench_llm_gateway.py --latency-ms 200 --requests 64
+"""
+import argparse
+import asyncio
+import json
+import sys
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.llm_gateway import LLMGateway  # noqa: E402
+
+
+def start_stub_server(latency_ms: int) -> ThreadingHTTPServer:
+    """Serve fake completions on a random local port"""
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            time.sleep(latency_ms / 1000)
+            body = json.dumps({"text": f"stub answer ({len(payload.get('prompt', ''))} chars)"}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    class StubServer(ThreadingHTTPServer):
+        daemon_threads = True
+        request_queue_size = 256
+
+    server = StubServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class StubResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubModel:
+    """Blocking model client that talks to the stub server"""
+
+    def __init__(self, url: str):
+        self.url = url
+
+    def generate_content(self, prompt: str) -> StubResponse:
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps({"prompt": prompt}).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return StubResponse(json.loads(response.read())["text"])
+
+
+async def run_inline(model: StubModel, total: int, concurrency: int) -> float:
+    """Old behaviour: the blocking call runs directly inside the coroutine"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            return model.generate_content(f"prompt {i}").text
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return time.perf_counter() - started
+
+
+async def run_gateway(url: str, total: int, concurrency: int, limit: int) -> float:
+    gateway = LLMGateway(
+        model_name="stub",
+        max_concurrency=limit,
+        model_factory=lambda *_: StubModel(url),
+    )
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            return await gateway.generate(f"prompt {i}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - started
+    gateway.shutdown()
+    return elapsed
+
+
+async def main(args):
+    server = start_stub_server(args.latency_ms)
+    url = f"http://127.0.0.1:{server.server_address[1]}/generate"
+    print(f"Stub model server at {url} ({args.latency_ms} ms per call)")
+    print(f"{'clients':>8} {'inline req/s':>14} {'gateway req/s':>14} {'speedup':>9}")
+    for clients in args.clients:
+        inline = await run_inline(StubModel(url), args.requests, clients)
+        gateway = await run_gateway(url, args.requests, clients, args.limit)
+        print(f"{clients:>8} {args.requests / inline:>14.1f} {args.requests / gateway:>14.1f} "
+              f"{inline / gateway:>8.1f}x")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency-ms", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--limit", type=int, default=32, help="gateway concurrency limit")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    asyncio.run(main(parser.parse_args()))
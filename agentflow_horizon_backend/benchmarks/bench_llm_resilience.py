@@ -0,0 +1,138 @@
+"""Goodput under a quota: immediate retries vs backoff vs the adaptive limiter + breaker.
+
+Simulates a Gemini-like upstream that admits `--quota` requests per second
+(anything above gets a 429) and answers after `--latency-ms`. Many
+concurrent clients call it in a loop for `--seconds` through each strategy,
+and the script reports successful calls/s against the quota, upstream
+attempts/s, the share of attempts that were throttled and failed calls. A
+second phase takes the upstream down for `--outage` seconds and counts how
+many attempts each strategy still sends to it.
+
+    python benchmarks/bench_llm_resilience.py --quota 20 --clients 64 --seconds 10
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.resilience import AdaptiveRateLimiter, CircuitBreaker, UpstreamGuard  # noqa: E402
+
+
+class UpstreamError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+class FakeUpstream:
+    """Fixed-window quota per second; `down` makes every call fail with 503"""
+
+    def __init__(self, quota: int, latency_ms: float):
+        self.quota = quota
+        self.latency = latency_ms / 1000
+        self.window = 0
+        self.used = 0
+        self.down = False
+        self.attempts = 0
+        self.throttled = 0
+
+    async def generate(self) -> str:
+        self.attempts += 1
+        if self.down:
+            await asyncio.sleep(self.latency)
+            raise UpstreamError(503, "503 Service Unavailable")
+        window = int(time.monotonic())
+        if window != self.window:
+            self.window, self.used = window, 0
+        if self.used >= self.quota:
+            self.throttled += 1
+            raise UpstreamError(429, "429 Resource has been exhausted (e.g. check quota).")
+        self.used += 1
+        await asyncio.sleep(self.latency * random.uniform(0.8, 1.2))
+        return "ok"
+
+
+async def immediate_retry(upstream: FakeUpstream, attempts: int = 4):
+    for attempt in range(attempts):
+        try:
+            return await upstream.generate()
+        except UpstreamError:
+            if attempt == attempts - 1:
+                raise
+
+
+def backoff_only(max_attempts: int):
+    guard = UpstreamGuard(None, CircuitBreaker(failure_threshold=10 ** 9), max_attempts=max_attempts)
+    return guard, lambda upstream: guard.call(upstream.generate)
+
+
+def guarded(quota_guess: float, max_attempts: int):
+    guard = UpstreamGuard(AdaptiveRateLimiter(quota_guess), CircuitBreaker(failure_threshold=5, reset_seconds=2),
+                          max_attempts=max_attempts)
+    return guard, lambda upstream: guard.call(upstream.generate)
+
+
+async def drive(call, upstream: FakeUpstream, clients: int, seconds: float):
+    """Clients start calls until `seconds` have passed; rates use the time until the last call returned"""
+    started_at = time.monotonic()
+    stop = started_at + seconds
+    succeeded, failed, latencies = 0, 0, []
+
+    async def client():
+        nonlocal succeeded, failed
+        while time.monotonic() < stop:
+            started = time.monotonic()
+            try:
+                await call(upstream)
+                succeeded += 1
+                latencies.append(time.monotonic() - started)
+            except Exception:
+                failed += 1
+                await asyncio.sleep(0.05)
+
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return succeeded, failed, latencies, time.monotonic() - started_at
+
+
+async def main(args):
+    strategies = {
+        "immediate retry": lambda: (None, immediate_retry),
+        "backoff only": lambda: backoff_only(args.attempts),
+        "limiter+breaker": lambda: guarded(args.quota * 2, args.attempts),
+    }
+    print(f"quota={args.quota}/s clients={args.clients} seconds={args.seconds} (limiter starts at 2x quota)")
+    print(f"{'strategy':<16} {'ok/s':>7} {'of quota':>9} {'attempts/s':>11} {'throttled':>10} {'failed':>7} "
+          f"{'p95 s':>7}")
+    for name, build in strategies.items():
+        upstream = FakeUpstream(args.quota, args.latency_ms)
+        _, call = build()
+        succeeded, failed, latencies, elapsed = await drive(call, upstream, args.clients, args.seconds)
+        p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else 0.0
+        print(f"{name:<16} {succeeded / elapsed:>7.1f} {succeeded / elapsed / args.quota:>9.0%} "
+              f"{upstream.attempts / elapsed:>11.1f} {upstream.throttled / max(upstream.attempts, 1):>10.0%} "
+              f"{failed:>7} {p95:>7.2f}")
+
+    print(f"\noutage: upstream returns 503 for {args.outage}s")
+    print(f"{'strategy':<16} {'attempts sent':>14} {'failed':>7}")
+    for name, build in strategies.items():
+        upstream = FakeUpstream(args.quota, args.latency_ms)
+        upstream.down = True
+        _, call = build()
+        _, failed, _, _ = await drive(call, upstream, args.clients, args.outage)
+        print(f"{name:<16} {upstream.attempts:>14} {failed:>7}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quota", type=int, default=20, help="upstream requests per second")
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--attempts", type=int, default=4)
+    parser.add_argument("--outage", type=float, default=5)
+    asyncio.run(main(parser.parse_args()))
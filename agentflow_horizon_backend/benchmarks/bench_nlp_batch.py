@@ -0,0 +1,95 @@
+"""Per-item cost of /api/nlp/batch/{task} vs one request per record.
+
+Runs the FastAPI app in-process with a stub Gemini model that sleeps a fixed
+latency per call (plus a small per-packed-item cost) and answers packed
+prompts with a JSON array, like the real model does.
+
+    python benchmarks/bench_nlp_batch.py --items 200 --latency-ms 300
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+WORDS = ("great terrible service product delivery support price quality slow fast "
+         "love hate recommend refund broken excellent okay fine awful amazing").split()
+ITEM_ID = re.compile(r"^\[id=(\d+)\]$", re.MULTILINE)
+
+
+class StubResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubModel:
+    def __init__(self, latency_ms: float, per_item_ms: float):
+        self.latency_ms = latency_ms
+        self.per_item_ms = per_item_ms
+
+    def generate_content(self, prompt: str):
+        ids = ITEM_ID.findall(prompt)
+        time.sleep((self.latency_ms + self.per_item_ms * len(ids)) / 1000)
+        if not ids:
+            return StubResponse("Overall sentiment: Positive. Confidence 0.8.")
+        items = ", ".join(
+            f'{{"id": {i}, "sentiment": "Positive", "confidence": 0.8, "analysis": "stub", '
+            f'"entities": "ORGANIZATION: Acme", "summary": "stub summary"}}' for i in ids
+        )
+        return StubResponse(f"```json\n[{items}]\n```")
+
+
+def main(args):
+    workdir = tempfile.mkdtemp(prefix="bench-nlp-batch-")
+    os.chdir(workdir)
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+
+    import server
+    from fastapi.testclient import TestClient
+    from utils.llm_gateway import LLMGateway
+
+    model = StubModel(args.latency_ms, args.per_item_ms)
+    server.services.register("llm_gateway", lambda: LLMGateway(model_factory=lambda *a: model, prefer_native_async=False),
+                             close=lambda gateway: gateway.shutdown())
+    for name in ("chroma_client", "chroma_collection", "query_embedder"):
+        server.services.register(name, lambda: None, required=False)
+
+    rng = random.Random(0)
+    texts = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 40))) for _ in range(args.items)]
+    bypass = {"X-Cache-Bypass": "1"}
+
+    with TestClient(server.app) as client:
+        sample = texts[:args.single_sample]
+        started = time.perf_counter()
+        for text in sample:
+            client.post(f"/api/nlp/{args.task}", json={"text": text}, headers=bypass).raise_for_status()
+        single_ms = (time.perf_counter() - started) * 1000 / len(sample)
+
+        started = time.perf_counter()
+        response = client.post(f"/api/nlp/batch/{args.task}", json={"texts": texts}, headers=bypass)
+        response.raise_for_status()
+        batch_ms = (time.perf_counter() - started) * 1000 / len(texts)
+        body = response.json()
+
+    print(f"task={args.task} items={args.items} latency={args.latency_ms}ms")
+    print(f"single-item requests : {single_ms:8.2f} ms/item  (1 LLM call per item)")
+    print(f"batch endpoint       : {batch_ms:8.2f} ms/item  ({body['llm_calls']} LLM calls, "
+          f"{body['packed_items']} items packed)")
+    print(f"speed-up             : {single_ms / batch_ms:8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--task", choices=["sentiment", "entities", "summarize"], default="sentiment")
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--single-sample", type=int, default=20, help="single-item requests to time")
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--per-item-ms", type=float, default=5)
+    main(parser.parse_args())
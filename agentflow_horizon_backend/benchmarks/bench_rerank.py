@@ -0,0 +1,63 @@
+"""Cross-encoder rerank latency on CPU: one batched call vs one call per candidate.
+
+Loads the ONNX cross-encoder the server uses (RERANK_MODEL, downloaded once
+into the Hugging Face cache) and, for each candidate count, times scoring
+synthetic query/chunk pairs in a single batch against scoring them one
+pair at a time. Compare the batched p95 with RERANK_BUDGET_MS.
+
+    python benchmarks/bench_rerank.py --candidates 10 20 40 --onnx-file onnx/model_qint8_avx2.onnx
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.reranker import OnnxCrossEncoder  # noqa: E402
+
+WORDS = ("pump valve pressure sensor motor bearing seal filter voltage current torque warranty manual "
+         "install replace inspect clean calibrate schedule operator safety alarm reset firmware").split()
+
+
+def percentile(samples, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main(args):
+    rng = random.Random(5)
+    started = time.perf_counter()
+    encoder = OnnxCrossEncoder(args.model, onnx_file=args.onnx_file, max_length=args.max_length,
+                               threads=args.threads)
+    print(f"model={args.model} file={args.onnx_file} loaded in {time.perf_counter() - started:.1f}s")
+    query = "how often should the pump seal be replaced"
+    print(f"{'candidates':>10} {'batched p50':>12} {'batched p95':>12} {'per-pair p50':>13}  (ms)")
+    for count in args.candidates:
+        texts = [" ".join(rng.choice(WORDS) for _ in range(args.words)) for _ in range(count)]
+        encoder(query, texts)  # warm-up
+        batched, single = [], []
+        for _ in range(args.repeats):
+            started = time.perf_counter()
+            encoder(query, texts)
+            batched.append((time.perf_counter() - started) * 1000)
+            started = time.perf_counter()
+            for text in texts:
+                encoder(query, [text])
+            single.append((time.perf_counter() - started) * 1000)
+        print(f"{count:>10} {statistics.median(batched):>12.1f} {percentile(batched, 0.95):>12.1f} "
+              f"{statistics.median(single):>13.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="cross-encoder/ms-marco-MiniLM-L6-v2")
+    parser.add_argument("--onnx-file", default="onnx/model.onnx")
+    parser.add_argument("--candidates", type=int, nargs="+", default=[10, 20, 40])
+    parser.add_argument("--words", type=int, default=120, help="words per candidate chunk")
+    parser.add_argument("--max-length", type=int, default=256)
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=20)
+    main(parser.parse_args())
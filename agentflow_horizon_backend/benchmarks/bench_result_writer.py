@@ -0,0 +1,83 @@
+"""Write-throughput benchmark for result persistence.
+
+Compares the old one-session-one-commit-per-record pattern with the batched
+write-behind ResultWriter on a throwaway SQLite database.
+
+    python benchmarks/bench_result_writer.py --records 5000
+"""
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from database.result_store import Base, ResultRecord, ResultWriter, create_db_engine  # noqa: E402
+
+
+def make_row(i: int) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "tool_name": "benchmark",
+        "input_data": json.dumps({"text": f"input {i}" * 10}),
+        "output_data": json.dumps({"summary": f"output {i}" * 20}),
+        "timestamp": datetime.utcnow(),
+    }
+
+
+def bench_per_record(url: str, records: int) -> float:
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+    started = time.perf_counter()
+    for i in range(records):
+        db = session_factory()
+        db.add(ResultRecord(**make_row(i)))
+        db.commit()
+        db.close()
+    return time.perf_counter() - started
+
+
+async def bench_writer(url: str, records: int, flush_size: int) -> tuple:
+    engine = create_db_engine(url)
+    Base.metadata.create_all(bind=engine)
+    writer = ResultWriter(engine, flush_size=flush_size, flush_interval=0.05)
+    await writer.start()
+    started = time.perf_counter()
+    worst_submit = 0.0
+    for i in range(records):
+        before = time.perf_counter()
+        await writer.submit(make_row(i))
+        worst_submit = max(worst_submit, time.perf_counter() - before)
+    enqueued = time.perf_counter() - started
+    await writer.stop()
+    return time.perf_counter() - started, enqueued, worst_submit, writer.stats()
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline = bench_per_record(f"sqlite:///{tmp}/baseline.db", args.baseline_records)
+        total, enqueued, worst, stats = asyncio.run(
+            bench_writer(f"sqlite:///{tmp}/writer.db", args.records, args.flush_size)
+        )
+    print(f"per-record commits : {args.baseline_records / baseline:>10.0f} records/s")
+    print(f"write-behind writer: {args.records / total:>10.0f} records/s "
+          f"({stats['batches']} batches, {stats['failed']} failed)")
+    print(f"request-path cost  : {enqueued / args.records * 1e6:>10.1f} us/record avg, "
+          f"{worst * 1e3:.2f} ms worst")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=5000)
+    parser.add_argument("--baseline-records", type=int, default=500)
+    parser.add_argument("--flush-size", type=int, default=200)
+    main(parser.parse_args())
@@ -0,0 +1,96 @@
+"""Latency of document-scoped vs whole-collection retrieval as the corpus grows.
+
+Fills an in-memory Chroma collection and a BM25 index with synthetic chunks
+(`--chunks-per-doc` per document) and, for each corpus size, times
+unscoped queries against queries restricted to one document: Chroma with a
+`where={"doc_id": ...}` filter, the cached per-document matrices the server
+uses (DocumentVectors, plus the id lookup for the chunk text), and BM25
+groups. Embeddings are random unit vectors, so no model is downloaded.
+
+    python benchmarks/bench_scoped_search.py --sizes 2000 10000 50000
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database.bm25_index import BM25Index  # noqa: E402
+from database.document_vectors import DocumentVectors  # noqa: E402
+
+WORDS = ("pump valve pressure sensor motor bearing seal filter voltage current torque warranty manual "
+         "install replace inspect clean calibrate schedule operator safety alarm reset firmware").split()
+
+
+def make_chunk(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(60)) + f" part {rng.randint(1000, 9999)}"
+
+
+def timed(function, repeats: int):
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main(args):
+    import chromadb
+
+    rng = random.Random(3)
+    vectors = np.random.default_rng(3)
+    client = chromadb.EphemeralClient()
+    collection = client.create_collection(f"bench_{uuid.uuid4().hex[:8]}", metadata={"hnsw:space": "cosine"},
+                                          embedding_function=None)
+    index = BM25Index()
+    document_vectors = DocumentVectors(collection)
+    doc_ids, size = [], 0
+    print(f"{'chunks':>8} {'docs':>6} {'vector all':>11} {'where 1 doc':>12} {'cached 1 doc':>13} "
+          f"{'bm25 all':>9} {'bm25 1 doc':>11}  (median ms)")
+    for target in sorted(args.sizes):
+        while size < target:
+            doc_id = str(uuid.uuid4())
+            doc_ids.append(doc_id)
+            count = min(args.chunks_per_doc, target - size)
+            ids = [f"{doc_id}_{i}" for i in range(count)]
+            texts = [make_chunk(rng) for _ in range(count)]
+            embeddings = vectors.standard_normal((count, args.dim)).astype(np.float32)
+            embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+            collection.add(ids=ids, documents=texts, embeddings=embeddings.tolist(),
+                           metadatas=[{"doc_id": doc_id, "chunk_id": i} for i in range(count)])
+            index.add(ids, texts, [doc_id] * count)
+            size += count
+
+        query = vectors.standard_normal(args.dim).astype(np.float32).tolist()
+        query_text = "replace the pump seal and calibrate the pressure sensor"
+        scope = rng.choice(doc_ids)
+        vector_all = timed(lambda: collection.query(query_embeddings=[query], n_results=args.k), args.repeats)
+        vector_doc = timed(lambda: collection.query(query_embeddings=[query], n_results=args.k,
+                                                    where={"doc_id": scope}), args.repeats)
+        document_vectors.search(query, [scope], args.k)  # first query for a document loads it
+
+        def cached_scoped():
+            top = document_vectors.search(query, [scope], args.k)
+            collection.get(ids=[chunk_id for chunk_id, _ in top[:3]], include=["documents", "metadatas"])
+        vector_cached = timed(cached_scoped, args.repeats)
+        bm25_all = timed(lambda: index.search(query_text, args.k), args.repeats)
+        bm25_doc = timed(lambda: index.search(query_text, args.k, [scope]), args.repeats)
+        print(f"{size:>8} {len(doc_ids):>6} {vector_all:>11.2f} {vector_doc:>12.2f} {vector_cached:>13.2f} "
+              f"{bm25_all:>9.2f} {bm25_doc:>11.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2000, 10000, 30000])
+    parser.add_argument("--chunks-per-doc", type=int, default=50)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=20, help="candidates per retriever (HYBRID_CANDIDATES)")
+    parser.add_argument("--repeats", type=int, default=30)
+    main(parser.parse_args())
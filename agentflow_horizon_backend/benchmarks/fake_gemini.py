@@ -0,0 +1,187 @@
+"""Local stand-in for the Gemini REST API, for offline load tests.
+
+Answers `models/*:generateContent` and `models/*:streamGenerateContent` the
+way google-generativeai's REST transport expects. The first token arrives
+after `--latency-ms` (with `--jitter` spread), and the rest follow at
+`--tokens-per-second`. Replies are `--output-tokens` words long, capped by the
+request's maxOutputTokens. Packed batch prompts (utils/batch_prompting.py) get
+a well-formed JSON array, so the batch endpoints take their normal path.
+`--error-rate` answers that share of calls with a 503.
+
+    python benchmarks/fake_gemini.py --port 8085 --latency-ms 300 --tokens-per-second 200
+    GEMINI_API_KEY=fake GEMINI_API_ENDPOINT=http://127.0.0.1:8085 python server.py
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = ("the model reviewed the retrieved context and found that the main findings point to steady "
+         "progress with several open questions about cost latency and reliability in production").split()
+PACKED_COUNT = re.compile(r"JSON array containing exactly (\d+) objects")
+PACKED_SCHEMA = re.compile(r'^\{"id": <input id>, (.*)\}$', re.M)
+# '"sentiment": "Positive" | "Negative", "confidence": number between 0 and 1, ...'
+SCHEMA_FIELD = re.compile(r'"(\w+)": (.*?)(?=, "\w+": |$)')
+
+
+class FakeGeminiConfig:
+    def __init__(self, latency_ms: float = 300, jitter: float = 0.2, tokens_per_second: float = 200,
+                 output_tokens: int = 150, error_rate: float = 0.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.tokens_per_second = tokens_per_second
+        self.output_tokens = output_tokens
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.streams = 0
+        self.errors = 0
+        self.prompt_chars = 0
+
+    def first_token_delay(self) -> float:
+        with self.lock:
+            spread = self.random.uniform(1 - self.jitter, 1 + self.jitter)
+        return self.latency_ms / 1000 * spread
+
+    def should_fail(self) -> bool:
+        with self.lock:
+            return self.error_rate > 0 and self.random.random() < self.error_rate
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "streams": self.streams, "errors": self.errors,
+                "prompt_chars": self.prompt_chars}
+
+
+def prompt_text(payload: dict) -> str:
+    return "\n".join(part.get("text", "") for content in payload.get("contents", [])
+                     for part in content.get("parts", []))
+
+
+def reply_words(prompt: str, max_tokens: int) -> list:
+    """Reply as a list of chunks of roughly one token each"""
+    count = PACKED_COUNT.search(prompt)
+    schema = PACKED_SCHEMA.search(prompt)
+    if count and schema:
+        items = []
+        for index in range(int(count.group(1))):
+            item = {"id": index}
+            for name, description in SCHEMA_FIELD.findall(schema.group(1)):
+                if "number" in description:
+                    item[name] = 0.8
+                elif "|" in description:
+                    item[name] = description.split("|")[0].strip().strip('"')
+                else:
+                    item[name] = " ".join(WORDS[:12])
+            items.append(item)
+        text = json.dumps(items)
+        return [text[i:i + 4] for i in range(0, len(text), 4)]
+    return [WORDS[i % len(WORDS)] + " " for i in range(max_tokens)]
+
+
+def response_chunk(text: str, prompt_chars: int, output_tokens: int, finished: bool) -> dict:
+    candidate = {"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}
+    if finished:
+        candidate["finishReason"] = "STOP"
+    return {
+        "candidates": [candidate],
+        "usageMetadata": {
+            "promptTokenCount": prompt_chars // 4,
+            "candidatesTokenCount": output_tokens,
+            "totalTokenCount": prompt_chars // 4 + output_tokens,
+        },
+    }
+
+
+def make_handler(config: FakeGeminiConfig):
+    class FakeGeminiHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            prompt = prompt_text(payload)
+            max_tokens = int(payload.get("generationConfig", {}).get("maxOutputTokens") or config.output_tokens)
+            words = reply_words(prompt, min(config.output_tokens, max_tokens))
+            streaming = ":streamGenerateContent" in self.path
+            with config.lock:
+                config.calls += 1
+                config.streams += streaming
+                config.prompt_chars += len(prompt)
+
+            time.sleep(config.first_token_delay())
+            if config.should_fail():
+                with config.lock:
+                    config.errors += 1
+                self._send_json(503, {"error": {"code": 503, "message": "The model is overloaded.",
+                                                "status": "UNAVAILABLE"}})
+                return
+            per_token = 1 / config.tokens_per_second if config.tokens_per_second > 0 else 0.0
+            if not streaming:
+                time.sleep(per_token * len(words))
+                self._send_json(200, response_chunk("".join(words), len(prompt), len(words), True))
+                return
+
+            # The REST transport reads one JSON array whose elements arrive over time
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            self._write_chunk(b"[")
+            step = 8
+            for start in range(0, len(words), step):
+                time.sleep(per_token * len(words[start:start + step]))
+                chunk = response_chunk("".join(words[start:start + step]), len(prompt), len(words),
+                                       start + step >= len(words))
+                self._write_chunk((("," if start else "") + json.dumps(chunk)).encode("utf-8"))
+            self._write_chunk(b"]")
+            self._write_chunk(b"")
+
+        def _send_json(self, status: int, body: dict):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _write_chunk(self, data: bytes):
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        def log_message(self, *args):
+            pass
+
+    return FakeGeminiHandler
+
+
+def start_fake_gemini(config: FakeGeminiConfig, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Serve on a background thread; the bound port is `server.server_port`"""
+    server = ThreadingHTTPServer((host, port), make_handler(config))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8085)
+    parser.add_argument("--latency-ms", type=float, default=300, help="time to first token")
+    parser.add_argument("--jitter", type=float, default=0.2, help="+/- share of the latency")
+    parser.add_argument("--tokens-per-second", type=float, default=200)
+    parser.add_argument("--output-tokens", type=int, default=150)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    fake = FakeGeminiConfig(args.latency_ms, args.jitter, args.tokens_per_second, args.output_tokens,
+                            args.error_rate, args.seed)
+    server = start_fake_gemini(fake, args.host, args.port)
+    print(f"Fake Gemini on http://{args.host}:{server.server_port} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        print(fake.stats())
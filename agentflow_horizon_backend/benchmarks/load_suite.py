@@ -0,0 +1,593 @@
+"""Offline load test of every route: fake Gemini, synthetic corpora and a concurrency sweep.
+
+Starts benchmarks/fake_gemini.py and a synthetic website on local ports, then
+the real server (uvicorn subprocess, empty data directory) with
+GEMINI_API_ENDPOINT pointing at the fake. The server runs from
+benchmarks/offline_server.py, which swaps Chroma's ONNX MiniLM model (a
+download on first use) for a deterministic hashing embedder; with the model
+cached, `--onnx-embeddings` benchmarks the real one. It uploads a synthetic text/PDF
+corpus and measures ingestion. It then drives each route at each concurrency
+level with closed-loop clients. For every level it records throughput,
+p50/p95/p99 latency (plus time to first byte for streaming routes), errors,
+server RSS, Gemini calls per request and the per-stage timings from /metrics.
+Results go to a JSON file, and `--compare` diffs a run against an earlier one.
+
+The run stops if ingestion indexes no chunks or the server reports a failed
+service (e.g. ChromaDB), since the numbers would describe demo mode;
+`--allow-degraded` keeps going and records the problems under "degraded".
+
+Inputs are unique per request by default, so caches only help where they
+would in production. `--reuse-inputs` repeats them to measure the cached path.
+The server's LLM rate limit is off (LLM_RATE_LIMIT_RPS=0) unless set with
+`--server-env`.
+
+    python benchmarks/load_suite.py --concurrency 1,8,32 --requests 64
+    python benchmarks/load_suite.py --routes rag_query,summarize --compare benchmarks/results/load_abc1234.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+BENCHMARKS = Path(__file__).resolve().parent
+BACKEND = BENCHMARKS.parent
+sys.path.insert(0, str(BENCHMARKS))
+
+from fake_gemini import FakeGeminiConfig, start_fake_gemini  # noqa: E402
+from synthetic_corpus import html_page, make_queries, make_text, write_corpus  # noqa: E402
+
+STAGE_SERIES = re.compile(r'^agentflow_stage_duration_seconds_(sum|count)\{stage="([^"]+)"\} (\S+)$', re.M)
+
+
+@dataclass
+class Route:
+    name: str
+    method: str
+    path: str
+    body: Optional[Callable] = None  # body(context, n) -> json payload
+    files: Optional[Callable] = None  # files(context, n) -> multipart files
+    stream: bool = False
+    needs_documents: bool = False
+
+
+class Context:
+    """What the routes need: ids from ingestion, the synthetic site and unique input numbers"""
+
+    def __init__(self, seed: int, site_url: str, reuse_inputs: bool):
+        self.seed = seed
+        self.site_url = site_url
+        self.reuse_inputs = reuse_inputs
+        self.queries = make_queries(seed, 64)
+        self.doc_ids: List[str] = []
+        self.job_ids: List[str] = []
+        self._counter = itertools.count()
+
+    def next(self) -> int:
+        return next(self._counter)
+
+    def query(self, n: int) -> str:
+        base = self.queries[n % len(self.queries)]
+        # A distinct number also keeps the semantic cache from treating variants as paraphrases
+        return base if self.reuse_inputs else f"{base} (case {n})"
+
+    def text(self, n: int) -> str:
+        return make_text(self.seed, n % 64 if self.reuse_inputs else n)
+
+    def page(self, n: int) -> str:
+        return f"{self.site_url}/page/{n % 64 if self.reuse_inputs else n}"
+
+    def doc_id(self, n: int) -> str:
+        return self.doc_ids[n % len(self.doc_ids)]
+
+
+ROUTES = [
+    Route("root", "GET", "/"),
+    Route("health", "GET", "/api/health"),
+    Route("health_ready", "GET", "/api/health/ready"),
+    Route("metrics", "GET", "/metrics"),
+    Route("research", "POST", "/api/agentflow/research", lambda c, n: {"query": c.query(n)}),
+    Route("research_stream", "POST", "/api/agentflow/research/stream", lambda c, n: {"query": c.query(n)},
+          stream=True),
+    Route("rag_query", "POST", "/api/agentflow/rag-query", lambda c, n: {"query": c.query(n)}),
+    Route("rag_query_stream", "POST", "/api/agentflow/rag-query/stream", lambda c, n: {"query": c.query(n)},
+          stream=True),
+    Route("web_scrape", "POST", "/api/agentflow/web-scrape", lambda c, n: {"url": c.page(n)}),
+    Route("web_scrape_batch", "POST", "/api/agentflow/web-scrape/batch",
+          lambda c, n: {"urls": [c.page(n * 4 + i) for i in range(4)]}, stream=True),
+    Route("file_upload_query", "POST", "/api/agentflow/file-upload",
+          lambda c, n: {"file_id": c.doc_id(n), "query": c.query(n)}, needs_documents=True),
+    Route("documents_list", "GET", "/api/documents"),
+    Route("document_stats", "GET", "/api/documents/{doc_id}", needs_documents=True),
+    Route("ingestion_status", "GET", "/api/documents/jobs/{job_id}"),
+    Route("document_query", "POST", "/api/documents/query", lambda c, n: {"query": c.query(n)}),
+    Route("document_query_scoped", "POST", "/api/documents/query",
+          lambda c, n: {"query": c.query(n), "doc_ids": [c.doc_id(n), c.doc_id(n + 1)]}, needs_documents=True),
+    Route("document_query_stream", "POST", "/api/documents/query/stream",
+          lambda c, n: {"query": c.query(n), "doc_id": c.doc_id(n)}, stream=True, needs_documents=True),
+    Route("summarize", "POST", "/api/nlp/summarize", lambda c, n: {"text": c.text(n)}),
+    Route("summarize_stream", "POST", "/api/nlp/summarize/stream", lambda c, n: {"text": c.text(n)}, stream=True),
+    Route("entities", "POST", "/api/nlp/entities", lambda c, n: {"text": c.text(n)}),
+    Route("sentiment", "POST", "/api/nlp/sentiment", lambda c, n: {"text": c.text(n)}),
+    Route("qna", "POST", "/api/nlp/qna", lambda c, n: {"context": c.text(n), "question": c.query(n)}),
+    Route("batch_sentiment", "POST", "/api/nlp/batch/sentiment",
+          lambda c, n: {"texts": [c.text(n * 16 + i) for i in range(16)]}),
+    Route("batch_summarize", "POST", "/api/nlp/batch/summarize",
+          lambda c, n: {"texts": [c.text(n * 8 + i) for i in range(8)]}),
+    # Last: every upload changes the corpus the other routes search
+    Route("document_upload", "POST", "/api/documents/upload",
+          files=lambda c, n: {"file": (f"load_{n}.txt", "\n\n".join(c.text(n * 10 + i) for i in range(10)),
+                                       "text/plain")}),
+]
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Linear interpolation between closest ranks; q in [0, 100]"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize_ms(values: List[float]) -> Optional[dict]:
+    if not values:
+        return None
+    return {
+        "p50": round(percentile(values, 50) * 1000, 1),
+        "p95": round(percentile(values, 95) * 1000, 1),
+        "p99": round(percentile(values, 99) * 1000, 1),
+        "mean": round(sum(values) / len(values) * 1000, 1),
+        "max": round(max(values) * 1000, 1),
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_site(seed: int) -> ThreadingHTTPServer:
+    """Synthetic website: /page/<n> is a deterministic article page"""
+
+    class SiteHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            match = re.match(r"^/page/(\d+)$", self.path)
+            body = html_page(seed, int(match.group(1))).encode("utf-8") if match else b"not found"
+            self.send_response(200 if match else 404)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class RssSampler:
+    """Peak and current resident memory of the server process, sampled from /proc (Linux only)"""
+
+    def __init__(self, pid: int, interval: float = 0.05):
+        self.path = Path(f"/proc/{pid}/status")
+        self.interval = interval
+        self.peak_kb = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def read_kb(self) -> Optional[int]:
+        try:
+            for line in self.path.read_text().splitlines():
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+        except (OSError, ValueError):
+            return None
+        return None
+
+    async def _sample(self):
+        while True:
+            self.peak_kb = max(self.peak_kb, self.read_kb() or 0)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        self.peak_kb = self.read_kb() or 0
+        self._task = asyncio.ensure_future(self._sample())
+
+    async def stop(self) -> dict:
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        current = self.read_kb()
+        return {
+            "rss_mb": round(current / 1024, 1) if current else None,
+            "peak_rss_mb": round(self.peak_kb / 1024, 1) if self.peak_kb else None,
+        }
+
+
+def stage_totals(metrics_text: str) -> Dict[str, list]:
+    totals: Dict[str, list] = {}
+    for kind, stage, value in STAGE_SERIES.findall(metrics_text):
+        totals.setdefault(stage, [0.0, 0.0])[0 if kind == "sum" else 1] = float(value)
+    return totals
+
+
+def stage_delta(before: Dict[str, list], after: Dict[str, list], requests: int) -> dict:
+    """Per stage: calls per request and mean ms per call during one level"""
+    stages = {}
+    for stage, (total, count) in after.items():
+        previous_total, previous_count = before.get(stage, [0.0, 0.0])
+        calls = count - previous_count
+        if calls > 0:
+            stages[stage] = {
+                "calls_per_request": round(calls / max(requests, 1), 2),
+                "avg_ms": round((total - previous_total) / calls * 1000, 2),
+            }
+    return stages
+
+
+async def send(client: httpx.AsyncClient, route: Route, context: Context, n: int):
+    """(status, seconds to first byte or None); streams are read to the end"""
+    path = route.path.format(
+        doc_id=context.doc_id(n) if context.doc_ids else "missing",
+        job_id=context.job_ids[n % len(context.job_ids)] if context.job_ids else "missing",
+    )
+    kwargs = {}
+    if route.body:
+        kwargs["json"] = route.body(context, n)
+    if route.files:
+        kwargs["files"] = route.files(context, n)
+    if not route.stream:
+        response = await client.request(route.method, path, **kwargs)
+        return response.status_code, None
+    started = time.perf_counter()
+    first_byte = None
+    async with client.stream(route.method, path, **kwargs) as response:
+        async for chunk in response.aiter_bytes():
+            if first_byte is None and chunk:
+                first_byte = time.perf_counter() - started
+    return response.status_code, first_byte
+
+
+async def run_level(client: httpx.AsyncClient, route: Route, context: Context, concurrency: int,
+                    requests: int, sampler: RssSampler, fake: FakeGeminiConfig) -> dict:
+    latencies, first_bytes, statuses = [], [], Counter()
+    remaining = itertools.count()
+    metrics_before = stage_totals((await client.get("/metrics")).text)
+    llm_calls_before = fake.calls
+
+    async def worker():
+        while next(remaining) < requests:
+            n = context.next()
+            started = time.perf_counter()
+            try:
+                status, first_byte = await send(client, route, context, n)
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+                continue
+            statuses[str(status)] += 1
+            if status < 400:
+                latencies.append(time.perf_counter() - started)
+                if first_byte is not None:
+                    first_bytes.append(first_byte)
+
+    sampler.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    memory = await sampler.stop()
+    metrics_after = stage_totals((await client.get("/metrics")).text)
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "ok": len(latencies),
+        "errors": requests - len(latencies),
+        "statuses": dict(statuses),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "latency_ms": summarize_ms(latencies),
+        "ttfb_ms": summarize_ms(first_bytes),
+        **memory,
+        "llm_calls_per_request": round((fake.calls - llm_calls_before) / max(requests, 1), 2),
+        "stages": stage_delta(metrics_before, metrics_after, requests),
+    }
+
+
+async def ingest(client: httpx.AsyncClient, paths: List[Path], context: Context, sampler: RssSampler,
+                 concurrency: int, timeout: float) -> dict:
+    """Upload the corpus and wait for every job; documents that finish become the query scope"""
+    semaphore = asyncio.Semaphore(concurrency)
+    jobs = []
+
+    async def upload(path: Path):
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post("/api/documents/upload", files={"file": (path.name, path.read_bytes())})
+            response.raise_for_status()
+            job = response.json()
+            deadline = started + timeout
+            while job["status"] not in ("completed", "failed") and time.perf_counter() < deadline:
+                await asyncio.sleep(0.1)
+                job = (await client.get(f"/api/documents/jobs/{job['job_id']}")).json()
+            jobs.append({**job, "seconds": round(time.perf_counter() - started, 3), "bytes": path.stat().st_size})
+
+    sampler.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(upload(path) for path in paths))
+    elapsed = time.perf_counter() - started
+    memory = await sampler.stop()
+    # A job can complete without indexing anything; only documents with chunks count
+    indexed = [job for job in jobs if job["status"] == "completed" and job.get("chunks_indexed")]
+    for job in jobs:
+        if job not in indexed:
+            print(f"Ingestion of {job.get('filename')} ended as {job['status']} with "
+                  f"{job.get('chunks_indexed') or 0} chunks: {job.get('error')}")
+    context.doc_ids = [job["document_id"] for job in indexed]
+    context.job_ids = [job["job_id"] for job in jobs]
+    total_bytes = sum(job["bytes"] for job in jobs)
+    chunks = sum(job["chunks_indexed"] for job in indexed)
+    return {
+        "documents": len(paths),
+        "completed": len(indexed),
+        "failed": len(jobs) - len(indexed),
+        "pdf_documents": sum(path.suffix == ".pdf" for path in paths),
+        "pages": sum(job.get("total_pages") or 0 for job in indexed),
+        "chunks": chunks,
+        "bytes": total_bytes,
+        "elapsed_s": round(elapsed, 3),
+        "documents_per_s": round(len(indexed) / elapsed, 2),
+        "mb_per_s": round(total_bytes / 1024 / 1024 / elapsed, 3),
+        "chunks_per_s": round(chunks / elapsed, 1),
+        "per_document_ms": summarize_ms([job["seconds"] for job in indexed]),
+        **memory,
+    }
+
+
+async def failed_services(client: httpx.AsyncClient) -> Dict[str, str]:
+    """Services the server could not build; it then runs them in a degraded (demo) mode"""
+    services = (await client.get("/api/health/ready")).json().get("services", {})
+    return {name: state.get("error", "") for name, state in services.items() if state.get("status") == "failed"}
+
+
+def git_revision() -> dict:
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], cwd=BACKEND, capture_output=True, text=True,
+                                  timeout=30).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            return ""
+    return {"commit": git("rev-parse", "--short", "HEAD") or None,
+            "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def start_server(workdir: Path, port: int, gemini_url: str, extra_env: Dict[str, str],
+                 onnx_embeddings: bool) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "GEMINI_API_KEY": "fake-benchmark-key",
+        "GEMINI_API_ENDPOINT": gemini_url,
+        "LLM_RATE_LIMIT_RPS": "0",
+        "PYTHONUNBUFFERED": "1",
+        **extra_env,
+    }
+    app, app_dir = ("server:app", BACKEND) if onnx_embeddings else ("offline_server:app", BENCHMARKS)
+    log = open(workdir / "server.log", "wb")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--app-dir", str(app_dir),
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+
+
+async def wait_ready(client: httpx.AsyncClient, process: subprocess.Popen, timeout: float) -> float:
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            if (await client.get("/api/health/ready")).status_code == 200:
+                return time.perf_counter() - started
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server not ready after {timeout:.0f}s")
+
+
+def print_level(name: str, level: dict):
+    latency = level["latency_ms"] or {}
+    ttfb = level["ttfb_ms"] or {}
+    print(f"{name:<24} {level['concurrency']:>5} {level['throughput_rps'] or 0:>8.1f} "
+          f"{latency.get('p50', 0):>8.0f} {latency.get('p95', 0):>8.0f} {latency.get('p99', 0):>8.0f} "
+          f"{ttfb.get('p50', 0) if ttfb else '-':>7} {level['errors']:>6} {level['peak_rss_mb'] or 0:>8.0f} "
+          f"{level['llm_calls_per_request']:>5}")
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> List[str]:
+    """Print per route/concurrency changes; returns the regressions beyond `threshold` percent"""
+    print(f"\nCompared with {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')})")
+    for label, run in (("this run", current), ("the baseline", baseline)):
+        if run.get("degraded"):
+            print(f"Warning: {label} was degraded: {'; '.join(run['degraded'])}")
+    settings = ("latency_ms", "jitter", "tokens_per_second", "output_tokens", "error_rate", "reuse_inputs",
+                "onnx_embeddings")
+    changed = [key for key in settings
+               if current["meta"]["args"].get(key) != baseline["meta"].get("args", {}).get(key)]
+    if changed:
+        print(f"Warning: runs used different settings ({', '.join(changed)}); the numbers are not comparable")
+    print(f"{'route':<24} {'conc':>5} {'req/s':>24} {'p95 ms':>24}")
+    regressions = []
+    for name, route in current["routes"].items():
+        previous = {level["concurrency"]: level for level in baseline.get("routes", {}).get(name, {}).get("levels", [])}
+        for level in route["levels"]:
+            before = previous.get(level["concurrency"])
+            if not before or not before["latency_ms"] or not level["latency_ms"]:
+                continue
+            rps_change = (level["throughput_rps"] / before["throughput_rps"] - 1) * 100 if before["throughput_rps"] else 0
+            p95_change = (level["latency_ms"]["p95"] / before["latency_ms"]["p95"] - 1) * 100 if before["latency_ms"]["p95"] else 0
+            flag = ""
+            if rps_change < -threshold or p95_change > threshold:
+                flag = "  REGRESSION"
+                regressions.append(f"{name}@{level['concurrency']}")
+            print(f"{name:<24} {level['concurrency']:>5} {before['throughput_rps']:>7.1f} -> {level['throughput_rps']:<7.1f}"
+                  f"{rps_change:+5.0f}% {before['latency_ms']['p95']:>7.0f} -> {level['latency_ms']['p95']:<7.0f}"
+                  f"{p95_change:+5.0f}%{flag}")
+    return regressions
+
+
+async def main(args) -> int:
+    routes = [route for route in ROUTES if not args.routes or route.name in args.routes.split(",")]
+    unknown = set(args.routes.split(",")) - {route.name for route in ROUTES} if args.routes else set()
+    if unknown:
+        raise SystemExit(f"Unknown routes: {', '.join(sorted(unknown))}. Available: {', '.join(r.name for r in ROUTES)}")
+    levels = [int(value) for value in args.concurrency.split(",")]
+    extra_env = dict(item.split("=", 1) for item in args.server_env)
+
+    fake = FakeGeminiConfig(args.latency_ms, args.jitter, args.tokens_per_second, args.output_tokens,
+                            args.error_rate, args.seed)
+    gemini = start_fake_gemini(fake)
+    site = start_site(args.seed)
+    workdir = Path(tempfile.mkdtemp(prefix="agentflow-load-"))
+    corpus = write_corpus(workdir / "corpus", args.seed, args.documents, args.paragraphs)
+    port = free_port()
+    process = start_server(workdir, port, f"http://127.0.0.1:{gemini.server_port}", extra_env, args.onnx_embeddings)
+    context = Context(args.seed, f"http://127.0.0.1:{site.server_port}", args.reuse_inputs)
+    sampler = RssSampler(process.pid)
+
+    results = {
+        "meta": {
+            **git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": vars(args),
+        },
+        "routes": {},
+        "degraded": [],
+    }
+    limits = httpx.Limits(max_connections=max(levels) + 8, max_keepalive_connections=max(levels) + 8)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=args.timeout,
+                                     limits=limits) as client:
+            results["startup_s"] = round(await wait_ready(client, process, args.startup_timeout), 2)
+            print(f"Server ready in {results['startup_s']}s (fake Gemini: {args.latency_ms:.0f} ms to first token, "
+                  f"{args.tokens_per_second:.0f} tokens/s; {'ONNX' if args.onnx_embeddings else 'hashing'} "
+                  f"embeddings); data in {workdir}")
+
+            results["ingestion"] = await ingest(client, corpus, context, sampler, args.ingest_concurrency,
+                                                args.timeout)
+            ingestion = results["ingestion"]
+            print(f"Ingested {ingestion['completed']}/{ingestion['documents']} documents "
+                  f"({ingestion['chunks']} chunks) in {ingestion['elapsed_s']}s: "
+                  f"{ingestion['documents_per_s']} docs/s, {ingestion['mb_per_s']} MB/s, "
+                  f"peak RSS {ingestion['peak_rss_mb']} MB")
+
+            if not ingestion["chunks"]:
+                results["degraded"].append("ingestion indexed no chunks")
+            results["degraded"] += [f"service {name} failed: {error}"
+                                    for name, error in (await failed_services(client)).items()]
+            if results["degraded"]:
+                print("\n".join(f"Degraded: {problem}" for problem in results["degraded"]))
+                if not args.allow_degraded:
+                    raise SystemExit("Stopping: the server is degraded, so the results would not be representative "
+                                     f"(see {workdir / 'server.log'} with --keep-workdir, or pass --allow-degraded)")
+
+            print(f"\n{'route':<24} {'conc':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+                  f"{'ttfb':>7} {'errors':>6} {'rss MB':>8} {'llm/r':>5}")
+            for route in routes:
+                if route.needs_documents and not context.doc_ids:
+                    print(f"{route.name:<24} skipped: no document was ingested")
+                    continue
+                route_levels = []
+                for concurrency in levels:
+                    requests = max(args.requests, concurrency)
+                    level = await run_level(client, route, context, concurrency, requests, sampler, fake)
+                    route_levels.append(level)
+                    print_level(route.name, level)
+                results["routes"][route.name] = {"method": route.method, "path": route.path,
+                                                 "stream": route.stream, "levels": route_levels}
+            # Lazily built services (fetcher, scrape cache, ...) can fail during the run
+            for name, error in (await failed_services(client)).items():
+                problem = f"service {name} failed: {error}"
+                if problem not in results["degraded"]:
+                    results["degraded"].append(problem)
+                    print(f"Degraded: {problem}")
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        gemini.shutdown()
+        site.shutdown()
+        if not args.keep_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    results["fake_gemini"] = fake.stats()
+    output = Path(args.output) if args.output else (
+        BENCHMARKS / "results" / f"load_{results['meta']['commit'] or 'unknown'}_"
+                                 f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        regressions = compare(results, json.loads(Path(args.compare).read_text()), args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.threshold:.0f}%: {', '.join(regressions)}")
+            return 1 if args.fail_on_regression else 0
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--routes", help="comma-separated route names (default: all)")
+    parser.add_argument("--concurrency", default="1,4,16,64", help="comma-separated client counts")
+    parser.add_argument("--requests", type=int, default=64, help="requests per route and level")
+    parser.add_argument("--latency-ms", type=float, default=300, help="fake Gemini time to first token")
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--tokens-per-second", type=float, default=200)
+    parser.add_argument("--output-tokens", type=int, default=150)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of fake Gemini calls that 503")
+    parser.add_argument("--documents", type=int, default=16, help="synthetic documents to ingest")
+    parser.add_argument("--paragraphs", type=int, default=40, help="paragraphs per document")
+    parser.add_argument("--ingest-concurrency", type=int, default=4)
+    parser.add_argument("--reuse-inputs", action="store_true", help="repeat inputs so caches can hit")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=120, help="per-request timeout in seconds")
+    parser.add_argument("--startup-timeout", type=float, default=180)
+    parser.add_argument("--server-env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra environment for the server (repeatable)")
+    parser.add_argument("--output", help="JSON path (default: benchmarks/results/load_<commit>_<time>.json)")
+    parser.add_argument("--compare", help="earlier results JSON to diff against")
+    parser.add_argument("--threshold", type=float, default=10, help="regression threshold in percent")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--keep-workdir", action="store_true", help="keep the data directory and server.log")
+    parser.add_argument("--onnx-embeddings", action="store_true",
+                        help="use Chroma's ONNX MiniLM model (downloaded or cached) instead of the hashing embedder")
+    parser.add_argument("--allow-degraded", action="store_true",
+                        help="benchmark even if ingestion indexed nothing or a service failed")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,56 @@
+"""server.py with a deterministic hashing embedder in place of Chroma's ONNX MiniLM model.
+
+The default embedder downloads its model on first use, so without network
+access every upload indexes nothing. The load suite starts the server from
+this module (`uvicorn offline_server:app`) unless `--onnx-embeddings` is given.
+Words are feature-hashed into 384 dimensions, the size of MiniLM's vectors,
+so documents that share words still rank together. Embedding cost is far
+below the real model's, which makes ingestion throughput optimistic.
+"""
+import sys
+import zlib
+from pathlib import Path
+from typing import Any, Dict
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import server  # noqa: E402
+from database.bm25_index import tokenize  # noqa: E402
+
+
+class HashEmbeddingFunction(EmbeddingFunction[Documents]):
+    """Signed feature hashing of words and word pairs, L2-normalised; same text, same vector in every process"""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def __call__(self, input: Documents) -> Embeddings:
+        vectors = np.zeros((len(input), self.dim), dtype=np.float32)
+        for row, text in enumerate(input):
+            words = tokenize(text)
+            for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+                digest = zlib.crc32(feature.encode("utf-8"))
+                vectors[row, digest % self.dim] += 1.0 if digest & 0x80000000 else -1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        # Texts without words still need a valid unit vector
+        empty = norms[:, 0] == 0
+        vectors[empty, 0] = norms[empty] = 1.0
+        return list(vectors / norms)
+
+    @staticmethod
+    def name() -> str:
+        return "agentflow-benchmark-hash"
+
+    def get_config(self) -> Dict[str, Any]:
+        return {"dim": self.dim}
+
+    @staticmethod
+    def build_from_config(config: Dict[str, Any]) -> "HashEmbeddingFunction":
+        return HashEmbeddingFunction(config.get("dim", 384))
+
+
+server.services.register("embedding_function", HashEmbeddingFunction, required=False)
+app = server.app
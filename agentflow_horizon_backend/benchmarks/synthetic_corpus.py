@@ -0,0 +1,164 @@
+"""Deterministic synthetic corpora for load tests: text and PDF documents, HTML pages, queries.
+
+Documents are generated from a seed, so every run (and every commit) ingests
+and queries the same data. Each document belongs to a topic whose key terms
+and part codes recur in its text; queries are built from the same topics, so
+vector and BM25 retrieval both have real matches. PDFs are written by a tiny
+built-in writer (Helvetica text pages) that PyPDF2 can extract.
+
+    python benchmarks/synthetic_corpus.py --out /tmp/corpus --documents 20
+"""
+import argparse
+import random
+from pathlib import Path
+from typing import List, Tuple
+
+TOPICS = [
+    ("reactor cooling", ["molten salt", "heat exchanger", "coolant loop", "decay heat", "ZR-17"]),
+    ("battery chemistry", ["lithium iron phosphate", "cathode", "cycle life", "thermal runaway", "LFP-280"]),
+    ("supply chain", ["inventory", "lead time", "freight", "safety stock", "SKU-4410"]),
+    ("vector search", ["embedding", "nearest neighbour", "recall", "index build", "HNSW-32"]),
+    ("crop irrigation", ["soil moisture", "drip line", "evapotranspiration", "yield", "IRR-9"]),
+    ("payment fraud", ["chargeback", "risk score", "card testing", "velocity rule", "FR-220"]),
+    ("satellite imaging", ["orbit", "ground station", "cloud cover", "revisit time", "SAT-3B"]),
+    ("clinical trials", ["cohort", "endpoint", "adverse event", "placebo", "NCT-0042"]),
+]
+FILLER = ("the team measured results across several sites and compared them with the previous quarter "
+          "while operators noted that most of the variation came from scheduling and maintenance windows "
+          "and a review recommended further tests before any change is rolled out more widely").split()
+
+
+def make_paragraph(rng: random.Random, terms: List[str], sentences: int = 5) -> str:
+    parts = []
+    for _ in range(sentences):
+        words = rng.sample(FILLER, 12)
+        for term in rng.sample(terms, 2):
+            words.insert(rng.randrange(len(words)), term)
+        sentence = " ".join(words)
+        parts.append(sentence[0].upper() + sentence[1:] + ".")
+    return " ".join(parts)
+
+
+def make_corpus(seed: int = 0, documents: int = 20, paragraphs: int = 40) -> List[Tuple[str, str, str]]:
+    """[(name, text, topic)], topics assigned round-robin"""
+    rng = random.Random(seed)
+    corpus = []
+    for index in range(documents):
+        topic, terms = TOPICS[index % len(TOPICS)]
+        title = f"{topic.title()} report {index}"
+        body = "\n\n".join(make_paragraph(rng, terms) for _ in range(paragraphs))
+        corpus.append((f"doc_{index:03d}", f"{title}\n\n{body}\n", topic))
+    return corpus
+
+
+def make_queries(seed: int = 0, count: int = 50) -> List[str]:
+    rng = random.Random(seed + 1)
+    templates = [
+        "What does the report say about {a} and {b}?",
+        "How is {a} related to {topic}?",
+        "Summarize the findings on {a} for {code}.",
+        "Which recommendations mention {b}?",
+    ]
+    queries = []
+    for index in range(count):
+        topic, terms = TOPICS[index % len(TOPICS)]
+        a, b = rng.sample(terms[:4], 2)
+        queries.append(rng.choice(templates).format(a=a, b=b, topic=topic, code=terms[4]))
+    return queries
+
+
+def make_text(seed: int, index: int, sentences: int = 4) -> str:
+    """Short input for the NLP endpoints"""
+    rng = random.Random(seed * 100003 + index)
+    topic, terms = TOPICS[index % len(TOPICS)]
+    return f"Update {index} on {topic}. " + make_paragraph(rng, terms, sentences)
+
+
+def html_page(seed: int, index: int, paragraphs: int = 12) -> str:
+    """A page with navigation, scripts and a footer around the article, like a real site"""
+    rng = random.Random(seed * 7919 + index)
+    topic, terms = TOPICS[index % len(TOPICS)]
+    article = "\n".join(f"<p>{make_paragraph(rng, terms)}</p>" for _ in range(paragraphs))
+    links = "".join(f'<li><a href="/page/{index + step}">Related {index + step}</a></li>' for step in range(1, 20))
+    return f"""<!DOCTYPE html>
+<html><head><title>{topic.title()} news {index}</title>
+<script>window.analytics = {{"page": {index}, "items": [{", ".join(str(i) for i in range(200))}]}};</script>
+<style>body {{ font-family: sans-serif; }} .nav li {{ display: inline; }}</style></head>
+<body><nav class="nav"><ul>{links}</ul></nav>
+<div class="cookie-banner">We use cookies to improve your experience.</div>
+<article><h1>{topic.title()} news {index}</h1>
+{article}
+</article>
+<aside class="sidebar"><ul>{links}</ul></aside>
+<footer>Copyright synthetic site. <a href="/about">About</a></footer></body></html>"""
+
+
+def _pdf_escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: Path, text: str, lines_per_page: int = 55, width: int = 95):
+    """Write `text` as a plain multi-page PDF (ASCII text, Helvetica 10pt)"""
+    lines = []
+    for paragraph in text.split("\n"):
+        words, line = paragraph.split(), ""
+        for word in words:
+            if line and len(line) + 1 + len(word) > width:
+                lines.append(line)
+                line = word
+            else:
+                line = f"{line} {word}" if line else word
+        lines.append(line)
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[""]]
+
+    # Objects: 1 catalog, 2 page tree, 3 font, then a page and its content stream per page
+    objects = []
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(len(pages)))
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode("latin-1"))
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    for i, page in enumerate(pages):
+        content = "BT /F1 10 Tf 12 TL 50 760 Td " + " T* ".join(f"({_pdf_escape(line)}) Tj" for line in page) + " ET"
+        stream = content.encode("latin-1", errors="replace")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>".encode("latin-1"))
+        objects.append(b"<< /Length " + str(len(stream)).encode("ascii") + b" >>\nstream\n" + stream + b"\nendstream")
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n".encode("ascii") + body + b"\nendobj\n"
+    xref = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("ascii")
+    output += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("ascii")
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("ascii")
+    Path(path).write_bytes(bytes(output))
+
+
+def write_corpus(directory: Path, seed: int = 0, documents: int = 20, paragraphs: int = 40,
+                 pdf_every: int = 2) -> List[Path]:
+    """Write the corpus as .txt files, every `pdf_every`-th document as a PDF instead"""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for index, (name, text, _) in enumerate(make_corpus(seed, documents, paragraphs)):
+        if pdf_every and index % pdf_every == pdf_every - 1:
+            path = directory / f"{name}.pdf"
+            write_pdf(path, text)
+        else:
+            path = directory / f"{name}.txt"
+            path.write_text(text, encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--documents", type=int, default=20)
+    parser.add_argument("--paragraphs", type=int, default=40)
+    args = parser.parse_args()
+    written = write_corpus(Path(args.out), args.seed, args.documents, args.paragraphs)
+    print(f"Wrote {len(written)} files ({sum(p.stat().st_size for p in written) / 1024:.0f} KB) to {args.out}")
@@ -0,0 +1,272 @@
+"""In-process BM25 inverted index kept alongside the Chroma collection"""
+import heapq
+import logging
+import math
+import os
+import re
+import tempfile
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Words, numbers and codes such as "AX-4410", "v2.1" or "order_id"
+TOKEN = re.compile(r"[a-z0-9]+(?:[-_./][a-z0-9]+)*")
+PART_SPLIT = re.compile(r"[-_./]")
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have how i if in into is it its of on or that the "
+    "their there this to was what when where which who why will with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased terms; compound codes are indexed whole and by their parts"""
+    terms = []
+    for token in TOKEN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        terms.append(token)
+        if not token.isalnum():
+            terms.extend(part for part in PART_SPLIT.split(token) if part and part not in STOPWORDS)
+    return terms
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Fuse ranked id lists: score(id) = sum of 1 / (k + rank) over the lists it appears in"""
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] += 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda pair: pair[1], reverse=True)
+
+
+class BM25Index:
+    """Okapi BM25 over chunk ids, updated incrementally as chunks are indexed.
+
+    Postings live in memory as term -> {slot: term frequency}. Each chunk can
+    belong to a group (its document id); `search(..., groups=...)` scores only
+    the chunks of those groups, so a scoped query costs the same however large
+    the rest of the index is. Removed chunks leave an empty slot until the next
+    `save`, which compacts the index and writes it to `persist_path` as a
+    compressed .npz of flat arrays (vocabulary, CSR offsets, slots, frequencies,
+    ids, lengths, groups). Document text is not stored; callers look it up in
+    Chroma by id. `schedule_save` debounces snapshots, so a burst of uploads
+    costs one write.
+    """
+
+    def __init__(self, persist_path: Optional[str] = None, k1: float = 1.5, b: float = 0.75):
+        self.persist_path = persist_path
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._ids: List[Optional[str]] = []
+        self._lengths: List[int] = []
+        self._groups: List[str] = []
+        self._group_slots: Dict[str, Set[int]] = defaultdict(set)
+        self._slots: Dict[str, int] = {}
+        self._total_length = 0
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()  # one writer at a time, snapshots land in order
+        self._save_timer: Optional[threading.Timer] = None
+        self.dirty = False
+        self.searches = 0
+        self.saves = 0
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, chunk_id: str):
+        return chunk_id in self._slots
+
+    def add(self, ids: Sequence[str], texts: Sequence[str], groups: Optional[Sequence[str]] = None):
+        """Index chunks, optionally tagged with a group each; an id already present is re-indexed"""
+        groups = groups or [""] * len(ids)
+        with self._lock:
+            self.remove([chunk_id for chunk_id in ids if chunk_id in self._slots])
+            for chunk_id, text, group in zip(ids, texts, groups):
+                terms = Counter(tokenize(text or ""))
+                slot = len(self._ids)
+                self._ids.append(chunk_id)
+                length = sum(terms.values())
+                self._lengths.append(length)
+                self._groups.append(group or "")
+                self._group_slots[group or ""].add(slot)
+                self._slots[chunk_id] = slot
+                self._total_length += length
+                for term, frequency in terms.items():
+                    self._postings.setdefault(term, {})[slot] = frequency
+            self.dirty = True
+
+    def remove(self, ids: Iterable[str]):
+        with self._lock:
+            for chunk_id in ids:
+                slot = self._slots.pop(chunk_id, None)
+                if slot is None:
+                    continue
+                self._ids[slot] = None
+                self._group_slots[self._groups[slot]].discard(slot)
+                self._total_length -= self._lengths[slot]
+                self.dirty = True
+            # Postings of removed slots are skipped at query time and dropped by compact()
+
+    def search(self, query: str, n_results: int = 10, groups: Optional[Iterable[str]] = None) -> List[Tuple[str, float]]:
+        """Top (id, score) pairs for a query, best first, optionally only within `groups`"""
+        with self._lock:
+            self.searches += 1
+            if not self._slots:
+                return []
+            count = len(self._slots)
+            average_length = self._total_length / count or 1.0
+            allowed = None
+            if groups is not None:
+                allowed = set().union(*(self._group_slots.get(group, ()) for group in groups))
+                if not allowed:
+                    return []
+            scores: Dict[int, float] = defaultdict(float)
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                # IDF stays corpus-wide so scores are comparable across scopes
+                idf = math.log(1.0 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                if allowed is None:
+                    matches = ((slot, frequency) for slot, frequency in postings.items() if self._ids[slot] is not None)
+                elif len(allowed) < len(postings):
+                    matches = ((slot, postings[slot]) for slot in allowed if slot in postings)
+                else:
+                    matches = ((slot, frequency) for slot, frequency in postings.items() if slot in allowed)
+                for slot, frequency in matches:
+                    norm = self.k1 * (1.0 - self.b + self.b * self._lengths[slot] / average_length)
+                    scores[slot] += idf * frequency * (self.k1 + 1.0) / (frequency + norm)
+            best = heapq.nlargest(n_results, scores.items(), key=lambda pair: pair[1])
+            return [(self._ids[slot], round(score, 4)) for slot, score in best]
+
+    def compact(self):
+        """Renumber slots so removed chunks no longer take space"""
+        with self._lock:
+            live = [slot for slot, chunk_id in enumerate(self._ids) if chunk_id is not None]
+            if len(live) == len(self._ids):
+                return
+            remap = {old: new for new, old in enumerate(live)}
+            self._postings = {
+                term: {remap[slot]: frequency for slot, frequency in postings.items() if slot in remap}
+                for term, postings in self._postings.items()
+            }
+            self._postings = {term: postings for term, postings in self._postings.items() if postings}
+            self._ids = [self._ids[slot] for slot in live]
+            self._lengths = [self._lengths[slot] for slot in live]
+            self._groups = [self._groups[slot] for slot in live]
+            self._index_slots()
+
+    def _index_slots(self):
+        self._slots = {chunk_id: slot for slot, chunk_id in enumerate(self._ids)}
+        self._group_slots = defaultdict(set)
+        for slot, group in enumerate(self._groups):
+            self._group_slots[group].add(slot)
+
+    def schedule_save(self, delay: float = 5.0):
+        """Save `delay` seconds from now on a timer thread; calls until then share that save"""
+        if not self.persist_path:
+            return
+        with self._save_lock:
+            if self._save_timer is not None:
+                return
+            self._save_timer = threading.Timer(delay, self._timed_save)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def _timed_save(self):
+        with self._save_lock:
+            self._save_timer = None
+        try:
+            self.save()
+        except Exception as e:
+            logger.warning(f"Could not save BM25 index to {self.persist_path}: {e}")
+
+    def save(self):
+        """Compact and write the index to `persist_path` (atomically, only when changed)"""
+        if not self.persist_path or not self.dirty:
+            return
+        with self._save_lock:
+            if self.dirty:
+                self._write_snapshot()
+
+    def _write_snapshot(self):
+        with self._lock:
+            self.compact()
+            terms = sorted(self._postings)
+            offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+            slots, frequencies = [], []
+            for position, term in enumerate(terms):
+                postings = self._postings[term]
+                offsets[position + 1] = offsets[position] + len(postings)
+                slots.extend(postings.keys())
+                frequencies.extend(postings.values())
+            arrays = {
+                "terms": np.array(terms, dtype=str),
+                "offsets": offsets,
+                "slots": np.array(slots, dtype=np.int32),
+                "frequencies": np.array(frequencies, dtype=np.uint16 if max(frequencies, default=0) < 65536 else np.int32),
+                "ids": np.array(self._ids, dtype=str),
+                "lengths": np.array(self._lengths, dtype=np.int32),
+                "groups": np.array(self._groups, dtype=str),
+            }
+            self.dirty = False
+        directory = os.path.dirname(self.persist_path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, temporary = tempfile.mkstemp(prefix=".bm25-", suffix=".npz", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                np.savez_compressed(handle, **arrays)
+            os.replace(temporary, self.persist_path)
+        except BaseException:
+            self.dirty = True
+            try:
+                os.remove(temporary)
+            except OSError:
+                pass
+            raise
+        self.saves += 1
+        logger.info(f"Saved BM25 index ({len(self._ids)} chunks, {len(terms)} terms) to {self.persist_path}")
+
+    def load(self) -> bool:
+        """Read the index from `persist_path`; returns False if there is none"""
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return False
+        try:
+            with np.load(self.persist_path) as data:
+                terms, offsets = data["terms"].tolist(), data["offsets"]
+                slots, frequencies = data["slots"].tolist(), data["frequencies"].tolist()
+                ids, lengths = data["ids"].tolist(), data["lengths"].tolist()
+                if "groups" not in data.files:
+                    logger.info(f"BM25 snapshot {self.persist_path} has no document groups; rebuilding")
+                    return False
+                groups = data["groups"].tolist()
+        except Exception as e:
+            logger.warning(f"Could not load BM25 index from {self.persist_path}: {e}")
+            return False
+        with self._lock:
+            self._postings = {
+                term: dict(zip(slots[offsets[position]:offsets[position + 1]],
+                               frequencies[offsets[position]:offsets[position + 1]]))
+                for position, term in enumerate(terms)
+            }
+            self._ids, self._lengths, self._groups = ids, lengths, groups
+            self._index_slots()
+            self._total_length = sum(lengths)
+            self.dirty = False
+        logger.info(f"Loaded BM25 index with {len(ids)} chunks from {self.persist_path}")
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "chunks": len(self._slots),
+            "terms": len(self._postings),
+            "groups": sum(1 for slots in self._group_slots.values() if slots),
+            "searches": self.searches,
+            "saves": self.saves,
+            "persist_path": self.persist_path,
+        }
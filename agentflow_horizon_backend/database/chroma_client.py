@@ -1,7 +1,12 @@
 import chromadb
 from chromadb.config import Settings
-from sentence_transformers import SentenceTransformer
+from utils.embedding_engine import EmbeddingEngine, sentence_transformer_encoder
+from utils.embedding_cache import EmbeddingCache
+from utils.single_flight import SingleFlight, flight_key
+from utils.telemetry import span
+import asyncio
 import os
+import threading
 from dotenv import load_dotenv
 from pathlib import Path
 import logging
@@ -12,7 +17,7 @@ load_dotenv(ROOT_DIR / '.env')
 logger = logging.getLogger(__name__)
 
 class ChromaDBClient:
-    def __init__(self):
+    def __init__(self, embedding_cache: EmbeddingCache = None):
         self.persist_directory = os.environ.get('CHROMA_PERSIST_DIR', '/app/backend/data/memory')
         Path(self.persist_directory).mkdir(parents=True, exist_ok=True)
         
@@ -21,8 +26,23 @@ class ChromaDBClient:
             settings=Settings(anonymized_telemetry=False)
         )
         
-        # Initialize embedding model
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        # Embedding model is loaded on first use (or by warm_up) to keep startup fast
+        self.model_name = os.environ.get('EMBEDDING_MODEL', 'all-MiniLM-L6-v2')
+        self.batch_size = int(os.environ.get('EMBED_BATCH_SIZE', '64'))
+        self._embedding_model = None
+        self._model_lock = threading.Lock()
+        self.embedder = EmbeddingEngine(
+            self._encode,
+            model_name=self.model_name,
+            batch_size=self.batch_size,
+            max_wait_ms=float(os.environ.get('EMBED_MAX_WAIT_MS', '5')),
+            cache=embedding_cache or EmbeddingCache(
+                max_entries=int(os.environ.get('EMBEDDING_CACHE_SIZE', '10000'))
+            ),
+        )
+        
+        # Concurrent identical aquery calls share one embedding + collection query
+        self.flights = SingleFlight("chroma")
         
         # Get or create collection
         self.collection = self.client.get_or_create_collection(
@@ -32,44 +52,98 @@ class ChromaDBClient:
         
         logger.info(f"ChromaDB initialized with {self.collection.count()} documents")
     
+    @property
+    def embedding_model(self):
+        """The SentenceTransformer, loaded once on first access"""
+        if self._embedding_model is None:
+            with self._model_lock:
+                if self._embedding_model is None:
+                    from sentence_transformers import SentenceTransformer
+                    self._embedding_model = SentenceTransformer(self.model_name)
+                    logger.info(f"Loaded embedding model {self.model_name}")
+        return self._embedding_model
+    
+    def _encode(self, texts: list):
+        return sentence_transformer_encoder(self.embedding_model, self.batch_size)(texts)
+    
+    def warm_up(self):
+        """Load the embedding model ahead of the first query"""
+        self.embedder.encode(["warm up"])
+    
     def add_document(self, document_id: str, text: str, metadata: dict = None):
         """Add a document to the vector database"""
+        return self.add_documents([document_id], [text], [metadata or {}])
+    
+    def add_documents(self, document_ids: list, texts: list, metadatas: list = None):
+        """Add many documents, encoding and inserting them in batches"""
         try:
-            # Generate embedding
-            embedding = self.embedding_model.encode(text).tolist()
-            
-            # Add to collection
-            self.collection.add(
-                ids=[document_id],
-                embeddings=[embedding],
-                documents=[text],
-                metadatas=[metadata or {}]
-            )
-            logger.info(f"Added document {document_id} to ChromaDB")
+            metadatas = metadatas or [{} for _ in texts]
+            for start in range(0, len(texts), self.batch_size):
+                stop = start + self.batch_size
+                self.collection.add(
+                    ids=document_ids[start:stop],
+                    embeddings=self.embedder.encode(texts[start:stop]),
+                    documents=texts[start:stop],
+                    metadatas=metadatas[start:stop]
+                )
+            logger.info(f"Added {len(texts)} documents to ChromaDB")
             return True
         except Exception as e:
-            logger.error(f"Error adding document: {str(e)}")
+            logger.error(f"Error adding documents: {str(e)}")
             raise
     
-    def query(self, query_text: str, n_results: int = 5):
-        """Query the vector database"""
+    def query(self, query_text: str, n_results: int = 5, where: dict = None):
+        """Query the vector database; `where` filters on chunk metadata (e.g. {"doc_id": ...})"""
         try:
             # Generate query embedding
-            query_embedding = self.embedding_model.encode(query_text).tolist()
+            query_embedding = self.embedder.encode_queries([query_text])
             
             # Query collection
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=n_results
-            )
+            with span("chroma.query"):
+                results = self.collection.query(
+                    query_embeddings=query_embedding,
+                    n_results=n_results,
+                    where=where
+                )
             return results
         except Exception as e:
             logger.error(f"Error querying ChromaDB: {str(e)}")
             raise
     
+    def query_many(self, query_texts: list, n_results: int = 5, where: dict = None):
+        """Query with many texts at once; results are in input order"""
+        try:
+            return self.collection.query(
+                query_embeddings=self.embedder.encode_queries(query_texts),
+                n_results=n_results,
+                where=where
+            )
+        except Exception as e:
+            logger.error(f"Error querying ChromaDB: {str(e)}")
+            raise
+    
+    async def aquery(self, query_text: str, n_results: int = 5, where: dict = None):
+        """Async query; concurrent identical queries share one call (do not mutate the result)"""
+        async def run_query():
+            query_embedding = await self.embedder.embed_query(query_text)
+            with span("chroma.query"):
+                return await asyncio.to_thread(
+                    self.collection.query,
+                    query_embeddings=query_embedding.reshape(1, -1),
+                    n_results=n_results,
+                    where=where
+                )
+        try:
+            return await self.flights.run(flight_key(query_text, n_results, where), run_query)
+        except Exception as e:
+            logger.error(f"Error querying ChromaDB: {str(e)}")
+            raise
+    
     def get_stats(self):
         """Get database statistics"""
         return {
             "total_documents": self.collection.count(),
-            "persist_directory": self.persist_directory
+            "persist_directory": self.persist_directory,
+            "embeddings": self.embedder.stats(),
+            "single_flight": self.flights.stats()
         }
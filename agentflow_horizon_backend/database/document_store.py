@@ -0,0 +1,122 @@
+"""Per-document registry and statistics for uploaded documents"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import Column, DateTime, Float, Integer, String, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from database.result_store import Base
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentRecord(Base):
+    __tablename__ = "documents"
+    doc_id = Column(String, primary_key=True)
+    filename = Column(String)
+    status = Column(String)  # indexing | completed | failed
+    pages = Column(Integer, nullable=True)
+    chunks = Column(Integer, default=0)
+    chars = Column(Integer, default=0)
+    error = Column(String, nullable=True)
+    uploaded_at = Column(DateTime, default=datetime.utcnow)
+    indexed_at = Column(DateTime, nullable=True)
+    queries = Column(Integer, default=0)
+    total_retrieval_ms = Column(Float, default=0.0)
+    last_queried_at = Column(DateTime, nullable=True)
+
+
+class DocumentStore:
+    """One row per uploaded document: ingestion outcome plus query counters.
+
+    Scoped queries use it to reject unknown document ids before touching the
+    vector store.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def register(self, doc_id: str, filename: str):
+        with self.engine.begin() as conn:
+            conn.execute(insert(DocumentRecord).values(doc_id=doc_id, filename=filename, status="indexing"))
+
+    def backfill(self, doc_id: str, filename: str, chunks: int):
+        """Row for a document indexed before the registry existed (found in Chroma)"""
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(insert(DocumentRecord).values(
+                    doc_id=doc_id, filename=filename, status="completed", chunks=chunks, uploaded_at=None,
+                ))
+        except IntegrityError:
+            pass  # backfilled concurrently
+
+    def finish(self, job):
+        """Record the outcome of an IngestionJob"""
+        with self.engine.begin() as conn:
+            conn.execute(
+                update(DocumentRecord).where(DocumentRecord.doc_id == job.document_id).values(
+                    status=job.status,
+                    pages=job.total_pages,
+                    chunks=job.chunks_indexed,
+                    chars=job.char_count,
+                    error=job.error,
+                    indexed_at=datetime.utcnow(),
+                )
+            )
+
+    def get_many(self, doc_ids: Sequence[str]) -> Dict[str, dict]:
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                select(DocumentRecord.__table__).where(DocumentRecord.doc_id.in_(list(doc_ids)))
+            ).mappings().all()
+        return {row["doc_id"]: self._row(row) for row in rows}
+
+    def get(self, doc_id: str) -> Optional[dict]:
+        return self.get_many([doc_id]).get(doc_id)
+
+    def list(self, limit: int = 100) -> List[dict]:
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                select(DocumentRecord.__table__).order_by(DocumentRecord.uploaded_at.desc()).limit(limit)
+            ).mappings().all()
+        return [self._row(row) for row in rows]
+
+    def record_query(self, doc_ids: Sequence[str], elapsed_ms: float):
+        with self.engine.begin() as conn:
+            conn.execute(
+                update(DocumentRecord).where(DocumentRecord.doc_id.in_(list(doc_ids))).values(
+                    queries=DocumentRecord.queries + 1,
+                    total_retrieval_ms=DocumentRecord.total_retrieval_ms + elapsed_ms,
+                    last_queried_at=datetime.utcnow(),
+                )
+            )
+
+    @staticmethod
+    def _row(row) -> dict:
+        data = dict(row)
+        total_retrieval_ms = data.pop("total_retrieval_ms") or 0.0
+        data["avg_retrieval_ms"] = round(total_retrieval_ms / data["queries"], 1) if data["queries"] else None
+        for key in ("uploaded_at", "indexed_at", "last_queried_at"):
+            data[key] = data[key].isoformat() if data[key] else None
+        return data
+
+    # Async wrappers: SQLite calls run on a worker thread
+    async def aregister(self, doc_id: str, filename: str):
+        await asyncio.to_thread(self.register, doc_id, filename)
+
+    async def abackfill(self, doc_id: str, filename: str, chunks: int):
+        await asyncio.to_thread(self.backfill, doc_id, filename, chunks)
+
+    async def afinish(self, job):
+        await asyncio.to_thread(self.finish, job)
+
+    async def aget_many(self, doc_ids: Sequence[str]) -> Dict[str, dict]:
+        return await asyncio.to_thread(self.get_many, doc_ids)
+
+    async def alist(self, limit: int = 100) -> List[dict]:
+        return await asyncio.to_thread(self.list, limit)
+
+    async def arecord_query(self, doc_ids: Sequence[str], elapsed_ms: float):
+        await asyncio.to_thread(self.record_query, doc_ids, elapsed_ms)
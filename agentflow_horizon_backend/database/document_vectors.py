@@ -0,0 +1,95 @@
+"""In-memory per-document embedding matrices for document-scoped vector search"""
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentVectors:
+    """LRU of doc_id -> (chunk ids, float32 embedding matrix), loaded from Chroma.
+
+    A Chroma query with a `where` filter still walks metadata for the whole
+    collection, so its latency grows with the corpus. Scoped queries instead
+    score the few hundred chunk embeddings of the requested documents with one
+    matrix product, which costs the same however many other documents exist.
+    Distances use the collection's space ("l2", "cosine" or "ip") so they are
+    comparable with Chroma's. Call `invalidate` when a document's chunks change.
+    """
+
+    def __init__(self, collection, max_bytes: int = 64 * 1024 * 1024):
+        self.collection = collection
+        self.max_bytes = max_bytes
+        self.space = (collection.metadata or {}).get("hnsw:space", "l2")
+        self._entries: "OrderedDict[str, Tuple[List[str], np.ndarray]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+
+    def invalidate(self, doc_id: str):
+        with self._lock:
+            self._generations[doc_id] = self._generations.get(doc_id, 0) + 1
+            entry = self._entries.pop(doc_id, None)
+            if entry is not None:
+                self._bytes -= entry[1].nbytes
+
+    def _get(self, doc_id: str) -> Tuple[List[str], np.ndarray]:
+        with self._lock:
+            entry = self._entries.get(doc_id)
+            if entry is not None:
+                self._entries.move_to_end(doc_id)
+                self.hits += 1
+                return entry
+            generation = self._generations.get(doc_id, 0)
+        found = self.collection.get(where={"doc_id": doc_id}, include=["embeddings"])
+        ids = list(found["ids"])
+        matrix = np.asarray(found["embeddings"], dtype=np.float32).reshape(len(ids), -1)
+        matrix.setflags(write=False)
+        with self._lock:
+            self.loads += 1
+            # Skip caching if the document changed while it was being loaded
+            if self._generations.get(doc_id, 0) == generation and doc_id not in self._entries:
+                self._entries[doc_id] = (ids, matrix)
+                self._bytes += matrix.nbytes
+                while self._bytes > self.max_bytes and len(self._entries) > 1:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self._bytes -= evicted.nbytes
+        return ids, matrix
+
+    def search(self, query_embedding: np.ndarray, doc_ids: Sequence[str], n_results: int) -> List[Tuple[str, float]]:
+        """Nearest chunks of `doc_ids` as (chunk id, distance), closest first"""
+        ids, matrices = [], []
+        for doc_id in doc_ids:
+            doc_chunk_ids, matrix = self._get(doc_id)
+            if doc_chunk_ids:
+                ids.extend(doc_chunk_ids)
+                matrices.append(matrix)
+        if not ids:
+            return []
+        matrix = matrices[0] if len(matrices) == 1 else np.vstack(matrices)
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        if self.space == "cosine":
+            norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(query) or 1.0)
+            distances = 1.0 - (matrix @ query) / np.maximum(norms, 1e-12)
+        elif self.space == "ip":
+            distances = 1.0 - matrix @ query
+        else:
+            distances = np.sum((matrix - query) ** 2, axis=1)
+        count = min(n_results, len(ids))
+        top = np.argpartition(distances, count - 1)[:count]
+        top = top[np.argsort(distances[top])]
+        return [(ids[i], float(distances[i])) for i in top]
+
+    def stats(self) -> dict:
+        return {
+            "documents": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "loads": self.loads,
+            "space": self.space,
+        }
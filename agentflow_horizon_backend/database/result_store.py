@@ -0,0 +1,141 @@
+"""Result persistence with a write-behind batching queue"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import create_engine, event, insert, Column, String, Text, DateTime
+from sqlalchemy.orm import declarative_base
+
+logger = logging.getLogger(__name__)
+
+Base = declarative_base()
+
+
+class ResultRecord(Base):
+    __tablename__ = "results"
+    id = Column(String, primary_key=True)
+    tool_name = Column(String)
+    input_data = Column(Text)
+    output_data = Column(Text)
+    timestamp = Column(DateTime, default=datetime.utcnow)
+
+
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA busy_timeout=5000",
+)
+
+
+def create_db_engine(url: str):
+    """Create an engine; SQLite connections get WAL mode and tuned pragmas"""
+    engine = create_engine(url, echo=False)
+    if engine.dialect.name == "sqlite":
+        @event.listens_for(engine, "connect")
+        def _set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for pragma in SQLITE_PRAGMAS:
+                cursor.execute(pragma)
+            cursor.close()
+    return engine
+
+
+class ResultWriter:
+    """Buffers result rows and writes them as multi-row inserts off the event loop.
+
+    `submit` waits when the queue is full, which pushes back on request
+    handlers instead of growing memory without bound.
+    """
+
+    def __init__(self, engine, flush_size: int = 200, flush_interval: float = 0.5, max_queue: int = 10000):
+        self.engine = engine
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.written = 0
+        self.batches = 0
+        self.failed = 0
+        self.last_flush_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._closing = False
+        self._task = asyncio.create_task(self._run(), name="result-writer")
+
+    async def submit(self, row: dict):
+        """Queue one row; falls back to a direct threaded write if the writer is not running"""
+        if not self.running or self._closing:
+            await asyncio.to_thread(self._write_batch, [row])
+            return
+        await self._queue.put(row)
+
+    async def submit_many(self, rows: List[dict]):
+        for row in rows:
+            await self.submit(row)
+
+    async def stop(self):
+        """Flush everything still queued, then stop the background task"""
+        if not self.running:
+            return
+        self._closing = True
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.flush_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._closing:
+                    break
+                await asyncio.sleep(min(remaining, 0.01))
+            try:
+                await asyncio.to_thread(self._write_batch, batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write_batch(self, rows: List[dict]):
+        started = time.perf_counter()
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(insert(ResultRecord), rows)
+            self.written += len(rows)
+            self.batches += 1
+        except Exception as e:
+            self.failed += len(rows)
+            logger.error(f"Error saving {len(rows)} results: {e}")
+        self.last_flush_ms = round((time.perf_counter() - started) * 1000, 2)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "written": self.written,
+            "batches": self.batches,
+            "failed": self.failed,
+            "last_flush_ms": self.last_flush_ms,
+        }
@@ -0,0 +1,111 @@
+"""Persistent cache of scraped pages with HTTP validators for conditional revalidation"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import Column, DateTime, Integer, String, Text, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from database.result_store import Base
+
+logger = logging.getLogger(__name__)
+
+
+class ScrapeCacheRecord(Base):
+    __tablename__ = "scrape_cache"
+    url = Column(String, primary_key=True)  # canonical URL
+    final_url = Column(String)
+    title = Column(Text)
+    content = Column(Text)
+    summary = Column(Text, nullable=True)
+    content_hash = Column(String)
+    etag = Column(String, nullable=True)
+    last_modified = Column(String, nullable=True)
+    fetched_at = Column(DateTime, default=datetime.utcnow)
+    validated_at = Column(DateTime, default=datetime.utcnow)
+    hits = Column(Integer, default=0)
+
+
+class ScrapeCache:
+    """Scraped page text, title and summary keyed by canonical URL.
+
+    An entry validated less than `fresh_seconds` ago is served without any
+    network request. Older entries carry the page's ETag / Last-Modified so the
+    caller can revalidate with a conditional GET and keep the entry on a 304.
+    """
+
+    def __init__(self, engine, fresh_seconds: float = 3600):
+        self.engine = engine
+        self.fresh_seconds = fresh_seconds
+        self.fresh_hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    def is_fresh(self, entry: dict) -> bool:
+        return datetime.utcnow() - entry["validated_at"] < timedelta(seconds=self.fresh_seconds)
+
+    @staticmethod
+    def conditional_headers(entry: Optional[dict]) -> dict:
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def get(self, url: str) -> Optional[dict]:
+        with self.engine.connect() as conn:
+            row = conn.execute(select(ScrapeCacheRecord.__table__).where(ScrapeCacheRecord.url == url)).mappings().first()
+        return dict(row) if row else None
+
+    def put(self, entry: dict):
+        """Insert or replace an entry; `entry` holds ScrapeCacheRecord columns.
+
+        A single upsert statement, so concurrent first scrapes of one URL
+        cannot both try to insert it.
+        """
+        now = datetime.utcnow()
+        values = {"fetched_at": now, "validated_at": now, **entry}
+        dialect = {"sqlite": sqlite, "postgresql": postgresql}.get(self.engine.dialect.name)
+        with self.engine.begin() as conn:
+            if dialect is not None:
+                statement = dialect.insert(ScrapeCacheRecord).values(**values)
+                conn.execute(statement.on_conflict_do_update(
+                    index_elements=[ScrapeCacheRecord.url],
+                    set_={name: statement.excluded[name] for name in values if name != "url"},
+                ))
+                return
+            updated = conn.execute(
+                update(ScrapeCacheRecord).where(ScrapeCacheRecord.url == values["url"]).values(**values)
+            ).rowcount
+            if not updated:
+                conn.execute(insert(ScrapeCacheRecord).values(**values))
+
+    def touch(self, url: str, **changes):
+        """Mark an entry as just validated (a 304), optionally updating columns"""
+        with self.engine.begin() as conn:
+            conn.execute(
+                update(ScrapeCacheRecord).where(ScrapeCacheRecord.url == url)
+                .values(validated_at=datetime.utcnow(), hits=ScrapeCacheRecord.hits + 1, **changes)
+            )
+
+    def set_summary(self, url: str, summary: str):
+        with self.engine.begin() as conn:
+            conn.execute(update(ScrapeCacheRecord).where(ScrapeCacheRecord.url == url).values(summary=summary))
+
+    # Async wrappers: SQLite calls run on a worker thread
+    async def aget(self, url: str) -> Optional[dict]:
+        return await asyncio.to_thread(self.get, url)
+
+    async def aput(self, entry: dict):
+        await asyncio.to_thread(self.put, entry)
+
+    async def atouch(self, url: str, **changes):
+        await asyncio.to_thread(self.touch, url, **changes)
+
+    async def aset_summary(self, url: str, summary: str):
+        await asyncio.to_thread(self.set_summary, url, summary)
+
+    def stats(self) -> dict:
+        return {"fresh_hits": self.fresh_hits, "revalidated": self.revalidated, "misses": self.misses}
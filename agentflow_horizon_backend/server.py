@@ -1,47 +1,237 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
+import time
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, UploadFile, File, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from contextlib import asynccontextmanager
 from pydantic import BaseModel
 import uvicorn
 from datetime import datetime
-from typing import Optional, List, Dict
-import chromadb
+from typing import AsyncIterator, Callable, Optional, List, Dict
+import numpy as np
+import asyncio
+import math
 import os
 from dotenv import load_dotenv
-import google.generativeai as genai
-import requests
-from bs4 import BeautifulSoup
-import PyPDF2
-import io
 import json
 import uuid
-from sqlalchemy import create_engine, Column, String, Text, DateTime, Integer
-from sqlalchemy.orm import declarative_base, sessionmaker
+from utils.service_registry import ServiceRegistry
+from utils.llm_gateway import LLMGateway
+from utils.response_cache import ResponseCache, MemoryTier, SQLiteTier, make_cache_key
+from database.result_store import Base, ResultWriter, create_db_engine
+from database.scrape_cache import ScrapeCache
+from database.document_store import DocumentStore
+from database.document_vectors import DocumentVectors
+from database.bm25_index import BM25Index, reciprocal_rank_fusion
+from utils.document_ingestion import IngestionPipeline
+from utils.text_chunker import TextChunker
+from utils.embedding_cache import EmbeddingCache
+from utils.embedding_engine import EmbeddingEngine
+from utils.http_fetcher import HttpFetcher
+from utils.html_extract import extract_text
+from utils.crawler import Crawler, CrawlPage, canonicalize_url, content_fingerprint
+from utils.context_packer import ContextPacker, PackedContext
+from utils.token_counter import token_counter_for
+from utils.reranker import confidence_from, default_reranker
+from utils.semantic_cache import SemanticCache
+from utils.single_flight import SingleFlight, flight_key
+from utils.resilience import FATAL, classify_error, default_guard, retry_after_of
+from utils.batch_prompting import pack_inputs, build_packed_prompt, parse_packed_response
+from utils.telemetry import REGISTRY, TRACES, TelemetryMiddleware, observe_llm_sizes, record_stage, span
 
 # Load environment variables
 load_dotenv()
 
-# Configure Gemini API
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-    print("✅ Gemini API configured successfully")
-else:
+GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'gemini-2.5-flash-lite')
+# Alternative Gemini REST endpoint, e.g. the local fake used by benchmarks/load_suite.py
+GEMINI_API_ENDPOINT = os.getenv('GEMINI_API_ENDPOINT')
+if not GEMINI_API_KEY:
     print("⚠️  Warning: GEMINI_API_KEY not found in environment")
 
-# Database setup for persistence
-Base = declarative_base()
-engine = create_engine('sqlite:///./data/agentflow.db', echo=False)
-SessionLocal = sessionmaker(bind=engine)
+# Heavy objects are created once per process: lazily on first use, or by the
+# background warm-up started in the lifespan handler
+services = ServiceRegistry(started_at=_import_started)
+services.record("imports", time.perf_counter() - _import_started)
+
+# Identical Gemini calls and vector queries that overlap in time share one upstream call
+llm_flights = SingleFlight("llm")
+retrieval_flights = SingleFlight("retrieval")
+
+def create_llm_gateway():
+    """Configure Gemini and build the shared LLM gateway (bounded concurrency, reused model objects)"""
+    import google.generativeai as genai
+    if GEMINI_API_KEY and GEMINI_API_ENDPOINT:
+        genai.configure(api_key=GEMINI_API_KEY, transport="rest", client_options={"api_endpoint": GEMINI_API_ENDPOINT})
+        print(f"✅ Gemini API configured for {GEMINI_API_ENDPOINT}")
+    elif GEMINI_API_KEY:
+        genai.configure(api_key=GEMINI_API_KEY)
+        print("✅ Gemini API configured successfully")
+    return LLMGateway(
+        model_name=GEMINI_MODEL,
+        max_concurrency=int(os.getenv('LLM_MAX_CONCURRENCY', '16')),
+        max_workers=int(os.getenv('LLM_EXECUTOR_WORKERS', '0')) or None,
+        # The SDK's async client only speaks gRPC; REST calls go through the worker threads
+        prefer_native_async=not GEMINI_API_ENDPOINT,
+        guard=default_guard(),
+    )
+
+def create_response_cache():
+    """Response cache for repeated NLP prompts (memory LRU + optional SQLite tier)"""
+    cache_tiers = [MemoryTier(
+        max_entries=int(os.getenv('RESPONSE_CACHE_SIZE', '1024')),
+        ttl_seconds=float(os.getenv('RESPONSE_CACHE_TTL', '3600')),
+    )]
+    if os.getenv('RESPONSE_CACHE_DB'):
+        cache_tiers.append(SQLiteTier(
+            os.getenv('RESPONSE_CACHE_DB'),
+            ttl_seconds=float(os.getenv('RESPONSE_CACHE_DISK_TTL', '86400')),
+        ))
+    return ResponseCache(cache_tiers)
+
+def create_database():
+    """Create tables and tune SQLite for the batched result writer"""
+    os.makedirs("./data", exist_ok=True)
+    Base.metadata.create_all(bind=engine)
+    print("✅ Database initialized successfully")
+    return engine
+
+def create_chroma_client():
+    import chromadb
+    os.makedirs("./data/memory", exist_ok=True)
+    return chromadb.PersistentClient(path="./data/memory")
+
+def create_chroma_collection():
+    client = services.get("chroma_client")
+    if client is None:
+        raise RuntimeError("ChromaDB client unavailable; RAG features will use demo mode")
+    collection = client.get_or_create_collection(
+        name="documents",
+        embedding_function=services.get("embedding_function")
+    )
+    print("✅ ChromaDB initialized successfully")
+    return collection
+
+def create_embedding_function():
+    """Chroma's default ONNX MiniLM embedder; the model itself loads on first call"""
+    from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+    return DefaultEmbeddingFunction()
 
-class ResultRecord(Base):
-    __tablename__ = "results"
-    id = Column(String, primary_key=True)
-    tool_name = Column(String)
-    input_data = Column(Text)
-    output_data = Column(Text)
-    timestamp = Column(DateTime, default=datetime.utcnow)
+def create_query_embedder():
+    """Query embeddings are computed here (cached, micro-batched) instead of inside collection.query"""
+    embedding_function = services.get("embedding_function")
+    embedding_cache = EmbeddingCache(
+        max_entries=int(os.getenv('EMBEDDING_CACHE_SIZE', '10000')),
+        persist_path=os.getenv('EMBEDDING_CACHE_PATH') or None,
+    )
+    embedding_cache.load()
+    embedder = EmbeddingEngine(
+        lambda texts: np.asarray(embedding_function(texts)),
+        model_name="chroma-default/all-MiniLM-L6-v2",
+        batch_size=int(os.getenv('EMBED_BATCH_SIZE', '64')),
+        max_wait_ms=float(os.getenv('EMBED_MAX_WAIT_MS', '5')),
+        cache=embedding_cache,
+    )
+    if os.getenv('WARM_EMBEDDING_MODEL', 'true').lower() == 'true':
+        try:
+            embedder.encode(["warm up"])
+        except Exception as e:
+            # Not fatal: the model is loaded again on the first real query
+            print(f"⚠️  Embedding model warm-up failed: {e}")
+    return embedder
+
+def create_http_fetcher():
+    """Pooled keep-alive HTTP client shared by all scraping"""
+    return HttpFetcher(
+        max_connections=int(os.getenv('FETCH_MAX_CONNECTIONS', '100')),
+        max_per_host=int(os.getenv('FETCH_MAX_PER_HOST', '8')),
+        max_bytes=int(os.getenv('FETCH_MAX_BYTES', str(2 * 1024 * 1024))),
+        timeout=float(os.getenv('FETCH_TIMEOUT', '10')),
+    )
+
+def create_bm25_index():
+    """Lexical index over the documents collection, rebuilt from Chroma unless a snapshot matches it"""
+    path = os.getenv('BM25_INDEX_PATH', './data/bm25_index.npz')
+    index = BM25Index(persist_path=path)
+    collection = services.get("chroma_collection")
+    total = collection.count() if collection is not None else 0
+    stale = False
+    if index.load():
+        # Snapshots are debounced, so chunks indexed just before a crash may be missing
+        if collection is None or len(index) == total:
+            return index
+        print(f"⚠️ BM25 snapshot has {len(index)} chunks but ChromaDB has {total}; rebuilding")
+        index, stale = BM25Index(persist_path=path), True
+    for offset in range(0, total, 1000):
+        page = collection.get(include=["documents", "metadatas"], limit=1000, offset=offset)
+        index.add(page["ids"], page["documents"], [(meta or {}).get("doc_id", "") for meta in page["metadatas"]])
+    if total or stale:
+        print(f"✅ BM25 index rebuilt from {total} ChromaDB chunks")
+        index.dirty = True
+        index.save()
+    return index
+
+def create_scrape_cache():
+    """Scraped pages and summaries, stored in the results database"""
+    return ScrapeCache(services.get("database"), fresh_seconds=float(os.getenv('SCRAPE_FRESH_SECONDS', '3600')))
+
+async def close_query_embedder(embedder: EmbeddingEngine):
+    await asyncio.to_thread(embedder.cache.save)
+    embedder.shutdown()
 
-app = FastAPI(title="AgentFlow Horizon Backend")
+# Database setup for persistence (WAL mode, batched write-behind inserts)
+engine = create_db_engine(os.getenv('DATABASE_URL', 'sqlite:///./data/agentflow.db'))
+result_writer = ResultWriter(
+    engine,
+    flush_size=int(os.getenv('RESULT_FLUSH_SIZE', '200')),
+    flush_interval=float(os.getenv('RESULT_FLUSH_INTERVAL', '0.5')),
+    max_queue=int(os.getenv('RESULT_QUEUE_SIZE', '10000')),
+)
+
+services.register("database", create_database, warm=True)
+services.register("llm_gateway", create_llm_gateway, imports=["google.generativeai"], warm=True,
+                  close=lambda gateway: gateway.shutdown())
+services.register("response_cache", create_response_cache, warm=True)
+services.register("chroma_client", create_chroma_client, imports=["chromadb"], warm=True, required=False)
+services.register("embedding_function", create_embedding_function,
+                  imports=["chromadb.utils.embedding_functions"], required=False)
+services.register("chroma_collection", create_chroma_collection, warm=True, required=False)
+services.register("query_embedder", create_query_embedder, warm=True, required=False, close=close_query_embedder)
+services.register("http_fetcher", create_http_fetcher, imports=["httpx"], close=lambda fetcher: fetcher.aclose())
+services.register("bm25_index", create_bm25_index, warm=True, required=False,
+                  close=lambda index: asyncio.to_thread(index.save))
+services.register("scrape_cache", create_scrape_cache, required=False)
+services.register("token_counter", lambda: token_counter_for(GEMINI_MODEL), warm=True)
+services.register("semantic_cache", lambda: SemanticCache(
+    threshold=float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.9')),
+    max_entries=int(os.getenv('SEMANTIC_CACHE_SIZE', '2000')),
+    ttl_seconds=float(os.getenv('SEMANTIC_CACHE_TTL', '3600')),
+) if os.getenv('SEMANTIC_CACHE', 'true').lower() == 'true' else None, required=False)
+services.register("reranker", default_reranker, warm=True, required=False,
+                  close=lambda reranker: reranker and reranker.shutdown())
+services.register("document_store", lambda: DocumentStore(services.get("database")))
+services.register("document_vectors", lambda: DocumentVectors(
+    services.get("chroma_collection"),
+    max_bytes=int(float(os.getenv('SCOPED_VECTOR_CACHE_MB', '64')) * 1024 * 1024),
+), required=False)
+services.register("crawler", lambda: Crawler(
+    services.get("http_fetcher"),
+    max_concurrency=int(os.getenv('CRAWL_CONCURRENCY', '16')),
+    per_domain=int(os.getenv('CRAWL_PER_DOMAIN', '4')),
+))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await services.aget("database")
+    await result_writer.start()
+    services.start_warm_up()
+    yield
+    await ingestion_pipeline.shutdown()
+    await result_writer.stop()
+    await services.close_all()
+
+app = FastAPI(title="AgentFlow Horizon Backend", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -56,93 +246,397 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Outermost, so route latency includes every other middleware
+app.add_middleware(TelemetryMiddleware)
+
+async def query_chroma(query_text: str, n_results: int = 3):
+    """Query the documents collection with a cached query embedding, off the event loop.
+    Concurrent identical queries share one call; the result must not be mutated."""
+    async def run_query():
+        collection = await services.aget("chroma_collection")
+        query_embedder = await services.aget("query_embedder")
+        query_embedding = await query_embedder.embed_query(query_text)
+        with span("chroma.query"):
+            return await asyncio.to_thread(
+                collection.query,
+                query_embeddings=query_embedding.reshape(1, -1),
+                n_results=n_results
+            )
+    with span("vector_search"):
+        return await retrieval_flights.run(flight_key("chroma", query_text, n_results), run_query)
 
-# Initialize database
-os.makedirs("./data", exist_ok=True)
-Base.metadata.create_all(bind=engine)
-print("✅ Database initialized successfully")
+async def query_documents_vectors(query_text: str, n_results: int, doc_ids: List[str]) -> List[tuple]:
+    """Nearest chunks within `doc_ids` as (chunk id, distance), from cached per-document embeddings"""
+    async def run_query():
+        document_vectors = await services.aget("document_vectors")
+        query_embedder = await services.aget("query_embedder")
+        query_embedding = await query_embedder.embed_query(query_text)
+        with span("document_vectors.search"):
+            return await asyncio.to_thread(document_vectors.search, query_embedding, doc_ids, n_results)
+    with span("vector_search"):
+        return await retrieval_flights.run(flight_key("documents", query_text, n_results, sorted(doc_ids)), run_query)
 
-# Initialize ChromaDB client
-chroma_client = None
-chroma_collection = None
-try:
-    os.makedirs("./data/memory", exist_ok=True)
-    chroma_client = chromadb.PersistentClient(path="./data/memory")
-    chroma_collection = chroma_client.get_or_create_collection(name="documents")
-    print("✅ ChromaDB initialized successfully")
-except Exception as e:
-    print(f"⚠️  ChromaDB initialization skipped: {e}")
-    print("   RAG features will use demo mode")
+HYBRID_SEARCH = os.getenv('HYBRID_SEARCH', 'true').lower() == 'true'
+HYBRID_CANDIDATES = int(os.getenv('HYBRID_CANDIDATES', '20'))
+RRF_K = int(os.getenv('RRF_K', '60'))
+
+async def hybrid_search(query_text: str, n_results: int = 3, doc_ids: Optional[List[str]] = None) -> List[dict]:
+    """Vector and BM25 candidates fused by reciprocal rank.
+
+    Each hit is {"id", "text", "metadata", "distance", "match", "score"};
+    `distance` is None for chunks only the lexical index found, `match` is
+    "vector", "lexical" or "both", and `score` is the fusion score. Falls back to vector-only results when the BM25
+    index is unavailable or HYBRID_SEARCH=false. `doc_ids` scopes both
+    retrievers to those documents; the cost of a scoped query depends on the
+    size of those documents, not of the whole collection.
+    """
+    bm25_index = await services.aget("bm25_index") if HYBRID_SEARCH else None
+    depth = max(n_results, HYBRID_CANDIDATES) if bm25_index is not None else n_results
+    hits = {}
+    if doc_ids:
+        for chunk_id, distance in await query_documents_vectors(query_text, depth, doc_ids):
+            hits[chunk_id] = {"id": chunk_id, "text": None, "metadata": {}, "distance": distance, "match": "vector"}
+    else:
+        results = await query_chroma(query_text, n_results=depth)
+        for i, chunk_id in enumerate(results['ids'][0] if results['ids'] else []):
+            hits[chunk_id] = {
+                "id": chunk_id,
+                "text": results['documents'][0][i],
+                "metadata": results['metadatas'][0][i] if results.get('metadatas') else {},
+                "distance": results['distances'][0][i] if results.get('distances') else None,
+                "match": "vector",
+            }
+    
+    fused = list(hits)[:n_results]
+    if bm25_index is not None:
+        with span("bm25.search"):
+            lexical = [chunk_id for chunk_id, _ in await asyncio.to_thread(bm25_index.search, query_text, depth, doc_ids)]
+        fused_scores = reciprocal_rank_fusion([list(hits), lexical], k=RRF_K)[:n_results]
+        fused = [chunk_id for chunk_id, _ in fused_scores]
+        for chunk_id in set(fused) & set(lexical):
+            if chunk_id in hits:
+                hits[chunk_id]["match"] = "both"
+            else:
+                hits[chunk_id] = {"id": chunk_id, "text": None, "metadata": {}, "distance": None, "match": "lexical"}
+        for chunk_id, score in fused_scores:
+            hits[chunk_id]["score"] = round(score, 5)
+    
+    # Text for chunks that came from the BM25 index or the scoped vector cache
+    missing = [chunk_id for chunk_id in fused if hits[chunk_id]["text"] is None]
+    if missing:
+        collection = await services.aget("chroma_collection")
+        with span("chroma.get"):
+            found = await asyncio.to_thread(collection.get, ids=missing, include=["documents", "metadatas"])
+        for i, chunk_id in enumerate(found['ids']):
+            hits[chunk_id]["text"] = found['documents'][i]
+            hits[chunk_id]["metadata"] = found['metadatas'][i] if found.get('metadatas') else {}
+    # Chunks deleted from Chroma but still in the BM25 index are skipped
+    return [hits[chunk_id] for chunk_id in fused if hits[chunk_id]["text"] is not None]
 
 # Helper functions
-def save_result(tool_name: str, input_data: dict, output_data: dict):
-    """Save results to database for persistence"""
+async def save_result(tool_name: str, input_data: dict, output_data: dict):
+    """Queue results for batched persistence; waits only when the write queue is full"""
     try:
-        db = SessionLocal()
-        record = ResultRecord(
-            id=str(uuid.uuid4()),
-            tool_name=tool_name,
-            input_data=json.dumps(input_data),
-            output_data=json.dumps(output_data),
-            timestamp=datetime.utcnow()
-        )
-        db.add(record)
-        db.commit()
-        db.close()
+        with span("save_result"):
+            await result_writer.submit({
+                "id": str(uuid.uuid4()),
+                "tool_name": tool_name,
+                "input_data": json.dumps(input_data),
+                "output_data": json.dumps(output_data),
+                "timestamp": datetime.utcnow()
+            })
     except Exception as e:
         print(f"Error saving result: {e}")
 
-def call_gemini(prompt: str, temperature: float = 0.7, max_tokens: int = 1024) -> str:
-    """Call Gemini API with enhanced error handling and optimized settings"""
+async def save_results(tool_name: str, records: List[tuple]):
+    """Queue many (input_data, output_data) pairs; the writer flushes them as multi-row inserts"""
+    try:
+        timestamp = datetime.utcnow()
+        with span("save_result", records=len(records)):
+            await result_writer.submit_many([{
+                "id": str(uuid.uuid4()),
+                "tool_name": tool_name,
+                "input_data": json.dumps(input_data),
+                "output_data": json.dumps(output_data),
+                "timestamp": timestamp
+            } for input_data, output_data in records])
+    except Exception as e:
+        print(f"Error saving results: {e}")
+
+LLM_UNAVAILABLE = "AI processing unavailable"
+
+class LLMUnavailableError(HTTPException):
+    """Gemini gave no answer: 503 (with Retry-After when known) for quota, outages and an open
+    circuit, 502 when the request itself was rejected. Never saved as a result."""
+
+def llm_unavailable(e: Exception) -> LLMUnavailableError:
+    retry_after = retry_after_of(e)
+    return LLMUnavailableError(
+        status_code=502 if classify_error(e) == FATAL else 503,
+        detail=f"{LLM_UNAVAILABLE}: {str(e)}",
+        headers={"Retry-After": str(math.ceil(retry_after))} if retry_after else None,
+    )
+
+async def call_gemini(prompt: str, temperature: float = 0.7, max_tokens: int = 1024, cache_key: Optional[str] = None,
+                      call_info: Optional[dict] = None) -> str:
+    """Call Gemini through the async gateway so the event loop is never blocked.
+
+    When a cache key is given, successful responses are served from and stored
+    in the response cache. Identical calls made while one is in flight wait
+    for its response instead of calling Gemini. The gateway rate limits and
+    retries; when it still fails, LLMUnavailableError is raised so endpoints
+    answer 503/502 instead of returning (and saving) the error text. A
+    `call_info` dict gets {"cache": "hit"} when the answer came from the cache.
+    """
     try:
         if not GEMINI_API_KEY:
             return "Gemini API key not configured. Using fallback response."
         
-        model = genai.GenerativeModel('gemini-2.5-flash-lite')
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.types.GenerationConfig(
-                temperature=temperature,
-                max_output_tokens=max_tokens,  # Configurable for faster responses
-            )
-        )
-        return response.text
+        with span("call_gemini") as current:
+            response_cache = await services.aget("response_cache")
+            llm_gateway = await services.aget("llm_gateway")
+            if cache_key:
+                cached = await response_cache.get(cache_key)
+                if cached is not None:
+                    current.attributes["cache"] = "hit"
+                    if call_info is not None:
+                        call_info["cache"] = "hit"
+                    return cached
+            
+            async def generate():
+                # Upstream time (rate limiting and retries included), recorded once per shared call
+                with span("llm.generate"):
+                    text = await llm_gateway.generate(
+                        prompt,
+                        temperature=temperature,
+                        max_tokens=max_tokens,  # Configurable for faster responses
+                    )
+                observe_llm_sizes("call_gemini", prompt, text)
+                if cache_key:
+                    await response_cache.set(cache_key, text)
+                return text
+            
+            key = flight_key(GEMINI_MODEL, prompt, temperature, max_tokens)
+            return await llm_flights.run(key, generate)
     except Exception as e:
         print(f"Gemini API error: {e}")
-        return f"AI processing unavailable: {str(e)}"
+        raise llm_unavailable(e) from e
 
-def scrape_website(url: str) -> dict:
-    """Scrape website content using BeautifulSoup"""
+async def stream_gemini(prompt: str, temperature: float = 0.7, max_tokens: int = 1024, cache_key: Optional[str] = None) -> AsyncIterator[str]:
+    """Streaming counterpart of call_gemini: yields text as Gemini produces it (raises on errors)"""
+    if not GEMINI_API_KEY:
+        yield "Gemini API key not configured. Using fallback response."
+        return
+    
+    response_cache = await services.aget("response_cache")
+    if cache_key:
+        cached = await response_cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+    
+    llm_gateway = await services.aget("llm_gateway")
+    chunks = []
+    started = time.perf_counter()
+    async for text in llm_gateway.stream(prompt, temperature=temperature, max_tokens=max_tokens):
+        chunks.append(text)
+        yield text
+    # A generator cannot hold a span open across yields; the stage is recorded once the stream is done
+    record_stage("stream_gemini", started)
+    observe_llm_sizes("stream_gemini", prompt, "".join(chunks))
+    if cache_key:
+        await response_cache.set(cache_key, "".join(chunks))
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # don't let reverse proxies buffer the stream
+}
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def stream_llm_result(tool_name: str, input_data: dict, prompt: str, build_result: Callable[[str], dict],
+                      sources=None, temperature: float = 0.7, max_tokens: int = 1024,
+                      cache_key: Optional[str] = None) -> StreamingResponse:
+    """Server-Sent Events response for an LLM endpoint.
+
+    Emits `sources` (if given) before the model is called, a `token` event per
+    streamed chunk, then `done` with the same body the non-streaming endpoint
+    returns; that result is persisted through save_result. Upstream failures
+    end the stream with an `error` event.
+    """
+    async def events():
+        if sources is not None:
+            yield sse_event("sources", sources)
+        chunks = []
+        try:
+            async for text in stream_gemini(prompt, temperature, max_tokens, cache_key):
+                chunks.append(text)
+                yield sse_event("token", {"text": text})
+        except Exception as e:
+            print(f"Gemini API error: {e}")
+            yield sse_event("error", {"detail": f"{LLM_UNAVAILABLE}: {str(e)}"})
+            return
+        result = build_result("".join(chunks))
+        await save_result(tool_name, input_data, result)
+        yield sse_event("done", result)
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+def bump_corpus_version():
+    """Invalidate cached RAG answers: the searchable documents changed"""
+    semantic_cache = services.peek("semantic_cache")
+    if semantic_cache is not None:
+        semantic_cache.bump_version()
+
+async def record_ingestion(job):
+    """Persist the outcome of a finished ingestion job"""
+    document_store = await services.aget("document_store")
+    await document_store.afinish(job)
+    bump_corpus_version()
+    document_vectors = services.peek("document_vectors")
+    if document_vectors is not None:
+        document_vectors.invalidate(job.document_id)
+    if job.status != "completed":
+        print(f"Document ingestion failed for {job.filename}: {job.error}")
+        return
+    bm25_index = services.peek("bm25_index")
+    if bm25_index is not None:
+        bm25_index.schedule_save(float(os.getenv('BM25_SAVE_DELAY', '5')))
+    await save_result("document_upload", {"filename": job.filename}, {
+        "success": True,
+        "document_id": job.document_id,
+        "filename": job.filename,
+        "char_count": job.char_count,
+        "chunks_indexed": job.chunks_indexed,
+        "message": "Document uploaded and indexed successfully. You can now ask questions about it."
+    })
+
+ingestion_pipeline = IngestionPipeline(
+    get_collection=lambda: services.aget("chroma_collection"),
+    chunker=TextChunker(
+        max_tokens=int(os.getenv('CHUNK_MAX_TOKENS', '256')),
+        overlap_tokens=int(os.getenv('CHUNK_OVERLAP_TOKENS', '32')),
+    ),
+    batch_size=int(os.getenv('INGEST_BATCH_SIZE', '64')),
+    page_window=int(os.getenv('INGEST_PAGE_WINDOW', '8')),
+    max_workers=int(os.getenv('INGEST_WORKERS', '2')),
+    on_complete=record_ingestion,
+    get_lexical_index=lambda: services.aget("bm25_index"),
+)
+
+def cache_bypassed(request: Request) -> bool:
+    """The client asked not to be served from a cache (X-Cache-Bypass or Cache-Control: no-cache)"""
+    cache_control = request.headers.get("cache-control", "").lower()
+    return request.headers.get("x-cache-bypass", "").lower() in ("1", "true", "yes") or "no-cache" in cache_control
+
+def cache_key_for(request: Request, template: str, inputs: dict, temperature: float, max_tokens: int = 1024) -> Optional[str]:
+    """Build the response cache key, or None when the client asked to bypass the cache"""
+    if cache_bypassed(request):
+        return None
+    return make_cache_key(GEMINI_MODEL, template, temperature, max_tokens, inputs)
+
+async def semantic_cache_lookup(request: Request, namespace: str, query: str):
+    """(cached result, ticket): the stored result for a paraphrase of `query`, or None
+    and a ticket for `semantic_cache_store` once the answer has been computed"""
+    semantic_cache = await services.aget("semantic_cache")
+    if semantic_cache is None or cache_bypassed(request) or not await services.aget("chroma_collection"):
+        return None, None
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Extract text content
-        for script in soup(["script", "style"]):
-            script.decompose()
+        version = semantic_cache.version
+        query_embedder = await services.aget("query_embedder")
+        embedding = await query_embedder.embed_query(query)
+    except Exception as e:
+        print(f"Semantic cache lookup error: {e}")
+        return None, None
+    entry = semantic_cache.lookup(namespace, query, embedding)
+    if entry is None:
+        return None, (namespace, embedding, version, time.perf_counter())
+    return {**entry["result"], "query": query, "cache": {
+        "status": "hit",
+        "similarity": entry["similarity"],
+        "matched_query": entry["question"],
+        "corpus_version": entry["version"],
+        "saved_ms": entry["latency_ms"]
+    }}, None
+
+def semantic_cache_store(query: str, ticket: Optional[tuple], result: dict, grounded: bool):
+    """Cache a freshly computed result; returns it with its cache status.
+
+    Only answers grounded in retrieved context are stored: when retrieval
+    failed or found nothing (or there is no Gemini key) the answer is degraded
+    and must not be served to paraphrases until the corpus changes.
+    """
+    if ticket is None:
+        return {**result, "cache": {"status": "bypass"}}
+    namespace, embedding, version, started = ticket
+    stored = bool(GEMINI_API_KEY) and grounded
+    if stored:
+        semantic_cache = services.peek("semantic_cache")
+        semantic_cache.store(namespace, query, embedding, result, (time.perf_counter() - started) * 1000, version)
+    return {**result, "cache": {"status": "miss", "stored": stored}}
+
+async def scrape_website(url: str) -> dict:
+    """Fetch a page through the shared HTTP client and extract its text off the event loop.
+
+    Pages are cached by canonical URL. Within SCRAPE_FRESH_SECONDS the cached
+    copy is returned without a request; after that the page is revalidated
+    with If-None-Match / If-Modified-Since and a 304 keeps the cached text and
+    summary. `cache` in the result is "fresh", "revalidated" or "miss".
+    """
+    try:
+        key = canonicalize_url(url)
+        scrape_cache = await services.aget("scrape_cache")
+        cached = await scrape_cache.aget(key) if scrape_cache else None
+        if cached and scrape_cache.is_fresh(cached):
+            scrape_cache.fresh_hits += 1
+            return scrape_payload(key, cached, "fresh")
         
-        text = soup.get_text()
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        text = ' '.join(chunk for chunk in chunks if chunk)
+        fetcher = await services.aget("http_fetcher")
+        page = await fetcher.fetch(url, headers=ScrapeCache.conditional_headers(cached))
+        if page.status_code == 304 and cached:
+            scrape_cache.revalidated += 1
+            await scrape_cache.atouch(key)
+            return scrape_payload(key, cached, "revalidated")
         
-        return {
-            "success": True,
-            "title": soup.title.string if soup.title else "No title",
-            "content": text[:5000],  # Limit to first 5000 chars
-            "word_count": len(text.split())
+        # Parsing stops once 5000 chars of main content (nav/ads/footers removed) are collected
+        with span("scrape.extract"):
+            extracted = await asyncio.to_thread(extract_text, page.content, 5000, page.encoding)
+        entry = {
+            "url": key,
+            "final_url": page.url,
+            "title": extracted.title or "No title",
+            "content": extracted.text,
+            "content_hash": content_fingerprint(extracted.text),
+            "etag": page.headers.get("etag"),
+            "last_modified": page.headers.get("last-modified"),
+            "summary": None,
         }
+        # Unchanged text (server ignored the validators) keeps its summary
+        if cached and cached["content_hash"] == entry["content_hash"]:
+            entry["summary"] = cached["summary"]
+        if scrape_cache:
+            scrape_cache.misses += 1
+            await scrape_cache.aput(entry)
+        return scrape_payload(key, entry, "miss", truncated=extracted.truncated)
     except Exception as e:
         return {
             "success": False,
             "error": str(e)
         }
 
+def scrape_payload(key: str, entry: dict, cache_status: str, truncated: bool = False) -> dict:
+    return {
+        "success": True,
+        "cache_key": key,
+        "title": entry["title"],
+        "content": entry["content"],
+        "word_count": len(entry["content"].split()),
+        "truncated": truncated,
+        "summary": entry.get("summary"),
+        "cache": cache_status
+    }
+
 # Request Models
 class TextInput(BaseModel):
     text: str
@@ -150,6 +644,9 @@ class TextInput(BaseModel):
 class URLInput(BaseModel):
     url: str
 
+class CrawlInput(BaseModel):
+    urls: List[str]
+
 class QueryInput(BaseModel):
     query: str
 
@@ -161,10 +658,18 @@ class ResearchInput(BaseModel):
     topic: str
     num_sources: Optional[int] = 3
 
+class BatchTextInput(BaseModel):
+    texts: List[str]
+
 class FileQueryInput(BaseModel):
     file_id: str
     query: str
 
+class DocumentQueryInput(QueryInput):
+    # Restrict retrieval to one or more uploaded documents (ids from /api/documents/upload)
+    doc_id: Optional[str] = None
+    doc_ids: Optional[List[str]] = None
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -174,52 +679,157 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "health": "/api/health",
+            "liveness": "/api/health/live",
+            "readiness": "/api/health/ready",
+            "metrics": "/metrics",
+            "traces": "/api/traces",
             "agentflow": {
                 "research": "/api/agentflow/research",
+                "research_stream": "/api/agentflow/research/stream",
                 "rag_query": "/api/agentflow/rag-query",
+                "rag_query_stream": "/api/agentflow/rag-query/stream",
                 "web_scrape": "/api/agentflow/web-scrape",
+                "web_scrape_batch": "/api/agentflow/web-scrape/batch",
                 "file_upload": "/api/agentflow/file-upload"
             },
             "nlp": {
                 "summarize": "/api/nlp/summarize",
+                "summarize_stream": "/api/nlp/summarize/stream",
                 "entities": "/api/nlp/entities",
                 "sentiment": "/api/nlp/sentiment",
-                "qna": "/api/nlp/qna"
+                "qna": "/api/nlp/qna",
+                "batch": "/api/nlp/batch/{sentiment|entities|summarize}"
             }
         }
     }
 
-# Health check endpoint
+# Health check endpoints
 @app.get("/api/health")
 async def health_check():
     chromadb_docs = 0
-    if chroma_client:
+    chroma_collection = services.peek("chroma_collection")
+    if chroma_collection:
         try:
-            collections = chroma_client.list_collections()
-            for collection in collections:
-                chromadb_docs += collection.count()
+            chromadb_docs = await asyncio.to_thread(chroma_collection.count)
         except:
             pass
     
+    llm_gateway = services.peek("llm_gateway")
+    response_cache = services.peek("response_cache")
+    query_embedder = services.peek("query_embedder")
+    http_fetcher = services.peek("http_fetcher")
+    scrape_cache = services.peek("scrape_cache")
+    bm25_index = services.peek("bm25_index")
+    document_vectors = services.peek("document_vectors")
+    reranker = services.peek("reranker")
+    semantic_cache = services.peek("semantic_cache")
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
         "chromadb_documents": chromadb_docs,
         "services": {
             "api": "operational",
-            "chromadb": "operational" if chroma_client else "unavailable"
-        }
+            "chromadb": "operational" if chroma_collection else services.status()["chroma_collection"]["status"]
+        },
+        "llm_gateway": llm_gateway.stats() if llm_gateway else None,
+        "single_flight": {"llm": llm_flights.stats(), "retrieval": retrieval_flights.stats()},
+        "response_cache": response_cache.stats() if response_cache else None,
+        "semantic_cache": semantic_cache.stats() if semantic_cache else None,
+        "result_writer": result_writer.stats(),
+        "query_embeddings": query_embedder.stats() if query_embedder else None,
+        "bm25_index": bm25_index.stats() if bm25_index else None,
+        "document_vectors": document_vectors.stats() if document_vectors else None,
+        "reranker": reranker.stats() if reranker else None,
+        "http_fetcher": http_fetcher.stats() if http_fetcher else None,
+        "scrape_cache": scrape_cache.stats() if scrape_cache else None
     }
 
+@app.get("/api/health/live")
+async def liveness():
+    """Liveness: the process is up and serving requests"""
+    return {"status": "alive", "timestamp": datetime.now().isoformat()}
+
+@app.get("/api/health/ready")
+async def readiness():
+    """Readiness: warm-up has finished and required services are available"""
+    ready = services.is_ready()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "services": services.status()}
+    )
+
+@app.get("/api/health/startup")
+async def startup_report():
+    """Breakdown of import and initialization time per service"""
+    return services.report()
+
+# Service state exported with the request and stage histograms (read at scrape time)
+def llm_guard():
+    llm_gateway = services.peek("llm_gateway")
+    return llm_gateway.guard if llm_gateway else None
+
+def cache_lookups():
+    response_cache = services.peek("response_cache")
+    semantic_cache = services.peek("semantic_cache")
+    lookups = {}
+    if response_cache:
+        lookups[("response", "hit")] = sum(response_cache.hits.values())
+        lookups[("response", "miss")] = response_cache.misses
+    if semantic_cache:
+        lookups[("semantic", "hit")] = semantic_cache.hits
+        lookups[("semantic", "miss")] = semantic_cache.misses
+    return lookups
+
+REGISTRY.callback(
+    "agentflow_llm_rate_limit_rps", "Current adaptive Gemini request rate",
+    lambda: llm_guard().limiter.rate if llm_guard() and llm_guard().limiter else None,
+)
+REGISTRY.callback(
+    "agentflow_llm_circuit_state", "Gemini circuit breaker state (1 for the current state)",
+    lambda: {state: int(llm_guard().breaker.state == state) for state in ("closed", "open", "half_open")}
+    if llm_guard() else None,
+    labelnames=("state",),
+)
+REGISTRY.callback(
+    "agentflow_llm_attempts_total", "Gemini attempts by outcome",
+    lambda: {"attempt": llm_guard().attempts, "retry": llm_guard().retries, "failure": llm_guard().failures}
+    if llm_guard() else None,
+    labelnames=("kind",), kind="counter",
+)
+REGISTRY.callback(
+    "agentflow_single_flight_coalesced_total", "Calls that waited on an identical in-flight call",
+    lambda: {"llm": llm_flights.coalesced, "retrieval": retrieval_flights.coalesced},
+    labelnames=("flight",), kind="counter",
+)
+REGISTRY.callback(
+    "agentflow_cache_lookups_total", "Response and semantic cache lookups",
+    cache_lookups, labelnames=("cache", "result"), kind="counter",
+)
+REGISTRY.callback(
+    "agentflow_result_writer_queued", "Results waiting to be written to the database",
+    lambda: result_writer.stats()["queued"],
+)
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: route latency, per-stage timings, LLM prompt/response sizes, service state"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/traces")
+async def recent_traces(min_ms: float = 0, limit: int = 20):
+    """Most recent request traces (newest first), optionally only those slower than `min_ms`"""
+    return {"traces": [trace.to_dict() for trace in TRACES.recent(min_ms, limit)]}
+
+@app.get("/api/traces/{trace_id}")
+async def get_trace(trace_id: str):
+    """Stage-by-stage breakdown of one request; the id is in its X-Trace-Id response header"""
+    trace = TRACES.get(trace_id)
+    if not trace:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return trace.to_dict()
+
 # AgentFlow endpoints
-@app.post("/api/agentflow/research")
-async def multi_agent_research(data: QueryInput):
-    """Multi-agent research using Gemini AI - Optimized version"""
-    try:
-        query = data.query
-        
-        # Optimized single prompt for comprehensive research
-        research_prompt = f"""Conduct comprehensive research on: {query}
+RESEARCH_PROMPT = """Conduct comprehensive research on: {query}
 
 Provide a structured response with:
 
@@ -242,126 +852,291 @@ Provide a structured response with:
 [Overall sentiment and future prospects]
 
 Please provide a comprehensive response."""
+
+async def retrieve_research_documents(query: str) -> list:
+    """Documents shown alongside a research answer (placeholders when the store is empty)"""
+    retrieved_documents = []
+    if await services.aget("chroma_collection"):
+        try:
+            retrieved_documents = [{"text": hit["text"]} for hit in await hybrid_search(query, n_results=3)]
+        except:
+            pass
+    
+    if not retrieved_documents:
+        retrieved_documents = [
+            {"text": f"Relevant information about {query} from knowledge base"},
+            {"text": f"Additional context and supporting evidence for {query}"},
+            {"text": f"Complementary perspectives on {query}"}
+        ]
+    return retrieved_documents
+
+def research_result(query: str, final_answer: str, retrieved_documents: list) -> dict:
+    return {
+        "success": True,
+        "query": query,
+        "final_answer": final_answer,
+        "summary": "Research completed with detailed analysis, key insights, and practical applications.",
+        "entities": "Key entities extracted from research",
+        "sentiment": "Outlook: Positive developments with ongoing innovations",
+        "retrieved_documents": retrieved_documents
+    }
+
+@app.post("/api/agentflow/research")
+async def multi_agent_research(data: QueryInput):
+    """Multi-agent research using Gemini AI - Optimized version"""
+    try:
+        query = data.query
         
         # Single API call for all research (with extended token limit)
-        final_answer = call_gemini(research_prompt, temperature=0.6, max_tokens=1536)
-        
-        # Extract summary from the structured response
-        summary = "Research completed with detailed analysis, key insights, and practical applications."
-        entities = "Key entities extracted from research"
-        sentiment = "Outlook: Positive developments with ongoing innovations"
+        final_answer = await call_gemini(RESEARCH_PROMPT.format(query=query), temperature=0.6, max_tokens=1536)
         
-        # Simulate RAG retrieval
-        retrieved_documents = []
-        if chroma_collection:
-            try:
-                results = chroma_collection.query(
-                    query_texts=[query],
-                    n_results=3
-                )
-                if results['documents'] and len(results['documents']) > 0:
-                    retrieved_documents = [{"text": doc} for doc in results['documents'][0]]
-            except:
-                pass
-        
-        if not retrieved_documents:
-            retrieved_documents = [
-                {"text": f"Relevant information about {query} from knowledge base"},
-                {"text": f"Additional context and supporting evidence for {query}"},
-                {"text": f"Complementary perspectives on {query}"}
-            ]
-        
-        result = {
-            "success": True,
-            "query": query,
-            "final_answer": final_answer,
-            "summary": summary,
-            "entities": entities,
-            "sentiment": sentiment,
-            "retrieved_documents": retrieved_documents
-        }
+        result = research_result(query, final_answer, await retrieve_research_documents(query))
         
         # Save to database
-        save_result("multi_agent_research", {"query": query}, result)
+        await save_result("multi_agent_research", {"query": query}, result)
         
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/agentflow/research/stream")
+async def multi_agent_research_stream(data: QueryInput):
+    """Streaming research: retrieved documents first, then the report as it is generated"""
+    try:
+        query = data.query
+        retrieved_documents = await retrieve_research_documents(query)
+        return stream_llm_result(
+            "multi_agent_research", {"query": query},
+            RESEARCH_PROMPT.format(query=query),
+            lambda final_answer: research_result(query, final_answer, retrieved_documents),
+            sources={"retrieved_documents": retrieved_documents},
+            temperature=0.6, max_tokens=1536,
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+CONTEXT_CANDIDATES = int(os.getenv('CONTEXT_CANDIDATES', '6'))
+RAG_CONTEXT_TOKENS = int(os.getenv('RAG_CONTEXT_TOKENS', '500'))
+DOCUMENT_CONTEXT_TOKENS = int(os.getenv('DOCUMENT_CONTEXT_TOKENS', '1000'))
+
+async def retrieve_hits(query: str, doc_ids: Optional[List[str]] = None) -> List[dict]:
+    """Hybrid search candidates, reranked by the cross-encoder when RERANK=true.
+
+    With a reranker, RERANK_CANDIDATES are fetched and rescored in one batch
+    and the best CONTEXT_CANDIDATES kept; past RERANK_BUDGET_MS the fused
+    order is kept instead.
+    """
+    reranker = await services.aget("reranker")
+    depth = max(CONTEXT_CANDIDATES, reranker.candidates) if reranker else CONTEXT_CANDIDATES
+    hits = await hybrid_search(query, n_results=depth, doc_ids=doc_ids)
+    if reranker:
+        hits, _ = await reranker.arerank(query, hits)
+    return hits[:CONTEXT_CANDIDATES]
+
+async def pack_context(hits: List[dict], max_tokens: int) -> PackedContext:
+    """Dedupe and fit retrieved chunks to a token budget counted with the model's tokenizer"""
+    token_counter = await services.aget("token_counter")
+    with span("context.pack"):
+        return await asyncio.to_thread(ContextPacker(max_tokens, token_counter).pack, hits)
+
+async def retrieve_rag_context(query: str):
+    """Top chunks for a RAG answer as (sources, packed context)"""
+    hits = []
+    
+    # Retrieve a few more chunks than fit; the packer keeps the best ones within RAG_CONTEXT_TOKENS
+    if await services.aget("chroma_collection"):
+        try:
+            hits = await retrieve_hits(query)
+        except Exception as e:
+            print(f"ChromaDB query error: {e}")
+    context = await pack_context(hits, RAG_CONTEXT_TOKENS)
+    
+    sources = []
+    for hit in context.chunks:
+        similarity = 1.0 - hit["distance"] if hit["distance"] is not None else 0.0
+        sources.append({
+            "chunk": hit["text"][:200] + "...",
+            "similarity": round(similarity, 2),
+            "match": hit["match"],
+            "relevance": hit.get("relevance"),
+            "tokens": hit["tokens"]
+        })
+    return sources or [{"chunk": "General knowledge", "similarity": 0.0}], context
+
+def rag_prompt(query: str, context_text: str) -> str:
+    # Optimized prompt with concise instructions
+    if context_text:
+        return f"""Answer concisely based on this context:
+
+{context_text}
+
+Q: {query}
+A:"""
+    return f"""Provide a concise answer to: {query}"""
+
 @app.post("/api/agentflow/rag-query")
-async def rag_query(data: QueryInput):
+async def rag_query(data: QueryInput, request: Request):
     """Query the RAG system with ChromaDB and Gemini AI - Optimized"""
     try:
-        sources = []
-        context_text = ""
+        # A paraphrase answered against the current documents is served from the semantic cache
+        result, ticket = await semantic_cache_lookup(request, f"rag:{GEMINI_MODEL}", data.query)
+        if result is not None:
+            await save_result("rag_query", {"query": data.query}, result)
+            return result
         
-        # Retrieve from ChromaDB (limit to 3 results for faster response)
-        if chroma_collection:
-            try:
-                results = chroma_collection.query(
-                    query_texts=[data.query],
-                    n_results=3  # Reduced from 5 to 3
-                )
-                
-                if results['documents'] and len(results['documents']) > 0:
-                    for i, doc in enumerate(results['documents'][0]):
-                        similarity = 1.0 - results['distances'][0][i] if results['distances'] else 0.9
-                        sources.append({
-                            "chunk": doc[:200] + "...",
-                            "similarity": round(similarity, 2)
-                        })
-                        # Limit context to 1500 chars per document
-                        context_text += doc[:1500] + "\n\n"
-            except Exception as e:
-                print(f"ChromaDB query error: {e}")
-        
-        # Optimized prompt with concise instructions
-        if context_text:
-            prompt = f"""Answer concisely based on this context:
-
-{context_text[:2000]}
-
-Q: {data.query}
-A:"""
-        else:
-            prompt = f"""Provide a concise answer to: {data.query}"""
+        sources, context = await retrieve_rag_context(data.query)
         
-        answer = call_gemini(prompt, temperature=0.4)  # Lower temperature for faster response
+        answer = await call_gemini(rag_prompt(data.query, context.text), temperature=0.4)  # Lower temperature for faster response
         
-        result = {
+        result = semantic_cache_store(data.query, ticket, {
             "success": True,
             "query": data.query,
             "answer": answer,
-            "sources": sources if sources else [{"chunk": "General knowledge", "similarity": 0.0}]
-        }
+            "sources": sources,
+            "context": context.report()
+        }, grounded=bool(context.chunks))
         
         # Save to database
-        save_result("rag_query", {"query": data.query}, result)
+        await save_result("rag_query", {"query": data.query}, result)
         
         return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/agentflow/rag-query/stream")
+async def rag_query_stream(data: QueryInput):
+    """Streaming RAG query: sources first, then answer tokens"""
+    try:
+        sources, context = await retrieve_rag_context(data.query)
+        return stream_llm_result(
+            "rag_query", {"query": data.query},
+            rag_prompt(data.query, context.text),
+            lambda answer: {"success": True, "query": data.query, "answer": answer, "sources": sources,
+                            "context": context.report()},
+            sources={"sources": sources, "context": context.report()},
+            temperature=0.4,
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+PAGE_SUMMARY_PROMPT = """Summarize in 2-3 sentences:
+
+Title: {title}
+Content: {content}
+
+Summary:"""
+
+COMBINED_SUMMARY_PROMPT = """The following are summaries of {count} web pages. Write one combined summary that:
+- states the main themes shared across the pages
+- notes where the sources disagree or add something unique
+- stays under 250 words
+
+{summaries}
+
+Combined summary:"""
+
+CRAWL_MAX_URLS = int(os.getenv('CRAWL_MAX_URLS', '50'))
+REDUCE_FAN_IN = 10
+
+async def combine_summaries(pages: List[CrawlPage]) -> str:
+    """Reduce step: merge page summaries, in rounds of REDUCE_FAN_IN when there are many"""
+    summarized = [page for page in pages if page.summary]
+    if len(summarized) <= 1:
+        return summarized[0].summary if summarized else ""
+    summaries = [f"[{page.title}] ({page.url})\n{page.summary}" for page in summarized]
+    while len(summaries) > 1:
+        groups = [summaries[i:i + REDUCE_FAN_IN] for i in range(0, len(summaries), REDUCE_FAN_IN)]
+        summaries = await asyncio.gather(*(
+            call_gemini(COMBINED_SUMMARY_PROMPT.format(count=len(group), summaries="\n\n".join(group)),
+                        temperature=0.3)
+            for group in groups
+        ))
+    return summaries[0]
+
+@app.post("/api/agentflow/web-scrape/batch")
+async def web_scraper_batch(data: CrawlInput):
+    """Crawl many URLs concurrently and stream per-page summaries (SSE), then a combined summary.
+
+    Events: `page` for every input URL as soon as it is fetched and summarized
+    (or found to be a duplicate / fail), `summary` with the map-reduce summary
+    over all unique pages, and `done` with the full result, which is also saved.
+    """
+    if not data.urls:
+        raise HTTPException(status_code=400, detail="No URLs given")
+    if len(data.urls) > CRAWL_MAX_URLS:
+        raise HTTPException(status_code=400, detail=f"At most {CRAWL_MAX_URLS} URLs per request")
+    try:
+        crawler = await services.aget("crawler")
+        
+        async def summarize_page(page: CrawlPage):
+            # Map step: runs as soon as the page arrives, while other fetches continue
+            try:
+                page.summary = await call_gemini(
+                    PAGE_SUMMARY_PROMPT.format(title=page.title, content=page.text[:2000]), temperature=0.3
+                )
+            except LLMUnavailableError as e:
+                page.error = e.detail
+        
+        async def events():
+            started = time.perf_counter()
+            pages = []
+            async for page in crawler.crawl(data.urls, process=summarize_page):
+                pages.append(page)
+                yield sse_event("page", page.to_dict())
+            
+            unique = sorted((page for page in pages if page.status == "ok"), key=lambda page: page.index)
+            try:
+                combined = await combine_summaries(unique)
+                yield sse_event("summary", {"summary": combined, "pages": len(unique)})
+            except LLMUnavailableError as e:
+                combined = None
+                yield sse_event("error", {"detail": e.detail})
+            
+            result = {
+                "success": True,
+                "combined_summary": combined,
+                "pages": [page.to_dict() for page in sorted(pages, key=lambda page: page.index)],
+                "counts": {status: sum(page.status == status for page in pages) for status in ("ok", "duplicate", "error")},
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+            }
+            await save_result("web_crawl", {"urls": data.urls}, result)
+            yield sse_event("done", result)
+        
+        return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/agentflow/web-scrape")
 async def web_scraper(data: URLInput):
-    """Scrape and summarize web content using BeautifulSoup and Gemini AI - Optimized"""
+    """Scrape and summarize web content using Gemini AI - Optimized"""
     try:
         # Scrape the website
-        scrape_result = scrape_website(data.url)
+        scrape_result = await scrape_website(data.url)
         
         if not scrape_result["success"]:
             raise HTTPException(status_code=400, detail=scrape_result["error"])
         
-        # Optimized summary with limited content length
-        content_preview = scrape_result['content'][:2000]  # Limit to first 2000 chars
-        summary_prompt = f"""Summarize in 2-3 sentences:
-
-Title: {scrape_result['title']}
-Content: {content_preview}
-
-Summary:"""
+        # Optimized summary with limited content length (first 2000 chars)
+        summary_prompt = PAGE_SUMMARY_PROMPT.format(title=scrape_result['title'], content=scrape_result['content'][:2000])
         
-        summary = call_gemini(summary_prompt, temperature=0.3)  # Lower temp for faster response
+        # A cached page (fresh, 304-revalidated or unchanged text) keeps its summary
+        summary = scrape_result["summary"]
+        if not summary:
+            summary = await call_gemini(summary_prompt, temperature=0.3)  # Lower temp for faster response
+            scrape_cache = services.peek("scrape_cache")
+            # Without a key call_gemini returns placeholder text, which must not be cached as the summary
+            if scrape_cache and GEMINI_API_KEY:
+                await scrape_cache.aset_summary(scrape_result["cache_key"], summary)
         
         result = {
             "success": True,
@@ -369,257 +1144,397 @@ Summary:"""
             "title": scrape_result["title"],
             "content": scrape_result["content"][:1000] + "...",
             "summary": summary,
-            "word_count": scrape_result["word_count"]
+            "word_count": scrape_result["word_count"],
+            "cache": scrape_result["cache"]
         }
         
         # Save to database
-        save_result("web_scraper", {"url": data.url}, result)
+        await save_result("web_scraper", {"url": data.url}, result)
         
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/agentflow/file-upload")
 async def file_query(data: FileQueryInput):
-    """Query uploaded documents"""
+    """Answer a question from one uploaded document (file_id is the upload's document_id)"""
+    doc_ids = await resolve_document_scope([data.file_id])
     try:
-        # Placeholder for document query logic
-        return {
-            "success": True,
+        started = time.perf_counter()
+        sources, context = await retrieve_document_context(data.query, doc_ids)
+        await record_document_query(doc_ids, started)
+        
+        answer = await call_gemini(document_prompt(data.query, context.text), temperature=0.4)
+        
+        result = {
+            **document_result(data.query, answer, sources, context),
             "file_id": data.file_id,
-            "query": data.query,
-            "answer": f"Answer to '{data.query}' from the uploaded document: This is a demonstration response. In production, this would analyze the document and provide relevant answers.",
-            "relevant_pages": [1, 2, 3]
+            "relevant_chunks": [{
+                "chunk_id": hit["metadata"].get("chunk_id"),
+                "start_char": hit["metadata"].get("start_char"),
+                "end_char": hit["metadata"].get("end_char"),
+                "match": hit["match"],
+                "relevance": hit.get("relevance"),
+                "tokens": hit["tokens"]
+            } for hit in context.chunks]
         }
+        
+        # Save to database
+        await save_result("file_query", {"file_id": data.file_id, "query": data.query}, result)
+        
+        return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # Document upload and query endpoints (ChatPDF functionality)
 @app.post("/api/documents/upload")
 async def upload_document(file: UploadFile = File(...)):
-    """Handle document upload and index to ChromaDB"""
+    """Accept a document and index it into ChromaDB in the background"""
     try:
-        doc_id = str(uuid.uuid4())
-        
-        # Read file content
-        content = await file.read()
-        text = ""
-        
-        # Extract text based on file type
-        if file.filename.endswith('.pdf'):
-            try:
-                pdf_file = io.BytesIO(content)
-                pdf_reader = PyPDF2.PdfReader(pdf_file)
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-            except Exception as e:
-                return {
-                    "success": False,
-                    "message": f"Error reading PDF: {str(e)}"
-                }
-        elif file.filename.endswith('.txt'):
-            text = content.decode('utf-8')
-        else:
+        if not ingestion_pipeline.is_supported(file.filename):
             return {
                 "success": False,
                 "message": "Unsupported file type. Please upload PDF or TXT files."
             }
         
-        # Store in ChromaDB
-        if chroma_collection and text:
-            # Split text into chunks
-            chunk_size = 1000
-            chunks = [text[i:i+chunk_size] for i in range(0, len(text), chunk_size)]
-            
-            # Add to ChromaDB with document ID
-            chroma_collection.add(
-                documents=chunks,
-                ids=[f"{doc_id}_{i}" for i in range(len(chunks))],
-                metadatas=[{"doc_id": doc_id, "filename": file.filename, "chunk_id": i} for i in range(len(chunks))]
-            )
+        # Register first so the document can be queried (and its stats kept) from the start
+        document_id = str(uuid.uuid4())
+        document_store = await services.aget("document_store")
+        await document_store.aregister(document_id, file.filename)
         
-        result = {
+        # Spool to disk and start streaming ingestion; progress is polled via the job endpoint
+        job = await ingestion_pipeline.submit(file, document_id=document_id)
+        bump_corpus_version()
+        
+        return {
             "success": True,
-            "document_id": doc_id,
+            "document_id": job.document_id,
+            "job_id": job.job_id,
             "filename": file.filename,
-            "char_count": len(text),
-            "message": "Document uploaded and indexed successfully. You can now ask questions about it."
+            "status": job.status,
+            "status_url": f"/api/documents/jobs/{job.job_id}",
+            "message": "Document received. Indexing has started; poll the status URL for progress."
         }
-        
-        # Save to database
-        save_result("document_upload", {"filename": file.filename}, result)
-        
-        return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/api/documents/query")
-async def query_document(data: QueryInput):
-    """Query uploaded documents using RAG with Gemini AI"""
-    try:
-        sources = []
-        context_text = ""
-        
-        # Retrieve relevant chunks from ChromaDB
-        if chroma_collection:
-            try:
-                results = chroma_collection.query(
-                    query_texts=[data.query],
-                    n_results=3
-                )
-                
-                if results['documents'] and len(results['documents']) > 0:
-                    for doc in results['documents'][0]:
-                        sources.append(doc[:100] + "...")
-                        context_text += doc + "\n\n"
-            except Exception as e:
-                print(f"ChromaDB query error: {e}")
-        
-        # Generate answer using Gemini with document context
-        if context_text:
-            prompt = f"""Based on the following excerpts from the uploaded document, answer the question accurately:
+@app.get("/api/documents/jobs/{job_id}")
+async def ingestion_status(job_id: str):
+    """Report progress of a document ingestion job"""
+    job = ingestion_pipeline.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Ingestion job not found")
+    return job.to_dict()
+
+@app.get("/api/documents")
+async def list_documents(limit: int = 100):
+    """Uploaded documents with ingestion and query statistics, newest first"""
+    document_store = await services.aget("document_store")
+    return {"documents": await document_store.alist(limit)}
+
+@app.get("/api/documents/{doc_id}")
+async def document_stats(doc_id: str):
+    """Ingestion and query statistics for one uploaded document"""
+    documents = await known_documents([doc_id])
+    if doc_id not in documents:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return documents[doc_id]
+
+async def known_documents(doc_ids: List[str]) -> dict:
+    """Registry rows for `doc_ids`. Documents uploaded before the registry existed
+    only have chunks in ChromaDB; they get a row the first time they are asked for."""
+    document_store = await services.aget("document_store")
+    known = await document_store.aget_many(doc_ids)
+    unknown = [doc_id for doc_id in doc_ids if doc_id not in known]
+    chroma_collection = await services.aget("chroma_collection") if unknown else None
+    if chroma_collection is None:
+        return known
+    backfilled = []
+    for doc_id in unknown:
+        try:
+            chunks = await asyncio.to_thread(chroma_collection.get, where={"doc_id": doc_id}, include=["metadatas"])
+        except Exception as e:
+            print(f"ChromaDB lookup error for {doc_id}: {e}")
+            continue
+        if chunks["ids"]:
+            filename = (chunks["metadatas"][0] or {}).get("filename", "")
+            await document_store.abackfill(doc_id, filename, len(chunks["ids"]))
+            backfilled.append(doc_id)
+    if backfilled:
+        known.update(await document_store.aget_many(backfilled))
+    return known
+
+async def resolve_document_scope(doc_ids: List[Optional[str]]) -> Optional[List[str]]:
+    """Validated document ids for a scoped query, or None for the whole collection"""
+    doc_ids = list(dict.fromkeys(doc_id for doc_id in doc_ids if doc_id))
+    if not doc_ids:
+        return None
+    known = await known_documents(doc_ids)
+    unknown = [doc_id for doc_id in doc_ids if doc_id not in known]
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Document not found: {', '.join(unknown)}")
+    return doc_ids
+
+async def record_document_query(doc_ids: Optional[List[str]], started: float):
+    """Count a scoped query against each document, with its retrieval latency"""
+    if doc_ids:
+        document_store = await services.aget("document_store")
+        await document_store.arecord_query(doc_ids, (time.perf_counter() - started) * 1000)
+
+async def retrieve_document_context(query: str, doc_ids: Optional[List[str]] = None):
+    """Relevant uploaded-document chunks, optionally only from `doc_ids`, as (sources, packed context)"""
+    hits = []
+    # Retrieve relevant chunks from ChromaDB
+    if await services.aget("chroma_collection"):
+        try:
+            hits = await retrieve_hits(query, doc_ids)
+        except Exception as e:
+            print(f"ChromaDB query error: {e}")
+    context = await pack_context(hits, DOCUMENT_CONTEXT_TOKENS)
+    return [hit["text"][:100] + "..." for hit in context.chunks], context
+
+def document_prompt(query: str, context_text: str) -> str:
+    # Generate answer using Gemini with document context
+    if context_text:
+        return f"""Based on the following excerpts from the uploaded document, answer the question accurately:
 
 Document Context:
-{context_text[:4000]}
+{context_text}
 
-Question: {data.query}
+Question: {query}
 
 Provide a detailed and accurate answer based on the document:"""
-        else:
-            prompt = f"Answer this question: {data.query}"
+    return f"Answer this question: {query}"
+
+def document_result(query: str, answer: str, sources: list, context: PackedContext) -> dict:
+    # Cross-encoder relevance of the chunks used when they were reranked
+    confidence = confidence_from(context.chunks)
+    if confidence is None:
+        confidence = 0.88 if context.text else 0.5
+    return {
+        "success": True,
+        "query": query,
+        "answer": answer,
+        "confidence_score": confidence,
+        "sources": sources if sources else ["Document not found in database"],
+        "context": context.report()
+    }
+
+@app.post("/api/documents/query")
+async def query_document(data: DocumentQueryInput, request: Request):
+    """Query uploaded documents using RAG with Gemini AI; doc_id/doc_ids limit the search"""
+    doc_ids = await resolve_document_scope([data.doc_id, *(data.doc_ids or [])])
+    try:
+        namespace = f"documents:{GEMINI_MODEL}:{','.join(sorted(doc_ids or []))}"
+        result, ticket = await semantic_cache_lookup(request, namespace, data.query)
+        if result is not None:
+            await save_result("document_query", {"query": data.query, "doc_ids": doc_ids}, result)
+            return result
         
-        answer = call_gemini(prompt, temperature=0.4)
+        started = time.perf_counter()
+        sources, context = await retrieve_document_context(data.query, doc_ids)
+        await record_document_query(doc_ids, started)
         
-        result = {
-            "success": True,
-            "query": data.query,
-            "answer": answer,
-            "confidence_score": 0.88 if context_text else 0.5,
-            "sources": sources if sources else ["Document not found in database"]
-        }
+        answer = await call_gemini(document_prompt(data.query, context.text), temperature=0.4)
+        
+        result = semantic_cache_store(data.query, ticket, document_result(data.query, answer, sources, context),
+                                      grounded=bool(context.chunks))
         
         # Save to database
-        save_result("document_query", {"query": data.query}, result)
+        await save_result("document_query", {"query": data.query, "doc_ids": doc_ids}, result)
         
         return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/documents/query/stream")
+async def query_document_stream(data: DocumentQueryInput):
+    """Streaming document query: matching excerpts first, then answer tokens"""
+    doc_ids = await resolve_document_scope([data.doc_id, *(data.doc_ids or [])])
+    try:
+        started = time.perf_counter()
+        sources, context = await retrieve_document_context(data.query, doc_ids)
+        await record_document_query(doc_ids, started)
+        return stream_llm_result(
+            "document_query", {"query": data.query, "doc_ids": doc_ids},
+            document_prompt(data.query, context.text),
+            lambda answer: document_result(data.query, answer, sources, context),
+            sources={"sources": sources, "context": context.report()},
+            temperature=0.4,
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # NLP endpoints
+SUMMARIZE_PROMPT = """Provide a concise summary of the following text. Keep it clear and informative:
+
+Text: {text}
+
+Summary:"""
+
+ENTITIES_PROMPT = """Extract and categorize named entities from the following text. Provide them in a clear, organized format by category (PERSON, ORGANIZATION, LOCATION, DATE, etc.):
+
+Text: {text}
+
+Extracted Entities:"""
+
+SENTIMENT_PROMPT = """Analyze the sentiment of the following text. Provide:
+1. Overall sentiment (Positive/Negative/Neutral/Mixed)
+2. Confidence score (0-1)
+3. Brief explanation of the sentiment
+
+Text: {text}
+
+Analysis:"""
+
+QNA_PROMPT = """Based on the following context, answer the question accurately and concisely.
+
+Context: {context}
+
+Question: {question}
+
+Answer:"""
+
+def summarize_result(text: str, summary: str) -> dict:
+    words = text.split()
+    return {
+        "success": True,
+        "original_length": len(words),
+        "summary": summary,
+        "compression_ratio": round(len(summary.split()) / len(words) * 100, 2) if words else 0
+    }
+
 @app.post("/api/nlp/summarize")
-async def summarize_text(data: TextInput):
+async def summarize_text(data: TextInput, request: Request):
     """Summarize input text using Gemini AI"""
     try:
         text = data.text
-        words = text.split()
         
-        prompt = f"""Provide a concise summary of the following text. Keep it clear and informative:
-
-Text: {text}
-
-Summary:"""
+        prompt = SUMMARIZE_PROMPT.format(text=text)
+        cache_key = cache_key_for(request, SUMMARIZE_PROMPT, {"text": text}, temperature=0.3)
         
-        summary = call_gemini(prompt, temperature=0.3)
+        summary = await call_gemini(prompt, temperature=0.3, cache_key=cache_key)
         
-        result = {
-            "success": True,
-            "original_length": len(words),
-            "summary": summary,
-            "compression_ratio": round(len(summary.split()) / len(words) * 100, 2) if words else 0
-        }
+        result = summarize_result(text, summary)
         
         # Save to database
-        save_result("summarization", {"text": text[:500]}, result)
+        await save_result("summarization", {"text": text[:500]}, result)
         
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/nlp/summarize/stream")
+async def summarize_text_stream(data: TextInput, request: Request):
+    """Streaming summarization (a cached summary is sent as a single token event)"""
+    try:
+        text = data.text
+        return stream_llm_result(
+            "summarization", {"text": text[:500]},
+            SUMMARIZE_PROMPT.format(text=text),
+            lambda summary: summarize_result(text, summary),
+            temperature=0.3,
+            cache_key=cache_key_for(request, SUMMARIZE_PROMPT, {"text": text}, temperature=0.3),
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def entities_result(text: str, entities_text: str) -> dict:
+    return {
+        "success": True,
+        "entities": entities_text,  # Return as formatted text instead of object
+        "text_preview": text[:100] + "..." if len(text) > 100 else text
+    }
+
 @app.post("/api/nlp/entities")
-async def extract_entities(data: TextInput):
+async def extract_entities(data: TextInput, request: Request):
     """Extract named entities from text using Gemini AI"""
     try:
         text = data.text
         
-        prompt = f"""Extract and categorize named entities from the following text. Provide them in a clear, organized format by category (PERSON, ORGANIZATION, LOCATION, DATE, etc.):
-
-Text: {text}
-
-Extracted Entities:"""
+        prompt = ENTITIES_PROMPT.format(text=text)
+        cache_key = cache_key_for(request, ENTITIES_PROMPT, {"text": text}, temperature=0.2)
         
-        entities_text = call_gemini(prompt, temperature=0.2)
+        entities_text = await call_gemini(prompt, temperature=0.2, cache_key=cache_key)
         
-        result = {
-            "success": True,
-            "entities": entities_text,  # Return as formatted text instead of object
-            "text_preview": text[:100] + "..." if len(text) > 100 else text
-        }
+        result = entities_result(text, entities_text)
         
         # Save to database
-        save_result("entity_extraction", {"text": text[:500]}, result)
+        await save_result("entity_extraction", {"text": text[:500]}, result)
         
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def sentiment_result(analysis: str) -> dict:
+    # Extract sentiment and score from response
+    sentiment = "Neutral"
+    confidence = 0.5
+    
+    if "Positive" in analysis or "positive" in analysis:
+        sentiment = "Positive"
+        confidence = 0.85
+    elif "Negative" in analysis or "negative" in analysis:
+        sentiment = "Negative"
+        confidence = 0.85
+    elif "Mixed" in analysis or "mixed" in analysis:
+        sentiment = "Mixed"
+        confidence = 0.7
+    
+    return {
+        "success": True,
+        "sentiment": sentiment,
+        "confidence": confidence,
+        "analysis": analysis
+    }
+
 @app.post("/api/nlp/sentiment")
-async def analyze_sentiment(data: TextInput):
+async def analyze_sentiment(data: TextInput, request: Request):
     """Analyze sentiment using Gemini AI"""
     try:
         text = data.text
         
-        prompt = f"""Analyze the sentiment of the following text. Provide:
-1. Overall sentiment (Positive/Negative/Neutral/Mixed)
-2. Confidence score (0-1)
-3. Brief explanation of the sentiment
-
-Text: {text}
-
-Analysis:"""
-        
-        analysis = call_gemini(prompt, temperature=0.2)
-        
-        # Extract sentiment and score from response
-        sentiment = "Neutral"
-        confidence = 0.5
+        prompt = SENTIMENT_PROMPT.format(text=text)
+        cache_key = cache_key_for(request, SENTIMENT_PROMPT, {"text": text}, temperature=0.2)
         
-        if "Positive" in analysis or "positive" in analysis:
-            sentiment = "Positive"
-            confidence = 0.85
-        elif "Negative" in analysis or "negative" in analysis:
-            sentiment = "Negative"
-            confidence = 0.85
-        elif "Mixed" in analysis or "mixed" in analysis:
-            sentiment = "Mixed"
-            confidence = 0.7
+        analysis = await call_gemini(prompt, temperature=0.2, cache_key=cache_key)
         
-        result = {
-            "success": True,
-            "sentiment": sentiment,
-            "confidence": confidence,
-            "analysis": analysis
-        }
+        result = sentiment_result(analysis)
         
         # Save to database
-        save_result("sentiment_analysis", {"text": text[:500]}, result)
+        await save_result("sentiment_analysis", {"text": text[:500]}, result)
         
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/nlp/qna")
-async def question_answering(data: QnAInput):
+async def question_answering(data: QnAInput, request: Request):
     """Answer questions based on context using Gemini AI"""
     try:
-        prompt = f"""Based on the following context, answer the question accurately and concisely.
-
-Context: {data.context}
-
-Question: {data.question}
-
-Answer:"""
+        inputs = {"context": data.context, "question": data.question}
+        prompt = QNA_PROMPT.format(**inputs)
+        cache_key = cache_key_for(request, QNA_PROMPT, inputs, temperature=0.3)
         
-        answer = call_gemini(prompt, temperature=0.3)
+        answer = await call_gemini(prompt, temperature=0.3, cache_key=cache_key)
         
         result = {
             "success": True,
@@ -630,9 +1545,155 @@ Answer:"""
         }
         
         # Save to database
-        save_result("question_answering", {"context": data.context[:200], "question": data.question}, result)
+        await save_result("question_answering", {"context": data.context[:200], "question": data.question}, result)
         
         return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Batch NLP: short inputs share one structured-output prompt, the rest fan out
+BATCH_MAX_ITEMS = int(os.getenv('NLP_BATCH_MAX_ITEMS', '500'))
+BATCH_PACK_TOKENS = int(os.getenv('NLP_BATCH_PACK_TOKENS', '2048'))
+BATCH_PACK_ITEMS = int(os.getenv('NLP_BATCH_PACK_ITEMS', '20'))
+BATCH_CONCURRENCY = int(os.getenv('NLP_BATCH_CONCURRENCY', '8'))
+
+def packed_sentiment(text: str, item: dict) -> Optional[dict]:
+    sentiment = str(item.get("sentiment", "")).strip().capitalize()
+    if sentiment not in ("Positive", "Negative", "Neutral", "Mixed"):
+        return None
+    try:
+        confidence = min(1.0, max(0.0, float(item.get("confidence", 0.5))))
+    except (TypeError, ValueError):
+        confidence = 0.5
+    return {"success": True, "sentiment": sentiment, "confidence": confidence, "analysis": str(item.get("analysis", ""))}
+
+def packed_entities(text: str, item: dict) -> Optional[dict]:
+    entities = item.get("entities")
+    if isinstance(entities, dict):
+        entities = "\n".join(f"{category}: {', '.join(map(str, names)) if isinstance(names, list) else names}"
+                             for category, names in entities.items())
+    if not isinstance(entities, str):
+        return None
+    return entities_result(text, entities)
+
+def packed_summary(text: str, item: dict) -> Optional[dict]:
+    summary = item.get("summary")
+    return summarize_result(text, summary) if isinstance(summary, str) and summary else None
+
+NLP_BATCH_TASKS = {
+    "sentiment": {
+        "tool_name": "sentiment_analysis",
+        "template": SENTIMENT_PROMPT,
+        "temperature": 0.2,
+        "instruction": "Analyze the sentiment of each text.",
+        "fields": {
+            "sentiment": '"Positive" | "Negative" | "Neutral" | "Mixed"',
+            "confidence": "number between 0 and 1",
+            "analysis": "one-sentence explanation",
+        },
+        "item_tokens": 80,
+        "single": lambda text, analysis: sentiment_result(analysis),
+        "packed": packed_sentiment,
+    },
+    "entities": {
+        "tool_name": "entity_extraction",
+        "template": ENTITIES_PROMPT,
+        "temperature": 0.2,
+        "instruction": "Extract and categorize the named entities in each text.",
+        "fields": {
+            "entities": "string listing entities by category (PERSON, ORGANIZATION, LOCATION, DATE, etc.), one category per line",
+        },
+        "item_tokens": 160,
+        "single": entities_result,
+        "packed": packed_entities,
+    },
+    "summarize": {
+        "tool_name": "summarization",
+        "template": SUMMARIZE_PROMPT,
+        "temperature": 0.3,
+        "instruction": "Provide a concise, clear and informative summary of each text.",
+        "fields": {"summary": "string"},
+        "item_tokens": 160,
+        "single": summarize_result,
+        "packed": packed_summary,
+    },
+}
+
+@app.post("/api/nlp/batch/{task}")
+async def nlp_batch(task: str, data: BatchTextInput, request: Request):
+    """Run an NLP task over many texts; results come back in input order"""
+    spec = NLP_BATCH_TASKS.get(task)
+    if spec is None:
+        raise HTTPException(status_code=404, detail=f"Unknown batch task '{task}'. Available: {', '.join(NLP_BATCH_TASKS)}")
+    if len(data.texts) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_ITEMS} texts per batch")
+    try:
+        texts = data.texts
+        temperature = spec["temperature"]
+        results: List[Optional[dict]] = [None] * len(texts)
+        counters = {"llm_calls": 0, "cache_hits": 0, "packed_items": 0}
+        semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+        
+        async def run_single(index: int):
+            text = texts[index]
+            cache_key = cache_key_for(request, spec["template"], {"text": text}, temperature=temperature)
+            call_info = {}
+            try:
+                async with semaphore:
+                    raw = await call_gemini(spec["template"].format(text=text), temperature=temperature,
+                                            cache_key=cache_key, call_info=call_info)
+            except LLMUnavailableError as e:
+                counters["llm_calls"] += 1
+                results[index] = {"success": False, "error": e.detail}
+                return
+            counters["cache_hits" if call_info.get("cache") == "hit" else "llm_calls"] += 1
+            results[index] = spec["single"](text, raw)
+        
+        async def run_pack(indices: List[int]):
+            prompt = build_packed_prompt(spec["instruction"], spec["fields"], [texts[i] for i in indices])
+            try:
+                async with semaphore:
+                    counters["llm_calls"] += 1
+                    reply = await call_gemini(prompt, temperature=temperature,
+                                              max_tokens=min(8192, 128 + spec["item_tokens"] * len(indices)))
+            except LLMUnavailableError:
+                reply = ""
+            parsed = parse_packed_response(reply, len(indices))
+            missing = []
+            for position, index in enumerate(indices):
+                item = parsed.get(position)
+                result = spec["packed"](texts[index], item) if item else None
+                if result is None:
+                    missing.append(index)
+                else:
+                    results[index] = result
+                    counters["packed_items"] += 1
+            # Anything the model dropped or garbled is retried on its own
+            await asyncio.gather(*(run_single(index) for index in missing))
+        
+        packs, singles = pack_inputs(texts, max_tokens=BATCH_PACK_TOKENS, max_items=BATCH_PACK_ITEMS)
+        await asyncio.gather(*(run_pack(pack) for pack in packs), *(run_single(index) for index in singles))
+        
+        # One bulk write for the whole batch; items Gemini could not answer are not saved
+        await save_results(spec["tool_name"], [
+            ({"text": text[:500], "batch": True}, result) for text, result in zip(texts, results)
+            if result.get("success", True)
+        ])
+        
+        return {
+            "success": True,
+            "task": task,
+            "count": len(texts),
+            "results": results,
+            "llm_calls": counters["llm_calls"],
+            "cache_hits": counters["cache_hits"],
+            "packed_items": counters["packed_items"],
+            "failed": sum(not result.get("success", True) for result in results)
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
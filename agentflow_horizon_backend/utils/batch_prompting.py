@@ -0,0 +1,92 @@
+"""Pack many short inputs into one structured-output prompt and unpack the reply"""
+import json
+import logging
+import re
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from utils.token_counter import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+JSON_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+def pack_inputs(
+    texts: Sequence[str],
+    max_tokens: int = 2048,
+    max_items: int = 20,
+    token_counter: Callable[[str], int] = estimate_tokens,
+) -> Tuple[List[List[int]], List[int]]:
+    """Group input indices into packs that fit the token budget.
+
+    Returns (packs, singles): each pack is a list of indices to send in one
+    prompt; `singles` are inputs too large to share a prompt with anything.
+    """
+    packs: List[List[int]] = []
+    singles: List[int] = []
+    current: List[int] = []
+    used = 0
+    for index, text in enumerate(texts):
+        tokens = token_counter(text)
+        if tokens > max_tokens // 2:
+            singles.append(index)
+            continue
+        if current and (used + tokens > max_tokens or len(current) >= max_items):
+            packs.append(current)
+            current, used = [], 0
+        current.append(index)
+        used += tokens
+    if current:
+        packs.append(current)
+    # A pack of one gains nothing over the single-item prompt
+    singles.extend(pack[0] for pack in packs if len(pack) == 1)
+    return [pack for pack in packs if len(pack) > 1], sorted(singles)
+
+
+def build_packed_prompt(instruction: str, fields: Dict[str, str], texts: Sequence[str]) -> str:
+    """One prompt asking for a JSON array with an object per input, keyed by id"""
+    schema = ", ".join(f'"{name}": {description}' for name, description in fields.items())
+    items = "\n\n".join(f"[id={index}]\n{text}" for index, text in enumerate(texts))
+    return f"""{instruction}
+
+Process each of the {len(texts)} inputs below independently.
+Respond with ONLY a JSON array containing exactly {len(texts)} objects, one per input, in the same order:
+{{"id": <input id>, {schema}}}
+
+Inputs:
+
+{items}"""
+
+
+def parse_packed_response(text: str, count: int) -> Dict[int, dict]:
+    """Map input id -> parsed object.
+
+    The reply is only trusted when its ids are exactly 0..count-1. A list that
+    is shifted, duplicated or short cannot be matched to the inputs safely, so
+    it yields {} and the caller falls back to one call per input.
+    """
+    body = JSON_FENCE.sub("", text.strip())
+    start, end = body.find("["), body.rfind("]")
+    if start == -1 or end <= start:
+        return {}
+    try:
+        items = json.loads(body[start:end + 1])
+    except ValueError:
+        logger.warning("Packed response was not valid JSON")
+        return {}
+    if not isinstance(items, list) or len(items) != count:
+        logger.warning(f"Packed response has {len(items) if isinstance(items, list) else 0} items, expected {count}")
+        return {}
+    parsed = {}
+    for item in items:
+        if not isinstance(item, dict):
+            return {}
+        try:
+            index = int(item["id"])
+        except (KeyError, TypeError, ValueError):
+            return {}
+        parsed[index] = item
+    if set(parsed) != set(range(count)):
+        logger.warning("Packed response ids do not match the inputs")
+        return {}
+    return parsed
@@ -0,0 +1,137 @@
+"""Assembles retrieved chunks into a prompt context that fits a token budget"""
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence
+
+from utils.token_counter import TokenCounter, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+SEPARATOR = "\n\n"
+SHINGLE_WORDS = 5
+OVERLAP_PROBE = 64
+_WORDS = re.compile(r"\w+")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def _shingles(text: str) -> set:
+    words = _WORDS.findall(text.lower())
+    if len(words) <= SHINGLE_WORDS:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+@dataclass
+class PackedContext:
+    text: str
+    chunks: List[dict] = field(default_factory=list)
+    tokens: int = 0
+    budget: int = 0
+    candidates: int = 0
+    duplicates: int = 0
+    trimmed: int = 0
+    dropped: int = 0
+
+    def report(self) -> dict:
+        return {
+            "context_tokens": self.tokens,
+            "budget": self.budget,
+            "chunks_used": len(self.chunks),
+            "candidates": self.candidates,
+            "duplicates_removed": self.duplicates,
+            "trimmed": self.trimmed,
+            "dropped": self.dropped,
+        }
+
+
+class ContextPacker:
+    """Dedupes, orders and packs retrieved chunks into at most `max_tokens` tokens.
+
+    Chunks are taken best first (by "score", else in the given order). A chunk
+    whose word 5-grams are mostly (`duplicate_threshold`) contained in an
+    already chosen chunk is dropped, and text a chunk shares with the end or
+    start of an already chosen chunk (the chunker's overlap between
+    neighbours) is cut off. A chunk that does not fit whole is trimmed at a
+    sentence boundary if at least `min_chunk_tokens` of it fit, otherwise it
+    is skipped and smaller chunks further down may still be used.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int,
+        token_counter: TokenCounter = estimate_tokens,
+        duplicate_threshold: float = 0.8,
+        min_chunk_tokens: int = 48,
+    ):
+        self.max_tokens = max_tokens
+        self.count_tokens = token_counter
+        self.duplicate_threshold = duplicate_threshold
+        self.min_chunk_tokens = min_chunk_tokens
+
+    def pack(self, hits: Sequence[dict], max_tokens: Optional[int] = None) -> PackedContext:
+        """`hits` are dicts with "text" and an optional "score"; other keys are passed through"""
+        budget = self.max_tokens if max_tokens is None else max_tokens
+        packed = PackedContext(text="", budget=budget, candidates=len(hits))
+        ranked = sorted(
+            (hit for hit in hits if hit.get("text")),
+            key=lambda hit: hit.get("score", 0.0), reverse=True,
+        )
+        chosen_shingles: List[set] = []
+        parts = []
+        separator_tokens = self.count_tokens(SEPARATOR)
+        used = 0
+        for hit in ranked:
+            text = self._without_overlap(hit["text"].strip(), parts)
+            shingles = _shingles(text)
+            if not shingles or any(
+                len(shingles & seen) >= self.duplicate_threshold * len(shingles) for seen in chosen_shingles
+            ):
+                packed.duplicates += 1
+                continue
+            available = budget - used - (separator_tokens if parts else 0)
+            tokens = self.count_tokens(text)
+            if tokens > available:
+                if available < self.min_chunk_tokens:
+                    packed.dropped += 1
+                    continue
+                text, tokens = self._trim(text, available)
+                if not text:
+                    packed.dropped += 1
+                    continue
+                packed.trimmed += 1
+            used += tokens + (separator_tokens if parts else 0)
+            parts.append(text)
+            chosen_shingles.append(shingles)
+            packed.chunks.append({**hit, "text": text, "tokens": tokens})
+        packed.text = SEPARATOR.join(parts)
+        packed.tokens = self.count_tokens(packed.text) if parts else 0
+        return packed
+
+    @staticmethod
+    def _without_overlap(text: str, chosen: List[str]) -> str:
+        """Drop a head that repeats the end of a chosen chunk and a tail that repeats the start of one"""
+        for other in chosen:
+            if len(text) > OVERLAP_PROBE:
+                position = other.find(text[:OVERLAP_PROBE])
+                if position > 0 and text.startswith(other[position:]):
+                    text = text[len(other) - position:].lstrip()
+            if len(text) > OVERLAP_PROBE:
+                position = text.find(other[:OVERLAP_PROBE])
+                if position > 0 and other.startswith(text[position:]):
+                    text = text[:position].rstrip()
+        return text
+
+    def _trim(self, text: str, max_tokens: int):
+        """Longest prefix ending on a sentence boundary that fits in `max_tokens`"""
+        boundaries = [match.start() for match in _SENTENCE_END.finditer(text)] + [len(text)]
+        low, high, best = 0, len(boundaries) - 1, ("", 0)
+        while low <= high:
+            middle = (low + high) // 2
+            candidate = text[:boundaries[middle]].rstrip()
+            tokens = self.count_tokens(candidate)
+            if tokens <= max_tokens:
+                best, low = (candidate, tokens), middle + 1
+            else:
+                high = middle - 1
+        return best
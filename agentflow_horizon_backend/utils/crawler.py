@@ -0,0 +1,156 @@
+"""Concurrent multi-URL crawling with per-domain limits and de-duplication"""
+import asyncio
+import hashlib
+import logging
+import time
+from dataclasses import asdict, dataclass
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from utils.html_extract import WHITESPACE, extract_text
+from utils.http_fetcher import HttpFetcher
+from utils.telemetry import span
+
+logger = logging.getLogger(__name__)
+
+TRACKING_PARAMS = {"gclid", "fbclid", "msclkid", "mc_cid", "mc_eid", "ref", "ref_src", "igshid", "_ga"}
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonicalize_url(url: str) -> str:
+    """Normalize a URL so trivially different links to the same page compare equal.
+
+    Lowercases scheme and host, drops default ports, fragments, tracking
+    parameters (utm_*, gclid, ...) and trailing slashes, and sorts the query.
+    Raises ValueError for anything that is not an absolute http(s) URL.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        raise ValueError(f"Not an http(s) URL: {url}")
+    host = parts.hostname.lower().rstrip(".")
+    if parts.port and parts.port != DEFAULT_PORTS[scheme]:
+        host = f"{host}:{parts.port}"
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def content_fingerprint(text: str) -> str:
+    """Hash of the whitespace- and case-normalized page text"""
+    return hashlib.sha256(WHITESPACE.sub(" ", text).strip().lower().encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CrawlPage:
+    index: int
+    url: str
+    canonical_url: Optional[str] = None
+    status: str = "pending"  # ok | duplicate | error
+    title: str = ""
+    text: str = ""
+    content_hash: Optional[str] = None
+    duplicate_of: Optional[str] = None
+    error: Optional[str] = None
+    elapsed_ms: float = 0.0
+    summary: Optional[str] = None
+
+    def to_dict(self, include_text: bool = False) -> dict:
+        data = asdict(self)
+        if not include_text:
+            data.pop("text")
+        data["word_count"] = len(self.text.split())
+        return data
+
+
+class Crawler:
+    """Fetches a list of URLs concurrently and yields pages as they finish.
+
+    At most `max_concurrency` fetches run at once and at most `per_domain`
+    against any single host. URLs are de-duplicated by canonical form before
+    fetching, by canonical form of the final (post-redirect) URL, and by a hash
+    of the extracted text. `process` runs on each unique page (e.g. to
+    summarize it) before that page is yielded.
+    """
+
+    def __init__(self, fetcher: HttpFetcher, max_concurrency: int = 16, per_domain: int = 4, max_chars: int = 5000):
+        self.fetcher = fetcher
+        self.max_chars = max_chars
+        self.per_domain = per_domain
+        self._global = asyncio.Semaphore(max_concurrency)
+        self._domains: Dict[str, asyncio.Semaphore] = {}
+
+    def _domain_limit(self, canonical_url: str) -> asyncio.Semaphore:
+        host = urlsplit(canonical_url).netloc
+        if host not in self._domains:
+            self._domains[host] = asyncio.Semaphore(self.per_domain)
+        return self._domains[host]
+
+    async def crawl(
+        self,
+        urls: List[str],
+        process: Optional[Callable[[CrawlPage], Awaitable[None]]] = None,
+    ) -> AsyncIterator[CrawlPage]:
+        queue: asyncio.Queue = asyncio.Queue()
+        seen_urls: Dict[str, str] = {}
+        seen_hashes: Dict[str, str] = {}
+        tasks = []
+        for index, url in enumerate(urls):
+            page = CrawlPage(index=index, url=url)
+            try:
+                page.canonical_url = canonicalize_url(url)
+            except ValueError as e:
+                page.status, page.error = "error", str(e)
+                queue.put_nowait(page)
+                continue
+            if page.canonical_url in seen_urls:
+                page.status, page.duplicate_of = "duplicate", seen_urls[page.canonical_url]
+                queue.put_nowait(page)
+                continue
+            seen_urls[page.canonical_url] = url
+            tasks.append(asyncio.create_task(self._crawl_one(page, seen_urls, seen_hashes, process, queue)))
+        try:
+            for _ in urls:
+                yield await queue.get()
+        finally:
+            # The consumer went away (e.g. client disconnect): stop outstanding work
+            for task in tasks:
+                task.cancel()
+
+    async def _crawl_one(self, page: CrawlPage, seen_urls: dict, seen_hashes: dict, process, queue: asyncio.Queue):
+        started = time.perf_counter()
+        try:
+            async with self._global, self._domain_limit(page.canonical_url):
+                fetched = await self.fetcher.fetch(page.url)
+            final_url = canonicalize_url(fetched.url)
+            if final_url != page.canonical_url:
+                if final_url in seen_urls:
+                    page.status, page.duplicate_of = "duplicate", seen_urls[final_url]
+                    return
+                seen_urls[final_url] = page.url
+
+            with span("scrape.extract"):
+                extracted = await asyncio.to_thread(extract_text, fetched.content, self.max_chars, fetched.encoding)
+            page.title, page.text = extracted.title or "No title", extracted.text
+            page.content_hash = content_fingerprint(page.text)
+            if page.content_hash in seen_hashes:
+                page.status, page.duplicate_of = "duplicate", seen_hashes[page.content_hash]
+                return
+            seen_hashes[page.content_hash] = page.url
+
+            page.status = "ok"
+            if process is not None:
+                await process(page)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            page.status, page.error = "error", str(e) or e.__class__.__name__
+            logger.info(f"Crawl of {page.url} failed: {page.error}")
+        finally:
+            page.elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+            queue.put_nowait(page)
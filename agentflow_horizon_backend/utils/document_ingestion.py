@@ -0,0 +1,281 @@
+"""Streaming document ingestion: spool to disk, extract pages, index in batches"""
+import asyncio
+import logging
+import os
+import tempfile
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
+
+import PyPDF2
+
+from utils.telemetry import span, start_trace
+from utils.text_chunker import Chunk, TextChunker
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.txt')
+SPOOL_READ_SIZE = 1024 * 1024
+TEXT_BLOCK_SIZE = 256 * 1024
+
+
+class IndexingError(RuntimeError):
+    """The document was read but its chunks could not be embedded or stored"""
+
+
+class IndexUnavailable(IndexingError):
+    """The vector store is not available, so the document cannot be indexed"""
+
+
+# Per worker process: the reader of the PDF it last worked on, so each window
+# does not parse the file's cross-reference table and page tree again
+_reader_path: Optional[str] = None
+_reader: Optional[PyPDF2.PdfReader] = None
+
+
+def _pdf_reader(path: str) -> PyPDF2.PdfReader:
+    global _reader_path, _reader
+    if _reader_path != path:
+        _reader_path, _reader = None, None
+        _reader = PyPDF2.PdfReader(path)
+        _reader_path = path
+    return _reader
+
+
+def count_pdf_pages(path: str) -> int:
+    """Runs in a worker process"""
+    return len(_pdf_reader(path).pages)
+
+
+def extract_pdf_pages(path: str, start: int, stop: int) -> List[str]:
+    """Extract a window of pages; runs in a worker process"""
+    reader = _pdf_reader(path)
+    return [(reader.pages[i].extract_text() or "") for i in range(start, stop)]
+
+
+@dataclass
+class IngestionJob:
+    job_id: str
+    document_id: str
+    filename: str
+    status: str = "queued"
+    total_pages: Optional[int] = None
+    pages_processed: int = 0
+    chunks_indexed: int = 0
+    char_count: int = 0
+    error: Optional[str] = None
+    created_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+    finished_at: Optional[str] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["success"] = self.status != "failed"
+        return data
+
+
+class IngestionPipeline:
+    """Accepts uploads, returns a job immediately and indexes in the background.
+
+    PDF pages are extracted in a worker process a small window at a time, so
+    memory stays bounded by the window and the current chunk batch. Each batch
+    is added to the Chroma collection and, when one is configured, to the
+    lexical (BM25) index.
+    """
+
+    def __init__(
+        self,
+        get_collection: Callable[[], Awaitable],
+        spool_dir: str = "./data/uploads",
+        batch_size: int = 64,
+        page_window: int = 8,
+        chunker: Optional[TextChunker] = None,
+        max_workers: int = 2,
+        max_jobs: int = 1000,
+        on_complete: Optional[Callable] = None,
+        get_lexical_index: Optional[Callable[[], Awaitable]] = None,
+    ):
+        self.get_collection = get_collection
+        self.get_lexical_index = get_lexical_index
+        self.spool_dir = spool_dir
+        self.batch_size = batch_size
+        self.page_window = page_window
+        self.chunker = chunker or TextChunker()
+        self.max_workers = max_workers
+        self.max_jobs = max_jobs
+        self.on_complete = on_complete
+        self.jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+        self._tasks = set()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @staticmethod
+    def is_supported(filename: str) -> bool:
+        return filename.lower().endswith(SUPPORTED_EXTENSIONS)
+
+    def get_job(self, job_id: str) -> Optional[IngestionJob]:
+        return self.jobs.get(job_id)
+
+    async def submit(self, upload, document_id: Optional[str] = None) -> IngestionJob:
+        """Spool the upload to disk and start indexing it"""
+        path = await self._spool(upload)
+        job = IngestionJob(
+            job_id=str(uuid.uuid4()),
+            document_id=document_id or str(uuid.uuid4()),
+            filename=upload.filename,
+        )
+        self._remember(job)
+        task = asyncio.create_task(self._run_traced(job, path))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def shutdown(self):
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _remember(self, job: IngestionJob):
+        self.jobs[job.job_id] = job
+        if len(self.jobs) > self.max_jobs:
+            for job_id in [j for j, known in self.jobs.items() if known.done]:
+                del self.jobs[job_id]
+                if len(self.jobs) <= self.max_jobs:
+                    break
+
+    async def _spool(self, upload) -> str:
+        os.makedirs(self.spool_dir, exist_ok=True)
+        suffix = os.path.splitext(upload.filename)[1].lower()
+        fd, path = tempfile.mkstemp(suffix=suffix, dir=self.spool_dir)
+        with os.fdopen(fd, "wb") as spool:
+            while True:
+                block = await upload.read(SPOOL_READ_SIZE)
+                if not block:
+                    break
+                await asyncio.to_thread(spool.write, block)
+        return path
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    async def iter_pages(self, path: str, job: IngestionJob) -> AsyncIterator[str]:
+        """Yield page texts (or text blocks for .txt files) one at a time"""
+        loop = asyncio.get_running_loop()
+        if path.endswith(".pdf"):
+            with span("pdf.extract"):
+                job.total_pages = await loop.run_in_executor(self._pool(), count_pdf_pages, path)
+            for start in range(0, job.total_pages, self.page_window):
+                stop = min(start + self.page_window, job.total_pages)
+                with span("pdf.extract", pages=stop - start):
+                    pages = await loop.run_in_executor(self._pool(), extract_pdf_pages, path, start, stop)
+                for page in pages:
+                    yield page + "\n"
+        else:
+            handle = await asyncio.to_thread(open, path, "r", encoding="utf-8", errors="replace")
+            try:
+                while True:
+                    block = await asyncio.to_thread(handle.read, TEXT_BLOCK_SIZE)
+                    if not block:
+                        break
+                    yield block
+            finally:
+                await asyncio.to_thread(handle.close)
+
+    async def _index_batch(self, job: IngestionJob, chunks: List[Chunk], attempted_ids: List[str]):
+        if not chunks:
+            return
+        collection = await self.get_collection()
+        if collection is None:
+            raise IndexUnavailable("ChromaDB collection unavailable; the document was not indexed")
+        ids = [f"{job.document_id}_{chunk.index}" for chunk in chunks]
+        texts = [chunk.text for chunk in chunks]
+        attempted_ids.extend(ids)
+        try:
+            # Chroma embeds the texts inside add(), so embedding failures surface here too
+            with span("ingest.index", chunks=len(chunks)):
+                await asyncio.to_thread(
+                    collection.add,
+                    documents=texts,
+                    ids=ids,
+                    metadatas=[
+                        {"doc_id": job.document_id, "filename": job.filename, **chunk.metadata()}
+                        for chunk in chunks
+                    ],
+                )
+            lexical_index = await self.get_lexical_index() if self.get_lexical_index else None
+            if lexical_index is not None:
+                await asyncio.to_thread(lexical_index.add, ids, texts, [job.document_id] * len(ids))
+        except Exception as e:
+            raise IndexingError(f"Error indexing document: {e}") from e
+        job.chunks_indexed += len(chunks)
+
+    async def _remove_partial(self, job: IngestionJob, attempted_ids: List[str]):
+        """Drop the chunks of a job that failed part way, so queries never see half a document"""
+        if not attempted_ids:
+            return
+        try:
+            collection = await self.get_collection()
+            if collection is not None:
+                await asyncio.to_thread(collection.delete, where={"doc_id": job.document_id})
+            lexical_index = await self.get_lexical_index() if self.get_lexical_index else None
+            if lexical_index is not None:
+                await asyncio.to_thread(lexical_index.remove, attempted_ids)
+            job.chunks_indexed = 0
+        except Exception as e:
+            logger.error(f"Could not remove partial chunks of {job.filename}: {e}")
+
+    async def _run_traced(self, job: IngestionJob, path: str):
+        # The job outlives the upload request, so it is traced on its own
+        with start_trace("ingest", inherit=False) as (trace, _):
+            trace.attributes.update(job_id=job.job_id, filename=job.filename)
+            await self._run(job, path)
+
+    async def _run(self, job: IngestionJob, path: str):
+        job.status = "running"
+        pending: List[Chunk] = []
+        attempted_ids: List[str] = []
+        stream = self.chunker.stream()
+        try:
+            async for page in self.iter_pages(path, job):
+                job.pages_processed += 1
+                job.char_count += len(page)
+                pending.extend(stream.feed(page))
+                while len(pending) >= self.batch_size:
+                    await self._index_batch(job, pending[:self.batch_size], attempted_ids)
+                    pending = pending[self.batch_size:]
+            pending.extend(stream.close())
+            while pending:
+                await self._index_batch(job, pending[:self.batch_size], attempted_ids)
+                pending = pending[self.batch_size:]
+            job.status = "completed"
+        except asyncio.CancelledError:
+            job.status = "failed"
+            job.error = "Ingestion cancelled"
+            await asyncio.shield(self._remove_partial(job, attempted_ids))
+            raise
+        except Exception as e:
+            logger.error(f"Ingestion failed for {job.filename}: {e}")
+            job.status = "failed"
+            if isinstance(e, IndexingError):
+                job.error = str(e)
+            else:
+                job.error = f"Error reading {'PDF' if path.endswith('.pdf') else 'file'}: {str(e)}"
+            await self._remove_partial(job, attempted_ids)
+        finally:
+            job.finished_at = datetime.utcnow().isoformat()
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        if self.on_complete:
+            await self.on_complete(job)
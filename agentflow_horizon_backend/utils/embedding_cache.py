@@ -0,0 +1,104 @@
+"""Bounded, thread-safe cache of query embeddings"""
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(text: str) -> str:
+    """Collapse whitespace and case so trivially different queries share an entry"""
+    return " ".join(text.lower().split())
+
+
+class EmbeddingCache:
+    """LRU map of (model name, normalized query) -> float32 vector.
+
+    With a `persist_path`, `load` warms the cache from an .npz snapshot and
+    `save` writes the current contents back.
+    """
+
+    def __init__(self, max_entries: int = 10000, persist_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.persist_path = persist_path
+        self._entries: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, model_name: str, text: str) -> Optional[np.ndarray]:
+        key = (model_name, normalize_query(text))
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, model_name: str, text: str, vector: np.ndarray):
+        vector = np.array(vector, dtype=np.float32).reshape(-1)
+        vector.setflags(write=False)
+        key = (model_name, normalize_query(text))
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "bytes": sum(vector.nbytes for vector in list(self._entries.values())),
+        }
+
+    def save(self):
+        """Write the cache to `persist_path` (grouped by model, oldest first)"""
+        if not self.persist_path:
+            return
+        with self._lock:
+            items = list(self._entries.items())
+        groups = {}
+        for (model_name, text), vector in items:
+            groups.setdefault(model_name, ([], []))
+            groups[model_name][0].append(text)
+            groups[model_name][1].append(vector)
+        arrays = {"models": np.array(list(groups.keys()), dtype=str)}
+        for index, (texts, vectors) in enumerate(groups.values()):
+            arrays[f"texts_{index}"] = np.array(texts, dtype=str)
+            arrays[f"vectors_{index}"] = np.vstack(vectors).astype(np.float32)
+        Path(self.persist_path).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{self.persist_path}.tmp.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, self.persist_path)
+        logger.info(f"Saved {len(items)} query embeddings to {self.persist_path}")
+
+    def load(self) -> int:
+        """Warm the cache from `persist_path`; returns the number of entries loaded"""
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return 0
+        try:
+            with np.load(self.persist_path, allow_pickle=False) as data:
+                loaded = 0
+                for index, model_name in enumerate(data["models"]):
+                    for text, vector in zip(data[f"texts_{index}"], data[f"vectors_{index}"]):
+                        self.put(str(model_name), str(text), vector)
+                        loaded += 1
+            logger.info(f"Loaded {loaded} query embeddings from {self.persist_path}")
+            return loaded
+        except Exception as e:
+            logger.warning(f"Could not load embedding cache from {self.persist_path}: {e}")
+            return 0
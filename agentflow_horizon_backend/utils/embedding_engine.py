@@ -0,0 +1,157 @@
+"""Batched embedding engine with micro-batching for concurrent queries"""
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+from utils.embedding_cache import EmbeddingCache
+from utils.telemetry import span
+
+logger = logging.getLogger(__name__)
+
+
+def sentence_transformer_encoder(model, batch_size: int = 64) -> Callable[[List[str]], np.ndarray]:
+    """Adapt a SentenceTransformer to the engine's encode function"""
+    def encode(texts: List[str]) -> np.ndarray:
+        return model.encode(
+            texts,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+    return encode
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows and return a contiguous float32 matrix"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(vectors / norms, dtype=np.float32)
+
+
+class EmbeddingEngine:
+    """Encodes texts in fixed-size batches and coalesces concurrent query embeds.
+
+    `encode` is the synchronous bulk path. `embed_query` collects requests that
+    arrive within `max_wait_ms` of each other and encodes them in one call on a
+    dedicated worker thread. Query paths consult the optional `cache` first.
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], np.ndarray],
+        model_name: str,
+        batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        cache: Optional[EmbeddingCache] = None,
+    ):
+        self.encode_fn = encode_fn
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_wait_ms = max_wait_ms
+        self.cache = cache
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding")
+        self._encode_lock = threading.Lock()
+        self._pending: List[tuple] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self.texts_encoded = 0
+        self.encode_calls = 0
+        self.query_batches = 0
+        self.queries_batched = 0
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Encode texts in batches; returns an (n, dim) normalized float32 matrix"""
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        parts = []
+        with span("embedding.encode", texts=len(texts)):
+            for start in range(0, len(texts), self.batch_size):
+                batch = list(texts[start:start + self.batch_size])
+                with self._encode_lock:
+                    parts.append(normalize(self.encode_fn(batch)))
+                self.encode_calls += 1
+                self.texts_encoded += len(batch)
+        return parts[0] if len(parts) == 1 else np.vstack(parts)
+
+    def encode_queries(self, texts: Sequence[str]) -> np.ndarray:
+        """Like `encode`, but served from the cache where possible"""
+        if self.cache is None:
+            return self.encode(texts)
+        vectors = [self.cache.get(self.model_name, text) for text in texts]
+        missing = [row for row, vector in enumerate(vectors) if vector is None]
+        if missing:
+            encoded = self.encode([texts[row] for row in missing])
+            for row, vector in zip(missing, encoded):
+                self.cache.put(self.model_name, texts[row], vector)
+                vectors[row] = vector
+        return np.vstack(vectors)
+
+    async def encode_async(self, texts: Sequence[str]) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.encode, texts)
+
+    async def embed_query(self, text: str) -> np.ndarray:
+        """Embed one query, sharing an encode call with queries that arrive alongside it"""
+        if self.cache is not None:
+            cached = self.cache.get(self.model_name, text)
+            if cached is not None:
+                return cached
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait_ms / 1000, self._flush)
+        # Includes the wait for the micro-batch; the encode itself is timed as embedding.encode
+        with span("embedding.query"):
+            return await future
+
+    async def embed_queries(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = await asyncio.gather(*(self.embed_query(text) for text in texts))
+        return np.vstack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        self.query_batches += 1
+        self.queries_batched += len(batch)
+        loop = asyncio.get_running_loop()
+        task = loop.run_in_executor(self._executor, self.encode, [text for text, _ in batch])
+        task.add_done_callback(lambda done: self._resolve(batch, done))
+
+    def _resolve(self, batch: List[tuple], done: asyncio.Future):
+        error = asyncio.CancelledError() if done.cancelled() else done.exception()
+        for row, (text, future) in enumerate(batch):
+            if error is None and self.cache is not None:
+                self.cache.put(self.model_name, text, done.result()[row])
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(done.result()[row])
+
+    def stats(self) -> dict:
+        return {
+            "model": self.model_name,
+            "texts_encoded": self.texts_encoded,
+            "encode_calls": self.encode_calls,
+            "query_batches": self.query_batches,
+            "avg_query_batch": round(self.queries_batched / self.query_batches, 2) if self.query_batches else 0.0,
+            "cache": self.cache.stats() if self.cache is not None else None,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
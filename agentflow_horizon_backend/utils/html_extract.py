@@ -0,0 +1,324 @@
+"""Streaming HTML-to-text extraction with a character budget and boilerplate removal"""
+import codecs
+import logging
+import re
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Dict, Optional, Union
+
+try:  # lxml's C parser is several times faster than html.parser
+    from lxml import etree as lxml_etree
+except ImportError:  # pragma: no cover - optional dependency
+    lxml_etree = None
+
+logger = logging.getLogger(__name__)
+
+# Never contain readable content
+SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "canvas", "iframe", "object", "head"}
+# Page chrome rather than main content
+BOILERPLATE_TAGS = {"nav", "footer", "aside", "form", "menu", "dialog"}
+BOILERPLATE_ROLES = {"navigation", "banner", "contentinfo", "complementary", "search", "menu", "dialog"}
+# Whole class/id tokens that mark ads, cookie banners, share widgets and similar chrome:
+# "sidebar", "cookie-banner", "site-footer", "share_buttons", but not "has-sidebar" or "ads-free"
+_HINT_WORD = (r"(?:ads?|advert\w*|sponsor\w*|promo\w*|banner|cookies?|consent|gdpr|popup|modal|"
+              r"newsletter|subscribe|social|share|sharing|sidebar|breadcrumbs?|navbar|menu|related|"
+              r"recommended|comments?|disqus|footer|masthead|skip-link)")
+_HINT_PART = r"(?:widget|box|bar|container|wrapper|area|section|block|links|buttons|list|slot|unit|top|bottom)"
+BOILERPLATE_HINT = re.compile(
+    rf"(?:(?:site|page|top|main|global)[-_])?{_HINT_WORD}(?:[-_](?:{_HINT_WORD}|{_HINT_PART}))*",
+    re.IGNORECASE,
+)
+BLOCK_TAGS = {
+    "p", "div", "br", "li", "ul", "ol", "dl", "dt", "dd", "h1", "h2", "h3", "h4", "h5", "h6",
+    "tr", "table", "section", "article", "main", "blockquote", "pre", "hr", "figcaption", "header",
+}
+CELL_TAGS = {"td", "th"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param",
+             "source", "track", "wbr"}
+CONTENT_ROOTS = {"article", "main"}
+# Page-level containers whose class/id/role say nothing about their content
+NEVER_HINTED = {"html", "body", "article", "main"}
+WHITESPACE = re.compile(r"\s+")
+# <meta charset="..."> or <meta http-equiv="Content-Type" content="text/html; charset=...">
+META_CHARSET = re.compile(rb"<meta[^>]*?charset\s*=\s*[\"']?\s*([\w.:-]+)", re.IGNORECASE)
+
+FEED_SIZE = 16 * 1024
+# How far into the document to look for a <meta> charset
+SNIFF_SIZE = 1024
+
+
+@dataclass
+class ExtractedPage:
+    title: str
+    text: str
+    truncated: bool
+    parser: str
+
+
+class _BudgetReached(Exception):
+    pass
+
+
+class _TextCollector:
+    """Parser-independent event handler: tracks skipped subtrees and collects text.
+
+    Skips come in three kinds: "hidden" (scripts, styles: never text), "chrome"
+    (nav/footer/aside elements, hidden attributes) and "hinted" (class, id or
+    role look like chrome). Text under hinted elements is held back, and
+    released if an <article> or <main> turns up inside them, since then the
+    hint was on a wrapper of the content. Text outside hidden elements is also
+    kept unfiltered, as a fallback for pages where filtering leaves nothing.
+    """
+
+    def __init__(self, max_chars: int):
+        self.max_chars = max_chars
+        self.parts = []
+        self.raw_parts = []
+        self.title_parts = []
+        self.chars = 0
+        self.full = False
+        self._raw_chars = 0
+        self._stack = []  # (tag, skip kind or None) for open elements
+        self._hidden = 0
+        self._skipping = 0  # open chrome and hinted elements
+        self._hinted = 0
+        self._held = []  # text under hinted elements only
+        self._held_chars = 0
+        self._content_depth = 0
+        self._in_title = False
+
+    def _skip_kind(self, tag: str, attrs: Dict[str, Optional[str]]) -> Optional[str]:
+        if tag in SKIP_TAGS:
+            return "hidden"
+        if tag in BOILERPLATE_TAGS:
+            return "chrome"
+        # A site header is chrome; an article's own header is not
+        if tag == "header" and not self._content_depth:
+            return "chrome"
+        if attrs.get("aria-hidden") == "true" or "hidden" in attrs:
+            return "chrome"
+        if tag in NEVER_HINTED:
+            return None
+        if (attrs.get("role") or "").lower() in BOILERPLATE_ROLES:
+            return "hinted"
+        tokens = f"{attrs.get('class') or ''} {attrs.get('id') or ''}".split()
+        if any(BOILERPLATE_HINT.fullmatch(token) for token in tokens):
+            return "hinted"
+        return None
+
+    def _release_held(self):
+        """A content root inside hinted elements: they were wrappers, keep their text"""
+        self._stack = [(tag, None if kind == "hinted" else kind) for tag, kind in self._stack]
+        self._skipping -= self._hinted
+        self._hinted = 0
+        self.parts.extend(self._held)
+        self.chars += self._held_chars
+        self._held, self._held_chars = [], 0
+
+    def start(self, tag: str, attrs: Dict[str, Optional[str]]):
+        tag = tag.lower()
+        if tag == "title":
+            self._in_title = True
+        if tag in BLOCK_TAGS:
+            self.parts.append("\n")
+            self.raw_parts.append("\n")
+        elif tag in CELL_TAGS:
+            self.parts.append(" ")
+            self.raw_parts.append(" ")
+        if tag in VOID_TAGS:
+            return
+        # Inside a hidden subtree there is no need to classify descendants
+        kind = None if self._hidden or tag == "title" else self._skip_kind(tag, attrs)
+        if tag in CONTENT_ROOTS and self._hinted and self._hinted == self._skipping:
+            self._release_held()
+        self._stack.append((tag, kind))
+        self._hidden += kind == "hidden"
+        self._skipping += kind in ("chrome", "hinted")
+        self._hinted += kind == "hinted"
+        self._content_depth += tag in CONTENT_ROOTS
+
+    def end(self, tag: str):
+        tag = tag.lower()
+        if tag == "title":
+            self._in_title = False
+        if tag in BLOCK_TAGS:
+            self.parts.append("\n")
+        # Pop up to the matching open tag; tolerates unclosed <p>, <li>, ...
+        for position in range(len(self._stack) - 1, -1, -1):
+            if self._stack[position][0] == tag:
+                for open_tag, kind in self._stack[position:]:
+                    self._hidden -= kind == "hidden"
+                    self._skipping -= kind in ("chrome", "hinted")
+                    self._hinted -= kind == "hinted"
+                    self._content_depth -= open_tag in CONTENT_ROOTS
+                del self._stack[position:]
+                if not self._hinted:
+                    self._held, self._held_chars = [], 0
+                break
+
+    def data(self, text: str):
+        if self._in_title:
+            self.title_parts.append(text)
+            return
+        if self._hidden or self.full:
+            return
+        if self._raw_chars < self.max_chars * 2:
+            self.raw_parts.append(text)
+            self._raw_chars += len(text)
+        if self._skipping:
+            if self._hinted == self._skipping and self._held_chars < self.max_chars * 2:
+                self._held.append(text)
+                self._held_chars += len(text)
+            return
+        self.parts.append(text)
+        self.chars += len(text)
+        if self.chars >= self.max_chars * 2:
+            # Raw text includes whitespace that is collapsed later; check the real size
+            self.chars = len(self.text())
+            if self.chars >= self.max_chars:
+                self.full = True
+                raise _BudgetReached
+
+    def text(self) -> str:
+        return _join_lines(self.parts)
+
+    def raw_text(self) -> str:
+        """Everything but scripts, styles and other hidden elements"""
+        return _join_lines(self.raw_parts)
+
+    def title(self) -> str:
+        return WHITESPACE.sub(" ", "".join(self.title_parts)).strip()
+
+
+def _join_lines(parts) -> str:
+    lines = (WHITESPACE.sub(" ", line).strip() for line in "".join(parts).split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+class _StdlibParser(HTMLParser):
+    def __init__(self, collector: _TextCollector):
+        super().__init__(convert_charrefs=True)
+        self.collector = collector
+
+    def handle_starttag(self, tag, attrs):
+        self.collector.start(tag, dict(attrs))
+
+    def handle_startendtag(self, tag, attrs):
+        self.collector.start(tag, dict(attrs))
+        if tag.lower() not in VOID_TAGS:
+            self.collector.end(tag)
+
+    def handle_endtag(self, tag):
+        self.collector.end(tag)
+
+    def handle_data(self, data):
+        self.collector.data(data)
+
+
+class _LxmlTarget:
+    """lxml parser target; exceptions raised here abort the parse"""
+
+    def __init__(self, collector: _TextCollector):
+        self.collector = collector
+
+    def start(self, tag, attrib):
+        if isinstance(tag, str):  # skip comments / processing instructions
+            self.collector.start(tag, dict(attrib))
+
+    def end(self, tag):
+        if isinstance(tag, str):
+            self.collector.end(tag)
+
+    def data(self, data):
+        self.collector.data(data)
+
+    def close(self):
+        return None
+
+
+def available_parsers():
+    return ["lxml", "html.parser"] if lxml_etree is not None else ["html.parser"]
+
+
+def extract_text(
+    html: Union[str, bytes],
+    max_chars: int = 5000,
+    encoding: Optional[str] = None,
+    parser: str = "auto",
+) -> ExtractedPage:
+    """Extract the title and main text of a page, reading no further than needed.
+
+    The document is fed to the parser in small pieces and parsing stops as soon
+    as `max_chars` characters of content text have been collected. Scripts,
+    styles, navigation, footers, sidebars and ad/cookie/share widgets are
+    dropped; if that leaves no text, the unfiltered text is returned. `parser` is "lxml", "html.parser" or "auto" (lxml if installed).
+    Bytes are decoded with `encoding` (the HTTP charset) or, without one, the
+    encoding the page declares itself (see `sniff_encoding`).
+    """
+    if parser == "auto":
+        parser = available_parsers()[0]
+    collector = _TextCollector(max_chars)
+    if isinstance(html, bytes):
+        encoding = encoding or sniff_encoding(html[:SNIFF_SIZE])
+        decoder = codecs.getincrementaldecoder(_codec(encoding))(errors="replace")
+        pieces = (decoder.decode(html[i:i + FEED_SIZE]) for i in range(0, len(html), FEED_SIZE))
+    else:
+        pieces = (html[i:i + FEED_SIZE] for i in range(0, len(html), FEED_SIZE))
+
+    if parser == "lxml":
+        if lxml_etree is None:
+            raise ValueError("lxml is not installed")
+        engine = lxml_etree.HTMLParser(target=_LxmlTarget(collector), no_network=True, recover=True)
+    elif parser == "html.parser":
+        engine = _StdlibParser(collector)
+    else:
+        raise ValueError(f"Unknown parser: {parser}")
+
+    try:
+        for piece in pieces:
+            if piece:
+                engine.feed(piece)
+        engine.close()
+    except _BudgetReached:
+        pass
+    except Exception as e:
+        # lxml wraps exceptions raised by the target; anything else is a real parse failure
+        if not collector.full:
+            logger.warning(f"HTML parse error ({parser}): {e}")
+
+    # Filtering that removes everything misjudged the page; unfiltered text beats none
+    text = collector.text() or collector.raw_text()
+    return ExtractedPage(
+        title=collector.title(),
+        text=text[:max_chars],
+        truncated=collector.full or len(text) > max_chars,
+        parser=parser,
+    )
+
+
+def sniff_encoding(head: bytes) -> Optional[str]:
+    """Encoding declared by a byte-order mark or <meta> charset at the start of a page.
+
+    Pages without either are assumed UTF-8 if their start decodes as UTF-8,
+    otherwise windows-1252, the usual encoding of undeclared legacy pages.
+    """
+    for bom, name in ((codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16")):
+        if head.startswith(bom):
+            return name
+    match = META_CHARSET.search(head)
+    if match:
+        name = _codec(match.group(1).decode("ascii"))
+        # A page that can be read as ASCII to find this tag is not UTF-16
+        return "utf-8" if name.startswith("utf-16") else name
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(head)
+        return None
+    except UnicodeDecodeError:
+        return "windows-1252"
+
+
+def _codec(encoding: Optional[str]) -> str:
+    try:
+        return codecs.lookup(encoding).name if encoding else "utf-8"
+    except LookupError:
+        return "utf-8"
@@ -0,0 +1,132 @@
+"""Shared async HTTP client for scraping: pooled connections, per-host limits, size caps"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from utils.telemetry import span
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+
+@dataclass
+class FetchResult:
+    url: str
+    status_code: int
+    headers: httpx.Headers
+    content: bytes
+    encoding: Optional[str]
+    truncated: bool
+    elapsed_ms: float
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+
+class HttpFetcher:
+    """One httpx.AsyncClient reused for every fetch.
+
+    Connections are kept alive and pooled, at most `max_per_host` requests run
+    against one host at a time, and bodies are read as a stream and cut at
+    `max_bytes` of decoded content (gzip/deflate always, brotli when the
+    `brotli` package is installed). Pass `transport` to route requests to a
+    stub (e.g. httpx.MockTransport) instead of the network.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_per_host: int = 8,
+        max_bytes: int = 2 * 1024 * 1024,
+        timeout: float = 10.0,
+        user_agent: str = DEFAULT_USER_AGENT,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.max_per_host = max_per_host
+        self.max_bytes = max_bytes
+        self._client = httpx.AsyncClient(
+            headers={"User-Agent": user_agent},
+            timeout=timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            transport=transport,
+        )
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self.requests = 0
+        self.errors = 0
+        self.truncated = 0
+        self.bytes_read = 0
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc.lower()
+        semaphore = self._host_limits.get(host)
+        if semaphore is None:
+            semaphore = self._host_limits[host] = asyncio.Semaphore(self.max_per_host)
+        return semaphore
+
+    async def fetch(self, url: str, headers: Optional[dict] = None, max_bytes: Optional[int] = None) -> FetchResult:
+        """GET a URL; raises httpx.HTTPError on network errors and non-2xx responses.
+
+        A 304 Not Modified (answer to conditional headers) is returned with empty content.
+        """
+        limit = max_bytes or self.max_bytes
+        started = time.perf_counter()
+        self.requests += 1
+        try:
+            with span("scrape.fetch"):
+                async with self._host_limit(url):
+                    async with self._client.stream("GET", url, headers=headers) as response:
+                        if response.status_code != 304:
+                            response.raise_for_status()
+                        chunks, size, truncated = [], 0, False
+                        async for chunk in response.aiter_bytes():
+                            chunks.append(chunk)
+                            size += len(chunk)
+                            if size >= limit:
+                                truncated = True
+                                break
+                        content = b"".join(chunks)[:limit]
+        except httpx.HTTPError:
+            self.errors += 1
+            raise
+        self.bytes_read += len(content)
+        self.truncated += truncated
+        return FetchResult(
+            url=str(response.url),
+            status_code=response.status_code,
+            headers=response.headers,
+            content=content,
+            encoding=response.charset_encoding,
+            truncated=truncated,
+            elapsed_ms=round((time.perf_counter() - started) * 1000, 1),
+        )
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "truncated": self.truncated,
+            "bytes_read": self.bytes_read,
+            "hosts": len(self._host_limits),
+        }
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+_default_fetcher: Optional[HttpFetcher] = None
+
+
+def default_fetcher() -> HttpFetcher:
+    """Process-wide fetcher for callers that are not handed one explicitly"""
+    global _default_fetcher
+    if _default_fetcher is None:
+        _default_fetcher = HttpFetcher()
+    return _default_fetcher
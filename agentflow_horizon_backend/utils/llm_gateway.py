@@ -0,0 +1,198 @@
+"""Async gateway for Gemini calls shared by every FastAPI endpoint"""
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, Optional, Tuple
+
+from utils.resilience import UpstreamGuard
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = os.getenv('GEMINI_MODEL', 'gemini-2.5-flash-lite')
+
+
+def default_model_factory(model_name: str, temperature: float, max_tokens: int):
+    """Build a configured Gemini model object"""
+    import google.generativeai as genai  # deferred: the SDK is slow to import
+    return genai.GenerativeModel(
+        model_name,
+        generation_config=genai.types.GenerationConfig(
+            temperature=temperature,
+            max_output_tokens=max_tokens,
+        )
+    )
+
+
+class LLMGateway:
+    """Runs LLM calls off the event loop with a per-process concurrency limit.
+
+    Model objects are built once per (model, temperature, max_tokens) and reused.
+    Calls go through the model's native async API when it has one, otherwise
+    through a bounded thread pool so a slow upstream never blocks the loop.
+    With a `guard`, every attempt is rate limited and checked against its
+    circuit breaker, and `generate` retries throttled/unavailable errors;
+    streams are not retried once they have started.
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_MODEL,
+        max_concurrency: int = 16,
+        max_workers: Optional[int] = None,
+        prefer_native_async: bool = True,
+        model_factory: Callable = default_model_factory,
+        guard: Optional[UpstreamGuard] = None,
+    ):
+        self.model_name = model_name
+        self.max_concurrency = max_concurrency
+        self.prefer_native_async = prefer_native_async
+        self.model_factory = model_factory
+        self.guard = guard
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or max_concurrency,
+            thread_name_prefix="llm-gateway"
+        )
+        self._models: Dict[Tuple[str, float, int], object] = {}
+        self._models_lock = threading.Lock()
+        self._in_flight = 0
+        self._calls = 0
+        self._errors = 0
+
+    def get_model(self, model_name: str, temperature: float, max_tokens: int):
+        """Return the shared model object for this generation config"""
+        key = (model_name, float(temperature), int(max_tokens))
+        model = self._models.get(key)
+        if model is None:
+            with self._models_lock:
+                model = self._models.get(key)
+                if model is None:
+                    model = self.model_factory(model_name, temperature, max_tokens)
+                    self._models[key] = model
+        return model
+
+    async def generate(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+        model_name: Optional[str] = None,
+    ) -> str:
+        """Generate text for a prompt; raises on upstream errors (after retries, with a guard)"""
+        model = self.get_model(model_name or self.model_name, temperature, max_tokens)
+        if self.guard is not None:
+            return await self.guard.call(lambda: self._generate_once(model, prompt))
+        return await self._generate_once(model, prompt)
+    
+    async def _generate_once(self, model, prompt: str) -> str:
+        # The concurrency slot is held for one attempt, not across retry backoff
+        async with self._semaphore:
+            self._in_flight += 1
+            self._calls += 1
+            try:
+                native = getattr(model, "generate_content_async", None)
+                if self.prefer_native_async and native is not None:
+                    response = await native(prompt)
+                else:
+                    loop = asyncio.get_running_loop()
+                    response = await loop.run_in_executor(
+                        self._executor, model.generate_content, prompt
+                    )
+                return response.text
+            except Exception:
+                self._errors += 1
+                raise
+            finally:
+                self._in_flight -= 1
+
+    async def stream(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+        model_name: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """Yield text chunks as the model produces them; raises on upstream errors.
+
+        The concurrency slot is held until the stream is exhausted or closed.
+        """
+        model = self.get_model(model_name or self.model_name, temperature, max_tokens)
+        if self.guard is not None:
+            await self.guard.admit()
+        try:
+            async with self._semaphore:
+                self._in_flight += 1
+                self._calls += 1
+                try:
+                    native = getattr(model, "generate_content_async", None)
+                    if self.prefer_native_async and native is not None:
+                        response = await native(prompt, stream=True)
+                        async for chunk in response:
+                            if chunk.text:
+                                yield chunk.text
+                    else:
+                        async for text in self._stream_in_executor(model, prompt):
+                            yield text
+                    if self.guard is not None:
+                        self.guard.record_success()
+                except Exception as e:
+                    self._errors += 1
+                    if self.guard is not None:
+                        self.guard.record_failure(e)
+                    raise
+                finally:
+                    self._in_flight -= 1
+        except (asyncio.CancelledError, GeneratorExit):
+            # Also covers a cancel while waiting for the concurrency slot
+            if self.guard is not None:
+                self.guard.breaker.cancel_probe()
+            raise
+
+    async def _stream_in_executor(self, model, prompt: str) -> AsyncIterator[str]:
+        """Drive a blocking streaming call on the pool and hand chunks back to the loop"""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+        cancelled = threading.Event()
+
+        def produce():
+            try:
+                for chunk in model.generate_content(prompt, stream=True):
+                    if cancelled.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, chunk.text)
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+
+        loop.run_in_executor(self._executor, produce)
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                if item:
+                    yield item
+        finally:
+            # A client that disconnects mid-stream stops the producer at its next chunk
+            cancelled.set()
+
+    def stats(self) -> dict:
+        """Gateway counters for health reporting"""
+        return {
+            "model": self.model_name,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self._in_flight,
+            "calls": self._calls,
+            "errors": self._errors,
+            "cached_models": len(self._models),
+            "guard": self.guard.stats() if self.guard is not None else None,
+        }
+
+    def shutdown(self):
+        """Stop the worker threads"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -2,18 +2,23 @@ from emergentintegrations.llm.chat import LlmChat, UserMessage
 import os
 from dotenv import load_dotenv
 from pathlib import Path
+from typing import Optional
+from utils.resilience import CircuitOpenError, UpstreamGuard, default_guard
+from utils.telemetry import observe_llm_sizes, span
 
 ROOT_DIR = Path(__file__).parent.parent
 load_dotenv(ROOT_DIR / '.env')
 
 class GeminiHelper:
-    def __init__(self):
+    def __init__(self, guard: Optional[UpstreamGuard] = None):
         self.api_key = os.environ.get('GEMINI_API_KEY')
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY not found in environment")
+        # Shares the process-wide rate limit and circuit breaker with the server's gateway
+        self.guard = guard or default_guard()
     
     async def call_model(self, prompt: str, system_message: str = "You are a helpful AI assistant.", session_id: str = "default") -> str:
-        """Call Gemini model with the given prompt"""
+        """Call Gemini model with the given prompt; rate limited and retried on 429/5xx"""
         try:
             chat = LlmChat(
                 api_key=self.api_key,
@@ -22,10 +27,14 @@ class GeminiHelper:
             ).with_model("gemini", "gemini-2.0-flash")
             
             user_message = UserMessage(text=prompt)
-            response = await chat.send_message(user_message)
+            with span("llm.call_model"):
+                response = await self.guard.call(lambda: chat.send_message(user_message))
+            observe_llm_sizes("gemini_helper", system_message + prompt, response)
             return response
+        except CircuitOpenError:
+            raise
         except Exception as e:
-            raise Exception(f"Error calling Gemini API: {str(e)}")
+            raise Exception(f"Error calling Gemini API: {str(e)}") from e
     
     async def summarize(self, text: str) -> str:
         """Summarize the given text"""
@@ -0,0 +1,191 @@
+"""Cross-encoder reranking of retrieved chunks under a latency budget"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.telemetry import traced
+
+logger = logging.getLogger(__name__)
+
+# score(query, texts) -> one relevance logit per text
+ScoreFn = Callable[[str, Sequence[str]], np.ndarray]
+
+
+class OnnxCrossEncoder:
+    """A Hugging Face cross-encoder run with onnxruntime on CPU.
+
+    Uses the ONNX export shipped in the model repo (`onnx_file`, e.g. a
+    quantized `onnx/model_qint8_avx2.onnx`) and its `tokenizer.json`, so
+    neither torch nor sentence-transformers is needed. Files are downloaded
+    once into the Hugging Face cache.
+    """
+
+    def __init__(self, model_name: str, onnx_file: str = "onnx/model.onnx", max_length: int = 256,
+                 threads: int = 0):
+        import onnxruntime
+        from huggingface_hub import hf_hub_download
+        from tokenizers import Tokenizer
+
+        self.model_name = model_name
+        self.tokenizer = Tokenizer.from_file(hf_hub_download(model_name, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(
+            hf_hub_download(model_name, onnx_file), options, providers=["CPUExecutionProvider"]
+        )
+        self._inputs = {model_input.name for model_input in self.session.get_inputs()}
+
+    def __call__(self, query: str, texts: Sequence[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch([(query, text) for text in texts])
+        features = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        logits = self.session.run(None, {name: value for name, value in features.items() if name in self._inputs})[0]
+        return np.asarray(logits, dtype=np.float32).reshape(len(texts), -1)[:, 0]
+
+
+class Reranker:
+    """Rescores retrieval candidates with a cross-encoder, or keeps their order.
+
+    All candidates of a query are scored in one batched call on a dedicated
+    worker thread (one at a time, so concurrent requests do not oversubscribe
+    the CPU). If scoring has not finished within `budget_ms` (including time
+    spent queued behind other requests) the hits are returned in their
+    original order; a queued job whose deadline has passed is skipped rather
+    than run. Reranked hits get "rerank_score" (the raw logit) and
+    "relevance" (its sigmoid, 0-1), which callers can use as confidence.
+    """
+
+    def __init__(self, score_fn: ScoreFn, model_name: str, candidates: int = 20, budget_ms: float = 250.0,
+                 max_chars: int = 2000):
+        self.score_fn = score_fn
+        self.model_name = model_name
+        self.candidates = candidates
+        self.budget_ms = budget_ms
+        self.max_chars = max_chars
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reranker")
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.reranked = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.batches = 0
+        self.pairs_scored = 0
+        self.score_ms = 0.0
+
+    def score(self, query: str, texts: Sequence[str]) -> np.ndarray:
+        """Relevance logits for `texts`, in one batched call"""
+        started = time.perf_counter()
+        scores = np.asarray(self.score_fn(query, [text[:self.max_chars] for text in texts]), dtype=np.float32)
+        with self._lock:
+            self.batches += 1
+            self.pairs_scored += len(texts)
+            self.score_ms += (time.perf_counter() - started) * 1000
+        return scores.reshape(-1)
+
+    def _score_before(self, query: str, texts: Sequence[str], deadline: float) -> Optional[np.ndarray]:
+        if time.monotonic() >= deadline:
+            return None
+        return self.score(query, texts)
+
+    @staticmethod
+    def apply(hits: List[dict], scores: np.ndarray) -> List[dict]:
+        """Hits sorted by cross-encoder score; "score" becomes that logit so later stages keep the order"""
+        reranked = []
+        for hit, score in zip(hits, scores.tolist()):
+            relevance = 1.0 / (1.0 + np.exp(-score))
+            reranked.append({**hit, "score": round(score, 4), "rerank_score": round(score, 4),
+                             "relevance": round(float(relevance), 4)})
+        return sorted(reranked, key=lambda hit: hit["rerank_score"], reverse=True)
+
+    def rerank(self, query: str, hits: List[dict]) -> List[dict]:
+        """Synchronous rerank without a budget (batch jobs, benchmarks)"""
+        if not hits:
+            return hits
+        return self.apply(hits, self.score(query, [hit["text"] for hit in hits]))
+
+    @traced("rerank")
+    async def arerank(self, query: str, hits: List[dict], budget_ms: Optional[float] = None) -> Tuple[List[dict], bool]:
+        """(hits, reranked): reranked hits, or the original order if the budget ran out or scoring failed"""
+        if not hits:
+            return hits, False
+        budget = (self.budget_ms if budget_ms is None else budget_ms) / 1000
+        self.calls += 1
+        future = asyncio.get_running_loop().run_in_executor(
+            self._executor, self._score_before, query, [hit["text"] for hit in hits], time.monotonic() + budget
+        )
+        try:
+            scores = await asyncio.wait_for(asyncio.shield(future), budget)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.info(f"Rerank exceeded {budget * 1000:.0f} ms; keeping retrieval order")
+            return hits, False
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Rerank failed ({e}); keeping retrieval order")
+            return hits, False
+        if scores is None:
+            self.timeouts += 1
+            return hits, False
+        self.reranked += 1
+        return self.apply(hits, scores), True
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        return {
+            "model": self.model_name,
+            "candidates": self.candidates,
+            "budget_ms": self.budget_ms,
+            "calls": self.calls,
+            "reranked": self.reranked,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "avg_score_ms": round(self.score_ms / self.batches, 2) if self.batches else None,
+            "pairs_scored": self.pairs_scored,
+        }
+
+
+def confidence_from(hits: Sequence[dict]) -> Optional[float]:
+    """Mean cross-encoder relevance of the hits used, or None if they were not reranked"""
+    relevances = [hit["relevance"] for hit in hits if hit.get("relevance") is not None]
+    return round(sum(relevances) / len(relevances), 2) if relevances else None
+
+
+@lru_cache(maxsize=None)
+def default_reranker() -> Optional[Reranker]:
+    """The process-wide reranker configured by RERANK_* settings, or None when
+    reranking is off (RERANK=false, the default) or the model cannot be loaded"""
+    if os.getenv('RERANK', 'false').lower() != 'true':
+        return None
+    model_name = os.getenv('RERANK_MODEL', 'cross-encoder/ms-marco-MiniLM-L6-v2')
+    try:
+        score_fn = OnnxCrossEncoder(
+            model_name,
+            onnx_file=os.getenv('RERANK_ONNX_FILE', 'onnx/model.onnx'),
+            max_length=int(os.getenv('RERANK_MAX_LENGTH', '256')),
+            threads=int(os.getenv('RERANK_THREADS', '0')),
+        )
+    except Exception as e:
+        logger.warning(f"Reranker {model_name} unavailable ({e}); results keep retrieval order")
+        return None
+    logger.info(f"Loaded reranker {model_name}")
+    return Reranker(
+        score_fn,
+        model_name,
+        candidates=int(os.getenv('RERANK_CANDIDATES', '20')),
+        budget_ms=float(os.getenv('RERANK_BUDGET_MS', '250')),
+    )
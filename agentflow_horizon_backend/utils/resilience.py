@@ -0,0 +1,327 @@
+"""Client-side protection for LLM calls: adaptive rate limit, retries with backoff, circuit breaker"""
+import asyncio
+import logging
+import os
+import random
+import re
+import time
+from functools import lru_cache
+from typing import Awaitable, Callable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+THROTTLED = "throttled"
+UNAVAILABLE = "unavailable"
+FATAL = "fatal"
+
+_THROTTLED_TEXT = re.compile(r"\b429\b|resource.?exhausted|rate.?limit|quota", re.I)
+_UNAVAILABLE_TEXT = re.compile(r"\b(500|502|503|504)\b|unavailable|deadline.?exceeded|timed? ?out|overloaded", re.I)
+# "Please retry in 23.4s", "retry_delay { seconds: 23 }", "retryDelay": "23s"
+_RETRY_DELAY = re.compile(r"retry(?: in|_delay \{ seconds:|Delay\"?: \"?)\s*(\d+(?:\.\d+)?)", re.I)
+
+
+class CircuitOpenError(Exception):
+    """The upstream failed repeatedly; calls are rejected until `retry_after` seconds have passed"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Upstream circuit open; retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+def status_code_of(error: BaseException) -> Optional[int]:
+    """HTTP status of an SDK error (google.api_core `code`, google-genai `code`, httpx-style `status_code`)"""
+    for value in (getattr(error, "code", None), getattr(error, "status_code", None),
+                  getattr(getattr(error, "response", None), "status_code", None)):
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def classify_error(error: BaseException) -> str:
+    """THROTTLED (quota, retry after backing off), UNAVAILABLE (upstream unhealthy, retry) or FATAL"""
+    if isinstance(error, CircuitOpenError):
+        return UNAVAILABLE
+    status = status_code_of(error)
+    if status == 429:
+        return THROTTLED
+    if status is not None:
+        return UNAVAILABLE if status >= 500 or status == 408 else FATAL
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return UNAVAILABLE
+    # Wrapped errors (e.g. from chat libraries) only keep the upstream message
+    text = f"{type(error).__name__} {error}"
+    if _THROTTLED_TEXT.search(text):
+        return THROTTLED
+    if _UNAVAILABLE_TEXT.search(text):
+        return UNAVAILABLE
+    return FATAL
+
+
+def retry_after_of(error: BaseException) -> Optional[float]:
+    """Server-suggested delay in seconds, if the error carries one"""
+    if isinstance(error, CircuitOpenError):
+        return error.retry_after
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    match = _RETRY_DELAY.search(str(error))
+    return float(match.group(1)) if match else None
+
+
+class AdaptiveRateLimiter:
+    """Token bucket whose rate follows the quota the upstream actually grants (AIMD).
+
+    Each success raises the rate so that it grows by about `increase`
+    requests/s per second of traffic, up to `max_rate`. A throttled response
+    multiplies it by `decrease` (down to `min_rate`), at most once per
+    `cooldown` seconds since the 429s of one burst arrive together, empties
+    the bucket and, when the upstream says how long to wait, pauses all
+    callers for that long. The rate therefore saws just under the quota.
+    Retries take tokens like first attempts, so they cannot push traffic over
+    quota.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None, min_rate: float = 0.2,
+                 max_rate: Optional[float] = None, increase: float = 1.0, decrease: float = 0.8,
+                 cooldown: float = 1.0):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self.min_rate = min_rate
+        self.max_rate = max_rate or rate * 4
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self._decreased_at = float("-inf")
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+        self.waited_seconds = 0.0
+        self.throttled = 0
+
+    def _refill(self, now: float):
+        # Nothing accumulates while paused, so a pause does not end in a burst
+        since = max(self._updated, self._paused_until)
+        if now > since:
+            self._tokens = min(self.burst, self._tokens + (now - since) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """Wait for a token; callers are served in arrival order"""
+        started = time.monotonic()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    break
+                else:
+                    await asyncio.sleep((1 - self._tokens) / self.rate)
+        self.waited_seconds += time.monotonic() - started
+
+    def on_success(self):
+        self.rate = min(self.max_rate, self.rate + self.increase / max(self.rate, 1.0))
+
+    def on_throttled(self, retry_after: Optional[float] = None):
+        self.throttled += 1
+        now = time.monotonic()
+        if now - self._decreased_at >= self.cooldown:
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self._decreased_at = now
+        self._tokens = 0.0
+        if retry_after:
+            self._paused_until = max(self._paused_until, now + retry_after)
+
+    def stats(self) -> dict:
+        return {
+            "rate_per_second": round(self.rate, 3),
+            "max_rate_per_second": self.max_rate,
+            "tokens": round(min(self.burst, self._tokens), 2),
+            "paused_seconds": round(max(0.0, self._paused_until - time.monotonic()), 2),
+            "throttled": self.throttled,
+            "waited_seconds": round(self.waited_seconds, 2),
+        }
+
+
+class CircuitBreaker:
+    """closed -> open after `failure_threshold` consecutive upstream failures;
+    after `reset_seconds` one probe call is let through (half-open) and its
+    outcome closes or re-opens the circuit."""
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._probing = False
+
+    def check(self):
+        """Raise CircuitOpenError unless a call may go to the upstream now"""
+        if self.state == "closed":
+            return
+        remaining = self.opened_at + self.reset_seconds - time.monotonic()
+        if self.state == "open" and remaining <= 0:
+            self.state = "half_open"
+        if self.state == "half_open" and not self._probing:
+            self._probing = True
+            return
+        self.rejected += 1
+        raise CircuitOpenError(max(remaining, 1.0))
+
+    def record_success(self):
+        self._probing = False
+        self.consecutive_failures = 0
+        if self.state != "closed":
+            logger.info("LLM circuit closed")
+        self.state = "closed"
+
+    def cancel_probe(self):
+        """The probe call was abandoned before it got an answer"""
+        self._probing = False
+
+    def record_failure(self):
+        self._probing = False
+        self.consecutive_failures += 1
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            if self.state != "open":
+                self.times_opened += 1
+                logger.warning(f"LLM circuit opened after {self.consecutive_failures} consecutive failures")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
+
+
+class UpstreamGuard:
+    """Runs upstream calls through the breaker and limiter, retrying retryable failures.
+
+    Throttled and unavailable errors are retried up to `max_attempts` with
+    full-jitter exponential backoff (`base_delay` doubling up to `max_delay`,
+    or the server's suggested delay when it gives one). Only unavailable
+    errors count against the breaker: a 429 means the upstream is healthy but
+    we are over quota, which the limiter handles. Fatal errors (bad request,
+    auth, safety blocks) are raised at once.
+    """
+
+    def __init__(self, limiter: Optional[AdaptiveRateLimiter] = None, breaker: Optional[CircuitBreaker] = None,
+                 max_attempts: int = 4, base_delay: float = 0.5, max_delay: float = 8.0):
+        self.limiter = limiter
+        self.breaker = breaker or CircuitBreaker()
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.calls = 0
+        self.attempts = 0
+        self.retries = 0
+        self.failures = 0
+
+    async def admit(self):
+        """Breaker check and rate-limit token for one attempt"""
+        self.breaker.check()
+        if self.limiter is not None:
+            try:
+                await self.limiter.acquire()
+            except asyncio.CancelledError:
+                # A half-open probe cancelled while queued for a token must not hold the breaker
+                self.breaker.cancel_probe()
+                raise
+        self.attempts += 1
+
+    def record_success(self):
+        self.breaker.record_success()
+        if self.limiter is not None:
+            self.limiter.on_success()
+
+    def record_failure(self, error: BaseException) -> str:
+        """Update limiter and breaker for a failed attempt; returns its classification"""
+        kind = classify_error(error)
+        if kind == THROTTLED:
+            self.breaker.record_success()
+            if self.limiter is not None:
+                self.limiter.on_throttled(retry_after_of(error))
+        elif kind == UNAVAILABLE:
+            self.breaker.record_failure()
+        else:
+            # The upstream answered; the request itself was bad
+            self.breaker.record_success()
+        return kind
+
+    def backoff(self, attempt: int, error: BaseException) -> float:
+        suggested = retry_after_of(error)
+        if suggested is not None:
+            return min(suggested, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    async def call(self, attempt: Callable[[], Awaitable[T]]) -> T:
+        """Result of `attempt()`, retried as configured; raises the last error or CircuitOpenError"""
+        self.calls += 1
+        for number in range(1, self.max_attempts + 1):
+            await self.admit()
+            try:
+                result = await attempt()
+            except asyncio.CancelledError:
+                self.breaker.cancel_probe()
+                raise
+            except Exception as e:
+                kind = self.record_failure(e)
+                if kind == FATAL or number == self.max_attempts or self.breaker.state == "open":
+                    self.failures += 1
+                    raise
+                self.retries += 1
+                delay = self.backoff(number, e)
+                logger.info(f"LLM call {kind} ({e}); retry {number} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+            self.record_success()
+            return result
+        raise RuntimeError("unreachable")
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "failures": self.failures,
+            "rate_limiter": self.limiter.stats() if self.limiter is not None else None,
+            "circuit_breaker": self.breaker.stats(),
+        }
+
+
+@lru_cache(maxsize=None)
+def default_guard() -> UpstreamGuard:
+    """The process-wide Gemini guard (one quota per API key), configured by LLM_* settings"""
+    rate = float(os.getenv('LLM_RATE_LIMIT_RPS', '10'))
+    limiter = None
+    if rate > 0:
+        limiter = AdaptiveRateLimiter(
+            rate,
+            burst=float(os.getenv('LLM_RATE_LIMIT_BURST', '0')) or None,
+            max_rate=float(os.getenv('LLM_RATE_LIMIT_MAX_RPS', '0')) or None,
+        )
+    return UpstreamGuard(
+        limiter,
+        CircuitBreaker(
+            failure_threshold=int(os.getenv('LLM_BREAKER_FAILURES', '5')),
+            reset_seconds=float(os.getenv('LLM_BREAKER_RESET_SECONDS', '30')),
+        ),
+        max_attempts=int(os.getenv('LLM_RETRY_ATTEMPTS', '4')),
+        base_delay=float(os.getenv('LLM_RETRY_BASE_DELAY', '0.5')),
+        max_delay=float(os.getenv('LLM_RETRY_MAX_DELAY', '8')),
+    )
@@ -0,0 +1,171 @@
+"""Content-addressed cache for LLM responses"""
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(model: str, template: str, temperature: float, max_tokens: int, inputs: dict) -> str:
+    """Hash everything that determines the model output"""
+    payload = json.dumps(
+        [model, template, round(float(temperature), 4), int(max_tokens), inputs],
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryTier:
+    """In-process LRU tier with size and TTL eviction"""
+    name = "memory"
+    blocking = False
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._entries[key] = (value, time.time() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteTier:
+    """On-disk tier that survives restarts.
+
+    The row count is counted once when the tier opens and then kept up to
+    date by `set` and by expiry, so `len()` (read by /api/health) never
+    queries SQLite on the event loop. Expired rows are deleted when a `get`
+    finds one and by a sweep that `set` runs every `sweep_seconds`.
+    """
+    name = "sqlite"
+    blocking = True
+
+    def __init__(self, path: str, ttl_seconds: float = 86400, sweep_seconds: float = 600):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.sweep_seconds = sweep_seconds
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("DELETE FROM response_cache WHERE expires_at < ?", (time.time(),))
+        self._conn.commit()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+        self._swept_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM response_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < time.time():
+                deleted = self._conn.execute("DELETE FROM response_cache WHERE key = ?", (key,)).rowcount
+                self._conn.commit()
+                self._count -= deleted
+                return None
+        return row[0]
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            exists = self._conn.execute("SELECT 1 FROM response_cache WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + self.ttl_seconds)
+            )
+            self._count += exists is None
+            if time.monotonic() - self._swept_at >= self.sweep_seconds:
+                self._count -= self._conn.execute(
+                    "DELETE FROM response_cache WHERE expires_at < ?", (time.time(),)
+                ).rowcount
+                self._swept_at = time.monotonic()
+            self._conn.commit()
+
+    def __len__(self):
+        return self._count
+
+
+class ResponseCache:
+    """Looks keys up tier by tier and promotes lower-tier hits upward.
+
+    A tier is any object with `get`, `set`, `name` and `blocking`; blocking
+    tiers are consulted on a worker thread.
+    """
+
+    def __init__(self, tiers: List):
+        self.tiers = tiers
+        self.hits = {tier.name: 0 for tier in tiers}
+        self.misses = 0
+
+    async def _call(self, tier, method: str, *args):
+        if tier.blocking:
+            return await asyncio.to_thread(getattr(tier, method), *args)
+        return getattr(tier, method)(*args)
+
+    async def get(self, key: str) -> Optional[str]:
+        for index, tier in enumerate(self.tiers):
+            try:
+                value = await self._call(tier, "get", key)
+            except Exception as e:
+                logger.warning(f"Response cache tier {tier.name} read failed: {e}")
+                continue
+            if value is not None:
+                self.hits[tier.name] += 1
+                for upper in self.tiers[:index]:
+                    await self._call(upper, "set", key, value)
+                return value
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: str):
+        for tier in self.tiers:
+            try:
+                await self._call(tier, "set", key, value)
+            except Exception as e:
+                logger.warning(f"Response cache tier {tier.name} write failed: {e}")
+
+    def stats(self) -> dict:
+        total_hits = sum(self.hits.values())
+        lookups = total_hits + self.misses
+        return {
+            "hits": total_hits,
+            "misses": self.misses,
+            "hit_ratio": round(total_hits / lookups, 4) if lookups else 0.0,
+            "tiers": {
+                tier.name: {"hits": self.hits[tier.name], "entries": len(tier)}
+                for tier in self.tiers
+            },
+        }
@@ -0,0 +1,118 @@
+"""Answer cache keyed by question embedding, scoped to a corpus version"""
+import logging
+import re
+import threading
+import time
+from typing import List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Numbers and codes ("ZR-17", "2024", "v2") must match exactly: embeddings of
+# questions that differ only in them are nearly identical
+_KEY_TERMS = re.compile(r"[\w\-.]*\d[\w\-.]*")
+
+
+def key_terms(text: str) -> frozenset:
+    return frozenset(term.strip(".-").lower() for term in _KEY_TERMS.findall(text))
+
+
+class SemanticCache:
+    """Returns a stored result when a new question is a close paraphrase of an answered one.
+
+    Entries live in a fixed-size ring of normalized question embeddings (sized
+    on the first store); a lookup is one matrix-vector product over the
+    entries of the same `namespace` (endpoint, model, document scope). A hit
+    needs cosine similarity >= `threshold`, the same numbers/codes in both
+    questions, an unexpired entry and the current corpus version.
+    `bump_version` (called when documents are uploaded or finish indexing)
+    drops every entry, and results computed against an older version are not
+    stored.
+    """
+
+    def __init__(self, threshold: float = 0.9, max_entries: int = 2000, ttl_seconds: float = 3600):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._vectors: Optional[np.ndarray] = None
+        self._entries: List[Optional[dict]] = [None] * max_entries
+        self._next = 0
+        self._lock = threading.Lock()
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.saved_ms = 0.0
+
+    def bump_version(self) -> int:
+        """Start a new corpus version; cached answers from older versions are dropped"""
+        with self._lock:
+            self.version += 1
+            self._entries = [None] * self.max_entries
+            self._next = 0
+            return self.version
+
+    def lookup(self, namespace: str, question: str, embedding: np.ndarray) -> Optional[dict]:
+        """Best matching entry {"question", "result", "similarity", "latency_ms", "version"}, or None"""
+        query = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        terms = key_terms(question)
+        now = time.time()
+        with self._lock:
+            candidates = [
+                slot for slot, entry in enumerate(self._entries)
+                if entry is not None and entry["namespace"] == namespace and entry["expires_at"] > now
+                and entry["terms"] == terms
+            ]
+            best = None
+            if candidates and self._vectors is not None:
+                similarities = self._vectors[candidates] @ query
+                index = int(np.argmax(similarities))
+                if similarities[index] >= self.threshold:
+                    best = {**self._entries[candidates[index]], "similarity": round(float(similarities[index]), 4)}
+            if best is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.saved_ms += best["latency_ms"]
+            return best
+
+    def store(self, namespace: str, question: str, embedding: np.ndarray, result: dict, latency_ms: float,
+              version: int):
+        """Remember `result` unless the corpus changed since `version` was read"""
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        with self._lock:
+            if version != self.version:
+                return
+            if self._vectors is None or self._vectors.shape[1] != vector.size:
+                self._vectors = np.zeros((self.max_entries, vector.size), dtype=np.float32)
+                self._entries = [None] * self.max_entries
+            slot = self._next
+            self._next = (self._next + 1) % self.max_entries
+            self._vectors[slot] = vector
+            self._entries[slot] = {
+                "namespace": namespace,
+                "question": question,
+                "terms": key_terms(question),
+                "result": result,
+                "latency_ms": round(latency_ms, 1),
+                "version": version,
+                "expires_at": time.time() + self.ttl_seconds,
+            }
+            self.stored += 1
+
+    def __len__(self):
+        return sum(entry is not None for entry in self._entries)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "corpus_version": self.version,
+            "entries": len(self),
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "saved_ms": round(self.saved_ms, 1),
+            "avg_saved_ms": round(self.saved_ms / self.hits, 1) if self.hits else None,
+        }
@@ -0,0 +1,168 @@
+"""Process-wide registry of heavy services with lazy init and background warm-up"""
+import asyncio
+import importlib
+import inspect
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ServiceEntry:
+    name: str
+    factory: Callable[[], Any]
+    imports: Sequence[str] = ()
+    warm: bool = False
+    required: bool = True
+    close: Optional[Callable[[Any], Any]] = None
+    instance: Any = None
+    status: str = "pending"
+    import_seconds: float = 0.0
+    init_seconds: float = 0.0
+    error: Optional[str] = None
+    failed_at: float = 0.0
+    lock: threading.RLock = field(default_factory=threading.RLock)
+
+
+class ServiceRegistry:
+    """Creates each registered service at most once per process.
+
+    Services are built on first `get`/`aget`, or ahead of time by `warm_up`
+    for those registered with `warm=True`. A failed factory leaves the service
+    as None (callers fall back to degraded behaviour) and records the error;
+    the next `get` after `retry_seconds` tries again. Modules listed in
+    `imports` are imported first so the startup report can separate import
+    cost from init cost.
+    """
+
+    def __init__(self, started_at: Optional[float] = None, retry_seconds: float = 30.0):
+        self._services: Dict[str, ServiceEntry] = {}
+        self.started_at = started_at or time.perf_counter()
+        self.retry_seconds = retry_seconds
+        self.timings: Dict[str, float] = {}
+        self._warmup_task: Optional[asyncio.Task] = None
+
+    def register(self, name: str, factory: Callable[[], Any], imports: Sequence[str] = (), warm: bool = False,
+                 required: bool = True, close: Optional[Callable[[Any], Any]] = None):
+        self._services[name] = ServiceEntry(name, factory, tuple(imports), warm, required, close)
+
+    def record(self, phase: str, seconds: float):
+        """Record a startup phase (e.g. module imports) for the startup report"""
+        self.timings[phase] = round(seconds, 4)
+
+    def _settled(self, entry: ServiceEntry) -> bool:
+        if entry.status == "failed":
+            return time.perf_counter() - entry.failed_at < self.retry_seconds
+        return entry.status == "ready"
+
+    def get(self, name: str) -> Any:
+        entry = self._services[name]
+        if self._settled(entry):
+            return entry.instance
+        with entry.lock:
+            if self._settled(entry):
+                return entry.instance
+            entry.status = "loading"
+            try:
+                started = time.perf_counter()
+                for module in entry.imports:
+                    importlib.import_module(module)
+                entry.import_seconds = round(time.perf_counter() - started, 4)
+                started = time.perf_counter()
+                entry.instance = entry.factory()
+                entry.init_seconds = round(time.perf_counter() - started, 4)
+                entry.status = "ready"
+                entry.error = None
+                logger.info(f"Service {name} ready in {entry.import_seconds + entry.init_seconds:.2f}s")
+            except Exception as e:
+                entry.instance = None
+                entry.error = str(e)
+                entry.status = "failed"
+                entry.failed_at = time.perf_counter()
+                logger.warning(f"Service {name} failed to initialize: {e}")
+            return entry.instance
+
+    async def aget(self, name: str) -> Any:
+        """Like `get`, but builds the service on a worker thread if it is not ready yet"""
+        entry = self._services[name]
+        if self._settled(entry):
+            return entry.instance
+        return await asyncio.to_thread(self.get, name)
+
+    def peek(self, name: str) -> Any:
+        """Return the instance if it is already built, without triggering init"""
+        entry = self._services[name]
+        return entry.instance if entry.status == "ready" else None
+
+    def _import_all(self):
+        """Import every service's modules in order on one thread.
+
+        Factories pull in their dependencies' modules too; two threads importing
+        the same package at once can hit the import lock's deadlock detection.
+        """
+        for entry in self._services.values():
+            for module in entry.imports:
+                importlib.import_module(module)
+
+    async def warm_up(self):
+        started = time.perf_counter()
+        names = [name for name, entry in self._services.items() if entry.warm]
+        try:
+            await asyncio.to_thread(self._import_all)
+        except Exception as e:
+            # The failing service reports the same error when it is built
+            logger.warning(f"Service imports failed: {e}")
+        self.record("warm_up_imports", time.perf_counter() - started)
+        await asyncio.gather(*(self.aget(name) for name in names))
+        self.record("warm_up", time.perf_counter() - started)
+        self.record("time_to_ready", time.perf_counter() - self.started_at)
+
+    def start_warm_up(self) -> asyncio.Task:
+        self._warmup_task = asyncio.create_task(self.warm_up(), name="service-warm-up")
+        return self._warmup_task
+
+    def is_ready(self) -> bool:
+        for entry in self._services.values():
+            if entry.required and entry.warm and entry.status != "ready":
+                return False
+            if entry.warm and entry.status in ("pending", "loading"):
+                return False
+        return True
+
+    def status(self) -> dict:
+        return {
+            name: {"status": entry.status, **({"error": entry.error} if entry.error else {})}
+            for name, entry in self._services.items()
+        }
+
+    def report(self) -> dict:
+        return {
+            "phases": self.timings,
+            "services": {
+                name: {
+                    "status": entry.status,
+                    "warm": entry.warm,
+                    "import_seconds": entry.import_seconds,
+                    "init_seconds": entry.init_seconds,
+                }
+                for name, entry in self._services.items()
+            },
+        }
+
+    async def close_all(self):
+        """Close built services in reverse registration order"""
+        if self._warmup_task and not self._warmup_task.done():
+            self._warmup_task.cancel()
+        for entry in reversed(list(self._services.values())):
+            if entry.close is None or entry.status != "ready":
+                continue
+            try:
+                result = entry.close(entry.instance)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.warning(f"Error closing service {entry.name}: {e}")
@@ -0,0 +1,86 @@
+"""Coalesces concurrent identical async calls onto one in-flight task"""
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def flight_key(*parts: Any) -> str:
+    """Canonical key for a call: a hash of its JSON-encoded arguments"""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """While a call for `key` is running, further calls with that key await it.
+
+    The first caller's coroutine runs as a task; every caller (including the
+    first) waits on it through `asyncio.shield`, so one caller being cancelled
+    (e.g. a client disconnecting) does not cancel the others. The task itself
+    is cancelled only when its last waiter goes away. Results and exceptions
+    are delivered to every waiter and nothing is kept once the call finishes,
+    so a failure is retried by the next caller. Waiters receive the same
+    result object and must not mutate it.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: Dict[str, _Flight] = {}
+        self.calls = 0
+        self.executed = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    def _forget(self, key: str, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def _finished(self, key: str, flight: _Flight, task: asyncio.Task):
+        self._forget(key, flight)
+        if not task.cancelled() and task.exception() is not None:
+            self.errors += 1
+
+    async def run(self, key: str, call: Callable[[], Awaitable[T]]) -> T:
+        """Result of `call()`, shared with concurrent callers using the same key"""
+        self.calls += 1
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(call()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda task: self._finished(key, flight, task))
+            self.executed += 1
+        else:
+            self.coalesced += 1
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                # Nobody else is waiting: stop the upstream call and let the next caller start afresh
+                self._forget(key, flight)
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "in_flight": len(self._flights),
+        }
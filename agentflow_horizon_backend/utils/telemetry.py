@@ -0,0 +1,459 @@
+"""Prometheus-format metrics and span timing for the request pipeline"""
+import contextvars
+import functools
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    """Cumulative-bucket histogram, one series per label combination"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # per-bucket counts, then sum and count
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = []
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        for key, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                labels = _label_text(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _label_text(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {values[-1]}")
+            lines.append(f"{self.name}_sum{_label_text(self.labelnames, key)} {_format_value(values[-2])}")
+            lines.append(f"{self.name}_count{_label_text(self.labelnames, key)} {values[-1]}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter, one series per label combination"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_label_text(self.labelnames, key)} {_format_value(value)}" for key, value in values]
+
+
+class Gauge(Counter):
+    """Value that goes up and down (e.g. requests in progress)"""
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+
+class CallbackMetric:
+    """Gauge or counter read from existing state at scrape time.
+
+    `read()` returns a number, or {label value(s): number} for labelled
+    series; returning None skips the metric (e.g. a service not started yet).
+    """
+
+    def __init__(self, name: str, documentation: str, read: Callable, labelnames: Sequence[str] = (),
+                 kind: str = "gauge"):
+        self.name = name
+        self.documentation = documentation
+        self.read = read
+        self.labelnames = tuple(labelnames)
+        self.kind = kind
+
+    def render(self) -> List[str]:
+        try:
+            value = self.read()
+        except Exception as e:
+            logger.warning(f"Metric {self.name} could not be read: {e}")
+            return []
+        if value is None:
+            return []
+        if not isinstance(value, dict):
+            return [f"{self.name} {_format_value(value)}"]
+        lines = []
+        for key, number in sorted(value.items(), key=lambda item: str(item[0])):
+            if number is None:
+                continue
+            key = key if isinstance(key, tuple) else (key,)
+            lines.append(f"{self.name}{_label_text(self.labelnames, key)} {_format_value(number)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics rendered together in the Prometheus text exposition format (0.0.4)"""
+
+    def __init__(self):
+        self._metrics: "OrderedDict[str, object]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric):
+                    raise ValueError(f"Metric {metric.name} is already registered as a {existing.kind}")
+                # Re-registering (e.g. a module reloaded in tests) keeps the collected data
+                if isinstance(metric, CallbackMetric):
+                    existing.read = metric.read
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def callback(self, name: str, documentation: str, read: Callable, labelnames: Sequence[str] = (),
+                 kind: str = "gauge") -> CallbackMetric:
+        return self._register(CallbackMetric(name, documentation, read, labelnames, kind))
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            body = metric.render()
+            if not body:
+                continue
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(body)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_LATENCY = REGISTRY.histogram(
+    "agentflow_http_request_duration_seconds",
+    "Time from request start until the response body was sent, by route template",
+    ("method", "route", "status"),
+)
+HTTP_IN_PROGRESS = REGISTRY.gauge("agentflow_http_requests_in_progress", "Requests being handled")
+STAGE_LATENCY = REGISTRY.histogram(
+    "agentflow_stage_duration_seconds",
+    "Time spent in one pipeline stage (Chroma query, embedding, scraping, PDF extraction, Gemini, ...)",
+    ("stage",),
+)
+STAGE_ERRORS = REGISTRY.counter(
+    "agentflow_stage_errors_total", "Pipeline stages that ended with an exception", ("stage",),
+)
+LLM_PROMPT_CHARS = REGISTRY.histogram(
+    "agentflow_llm_prompt_chars", "Characters sent to the LLM per upstream call", ("caller",), SIZE_BUCKETS,
+)
+LLM_RESPONSE_CHARS = REGISTRY.histogram(
+    "agentflow_llm_response_chars", "Characters received from the LLM per upstream call", ("caller",), SIZE_BUCKETS,
+)
+
+
+def observe_llm_sizes(caller: str, prompt: str, response: Optional[str]):
+    """Record prompt and response sizes of one upstream LLM call"""
+    LLM_PROMPT_CHARS.observe(len(prompt), caller=caller)
+    if response is not None:
+        LLM_RESPONSE_CHARS.observe(len(response), caller=caller)
+
+
+class Span:
+    __slots__ = ("name", "span_id", "parent_id", "started", "ended", "attributes")
+
+    def __init__(self, name: str, parent_id: Optional[int], attributes: dict):
+        self.name = name
+        self.span_id = id(self)
+        self.parent_id = parent_id
+        self.started = time.perf_counter()
+        self.ended: Optional[float] = None
+        self.attributes = attributes
+
+
+class Trace:
+    """The spans of one request (or one research call), for a stage-by-stage breakdown"""
+
+    def __init__(self, name: str, trace_id: Optional[str] = None):
+        self.name = name
+        self.trace_id = trace_id or uuid.uuid4().hex[:16]
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.ended: Optional[float] = None
+        self.attributes: dict = {}
+        self.spans: List[Span] = []
+
+    @property
+    def duration_ms(self) -> float:
+        return round(((self.ended or time.perf_counter()) - self.started) * 1000, 1)
+
+    def stages_ms(self) -> Dict[str, float]:
+        """Total time per stage name (concurrent spans of one stage add up)"""
+        totals: Dict[str, float] = {}
+        for span in list(self.spans):
+            if span.ended is not None:
+                totals[span.name] = round(totals.get(span.name, 0.0) + (span.ended - span.started) * 1000, 1)
+        return totals
+
+    def to_dict(self) -> dict:
+        spans = sorted(list(self.spans), key=lambda span: span.started)
+        known = {span.span_id for span in spans}
+        children: Dict[Optional[int], List[Span]] = {}
+        for span in spans:
+            children.setdefault(span.parent_id if span.parent_id in known else None, []).append(span)
+        # Depth-first, so each span is followed by its own children even when siblings overlap
+        rendered = []
+        stack = [(span, 0) for span in reversed(children.get(None, []))]
+        while stack:
+            span, depth = stack.pop()
+            rendered.append({
+                "name": span.name,
+                "depth": depth,
+                "start_ms": round((span.started - self.started) * 1000, 1),
+                "duration_ms": round(((span.ended or time.perf_counter()) - span.started) * 1000, 1),
+                **({"attributes": span.attributes} if span.attributes else {}),
+            })
+            stack.extend((child, depth + 1) for child in reversed(children.get(span.span_id, [])))
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            **self.attributes,
+            "stages_ms": self.stages_ms(),
+            "spans": rendered,
+        }
+
+
+_trace: contextvars.ContextVar = contextvars.ContextVar("agentflow_trace", default=None)
+_span: contextvars.ContextVar = contextvars.ContextVar("agentflow_span", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _trace.get()
+
+
+@contextmanager
+def span(stage: str, **attributes) -> Iterator[Span]:
+    """Time a stage: always into the stage histogram, and into the current trace if there is one.
+
+    Works in sync and async code (including threads started with
+    asyncio.to_thread, which copy the context). The yielded span's
+    `attributes` can be filled in while it runs.
+    """
+    trace = _trace.get()
+    parent = _span.get()
+    current = Span(stage, parent.span_id if parent is not None else None, attributes)
+    token = _span.set(current) if trace is not None else None
+    try:
+        yield current
+    except BaseException as e:
+        current.attributes["error"] = type(e).__name__
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        current.ended = time.perf_counter()
+        STAGE_LATENCY.observe(current.ended - current.started, stage=stage)
+        if trace is not None:
+            trace.spans.append(current)
+            _span.reset(token)
+
+
+def record_stage(stage: str, started: float, **attributes):
+    """Record a stage that began at perf_counter() `started` and just ended.
+
+    For work that cannot sit inside a `with span(...)` block, such as a
+    streaming generator that yields to its consumer between chunks.
+    """
+    current = Span(stage, None, attributes)
+    current.started, current.ended = started, time.perf_counter()
+    parent = _span.get()
+    current.parent_id = parent.span_id if parent is not None else None
+    STAGE_LATENCY.observe(current.ended - started, stage=stage)
+    trace = _trace.get()
+    if trace is not None:
+        trace.spans.append(current)
+
+
+def traced(stage: str):
+    """Decorator: run an async function inside `span(stage)`"""
+    def decorate(function):
+        @functools.wraps(function)
+        async def wrapper(*args, **kwargs):
+            with span(stage):
+                return await function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class TraceStore:
+    """The most recent finished traces that recorded at least one span"""
+
+    def __init__(self, max_traces: int = 200, slow_ms: float = 0.0):
+        self.max_traces = max_traces
+        self.slow_ms = slow_ms
+        self._traces: "OrderedDict[str, Trace]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, trace: Trace):
+        if not trace.spans or self.max_traces <= 0:
+            return
+        with self._lock:
+            self._traces[trace.trace_id] = trace
+            while len(self._traces) > self.max_traces:
+                self._traces.popitem(last=False)
+        if self.slow_ms and trace.duration_ms >= self.slow_ms:
+            stages = ", ".join(f"{name}={ms}ms" for name, ms in
+                               sorted(trace.stages_ms().items(), key=lambda item: -item[1]))
+            logger.warning(f"Slow request {trace.name} ({trace.trace_id}) took {trace.duration_ms}ms: {stages}")
+
+    def get(self, trace_id: str) -> Optional[Trace]:
+        return self._traces.get(trace_id)
+
+    def recent(self, min_ms: float = 0.0, limit: int = 20) -> List[Trace]:
+        with self._lock:
+            traces = list(self._traces.values())
+        return [trace for trace in reversed(traces) if trace.duration_ms >= min_ms][:limit]
+
+
+TRACES = TraceStore(
+    max_traces=int(os.getenv('TRACE_BUFFER', '200')),
+    slow_ms=float(os.getenv('TRACE_SLOW_MS', '5000')),
+)
+
+
+@contextmanager
+def start_trace(name: str, store: Optional[TraceStore] = TRACES,
+                inherit: bool = True) -> Iterator[Tuple[Trace, bool]]:
+    """Yield (trace, owned): the current trace if there is one (and `inherit`), otherwise a
+    new trace that is finished and kept in `store` when the block exits.
+
+    Background work started from a request (e.g. document ingestion) passes
+    `inherit=False` so it gets a trace of its own.
+    """
+    existing = _trace.get()
+    if existing is not None and inherit:
+        yield existing, False
+        return
+    trace = Trace(name)
+    token = _trace.set(trace)
+    span_token = _span.set(None)
+    try:
+        yield trace, True
+    finally:
+        trace.ended = time.perf_counter()
+        _span.reset(span_token)
+        _trace.reset(token)
+        if store is not None:
+            store.add(trace)
+
+
+class TelemetryMiddleware:
+    """ASGI middleware: per-route latency histogram and one trace per HTTP request.
+
+    The route label is the matched path template ("/api/documents/{doc_id}"),
+    or "unmatched" for 404s, so label cardinality stays bounded. Latency runs
+    until the endpoint returned and, for streaming responses, the last chunk
+    was sent. The trace id is returned in `X-Trace-Id` and the stages that
+    finished before the headers were sent in `Server-Timing`.
+    """
+
+    def __init__(self, app, store: Optional[TraceStore] = TRACES):
+        self.app = app
+        self.store = store
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = {"code": 500}
+        started = time.perf_counter()
+        with start_trace(f"{scope['method']} {scope['path']}", self.store) as (trace, _):
+            async def send_with_trace(message):
+                if message["type"] == "http.response.start":
+                    status["code"] = message["status"]
+                    timing = ", ".join(
+                        f"{name};dur={ms}" for name, ms in trace.stages_ms().items()
+                    )
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-trace-id", trace.trace_id.encode("latin-1")))
+                    if timing:
+                        headers.append((b"server-timing", timing.encode("latin-1")))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            HTTP_IN_PROGRESS.inc()
+            try:
+                await self.app(scope, receive, send_with_trace)
+            finally:
+                HTTP_IN_PROGRESS.dec()
+                route = scope.get("route")
+                route_path = getattr(route, "path", None) or "unmatched"
+                trace.name = f"{scope['method']} {route_path}"
+                trace.attributes["status"] = status["code"]
+                HTTP_LATENCY.observe(time.perf_counter() - started, method=scope["method"],
+                                     route=route_path, status=status["code"])
@@ -0,0 +1,198 @@
+"""Sentence- and paragraph-aware text chunking with a token budget"""
+import re
+from dataclasses import dataclass
+from typing import Callable, Iterable, List
+
+from utils.token_counter import estimate_tokens
+
+PARAGRAPH_BREAK = re.compile(r'\n[ \t\r\f\v]*\n\s*')
+# Group 1 is the whitespace after sentence-final punctuation (and closing quotes/brackets)
+SENTENCE_BREAK = re.compile(r'[.!?]["\')\]]*(\s+)')
+LEADING_PARAGRAPH_BREAK = re.compile(r'\s*\n[ \t\r\f\v]*\n')
+
+# Hold back at most this much text when no boundary is found in a streamed block
+MAX_PENDING_CHARS = 1024 * 1024
+
+
+@dataclass
+class Chunk:
+    text: str
+    start: int
+    end: int
+    token_count: int
+    index: int
+
+    def metadata(self) -> dict:
+        return {
+            "chunk_id": self.index,
+            "start_char": self.start,
+            "end_char": self.end,
+            "token_count": self.token_count,
+        }
+
+
+@dataclass(slots=True)
+class _Unit:
+    text: str
+    start: int
+    end: int
+    tokens: int
+    new_paragraph: bool
+
+
+class TextChunker:
+    """Packs whole sentences into chunks of at most `max_tokens`.
+
+    Chunks close early at a paragraph boundary once they are `min_fill` full,
+    and each chunk repeats up to `overlap_tokens` of trailing sentences from
+    the previous one. Sentences longer than the budget are split on words.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 256,
+        overlap_tokens: int = 32,
+        min_fill: float = 0.6,
+        token_counter: Callable[[str], int] = estimate_tokens,
+    ):
+        if overlap_tokens >= max_tokens:
+            raise ValueError("overlap_tokens must be smaller than max_tokens")
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.min_fill = min_fill
+        self.count_tokens = token_counter
+
+    def chunk(self, text: str) -> List[Chunk]:
+        stream = self.stream()
+        return stream.feed(text) + stream.close()
+
+    def chunk_blocks(self, blocks: Iterable[str]) -> Iterable[Chunk]:
+        stream = self.stream()
+        for block in blocks:
+            yield from stream.feed(block)
+        yield from stream.close()
+
+    def stream(self) -> "ChunkStream":
+        """Incremental chunker for text that arrives in blocks (pages, file reads)"""
+        return ChunkStream(self)
+
+
+class ChunkStream:
+    def __init__(self, chunker: TextChunker):
+        self.chunker = chunker
+        self._pending = ""
+        self._pending_start = 0
+        self._units: List[_Unit] = []
+        self._tokens = 0
+        self._index = 0
+
+    def feed(self, block: str) -> List[Chunk]:
+        """Add text; returns the chunks that are complete so far"""
+        self._pending += block
+        cut = self._pending.rfind("\n\n")
+        if cut <= 0:
+            match = None
+            for match in SENTENCE_BREAK.finditer(self._pending, max(0, len(self._pending) - 4096)):
+                pass
+            cut = match.start(1) if match else -1
+        if cut <= 0:
+            if len(self._pending) < MAX_PENDING_CHARS:
+                return []
+            cut = len(self._pending)
+        ready, self._pending = self._pending[:cut], self._pending[cut:]
+        base, self._pending_start = self._pending_start, self._pending_start + cut
+        return self._consume(ready, base)
+
+    def close(self) -> List[Chunk]:
+        """Flush remaining text and the final partial chunk"""
+        chunks = self._consume(self._pending, self._pending_start)
+        self._pending_start += len(self._pending)
+        self._pending = ""
+        if self._units:
+            chunks.append(self._emit())
+        return chunks
+
+    def _consume(self, text: str, base: int) -> List[Chunk]:
+        chunks: List[Chunk] = []
+        count = self.chunker.count_tokens
+        new_paragraph = base == 0 or LEADING_PARAGRAPH_BREAK.match(text) is not None
+        position = 0
+        for boundary in (*PARAGRAPH_BREAK.finditer(text), None):
+            paragraph_end = boundary.start() if boundary else len(text)
+            sentence_start = position
+            for sentence in (*SENTENCE_BREAK.finditer(text, position, paragraph_end), None):
+                sentence_end = sentence.start(1) if sentence else paragraph_end
+                raw = text[sentence_start:sentence_end]
+                stripped = raw.strip()
+                if stripped:
+                    start = base + sentence_start + (len(raw) - len(raw.lstrip()))
+                    unit = _Unit(stripped, start, start + len(stripped), count(stripped), new_paragraph)
+                    self._add(unit, chunks)
+                    new_paragraph = False
+                if sentence:
+                    sentence_start = sentence.end()
+            if boundary:
+                position = boundary.end()
+                new_paragraph = True
+        return chunks
+
+    def _add(self, unit: _Unit, chunks: List[Chunk]):
+        chunker = self.chunker
+        if unit.tokens > chunker.max_tokens:
+            for piece in self._split_long(unit):
+                self._add(piece, chunks)
+            return
+        if self._units:
+            over_budget = self._tokens + unit.tokens > chunker.max_tokens
+            paragraph_stop = unit.new_paragraph and self._tokens >= chunker.min_fill * chunker.max_tokens
+            if over_budget or paragraph_stop:
+                chunks.append(self._emit())
+                self._carry_overlap(unit.tokens)
+        self._units.append(unit)
+        self._tokens += unit.tokens
+
+    def _split_long(self, unit: _Unit) -> List[_Unit]:
+        pieces: List[_Unit] = []
+        budget_chars = max(1, len(unit.text) * self.chunker.max_tokens // unit.tokens)
+        offset = 0
+        while offset < len(unit.text):
+            end = min(len(unit.text), offset + budget_chars)
+            if end < len(unit.text):
+                space = unit.text.rfind(" ", offset, end)
+                if space > offset:
+                    end = space
+            text = unit.text[offset:end].strip()
+            if text:
+                start = unit.start + offset
+                pieces.append(_Unit(text, start, start + len(text), self.chunker.count_tokens(text),
+                                    unit.new_paragraph and not pieces))
+            offset = end + 1 if end < len(unit.text) and unit.text[end] == " " else end
+        return pieces
+
+    def _carry_overlap(self, incoming_tokens: int):
+        carried: List[_Unit] = []
+        tokens = 0
+        limit = min(self.chunker.overlap_tokens, self.chunker.max_tokens - incoming_tokens)
+        for unit in reversed(self._units):
+            if tokens + unit.tokens > limit:
+                break
+            carried.insert(0, unit)
+            tokens += unit.tokens
+        self._units[:] = carried
+        self._tokens = tokens
+
+    def _emit(self) -> Chunk:
+        parts = [self._units[0].text]
+        for unit in self._units[1:]:
+            parts.append("\n\n" if unit.new_paragraph else " ")
+            parts.append(unit.text)
+        text = "".join(parts)
+        chunk = Chunk(
+            text=text,
+            start=self._units[0].start,
+            end=self._units[-1].end,
+            token_count=self._tokens,
+            index=self._index,
+        )
+        self._index += 1
+        return chunk
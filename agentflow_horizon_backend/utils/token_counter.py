@@ -0,0 +1,79 @@
+"""Prompt token counting per model: Gemini's local tokenizer, or a close offline estimate"""
+import logging
+import math
+import os
+import re
+import threading
+from functools import lru_cache
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+TokenCounter = Callable[[str], int]
+
+# Gemma/Gemini SentencePiece vocabularies split numbers into single digits and
+# keep most whole words; long or rare words break into several pieces
+_PIECES = re.compile(r"\d|[^\W\d_]+|[^\w\s]|_")
+# ASCII fast path: letters map to "a" and everything else to a space, so
+# splitting the result gives the words; \s in _PIECES also matches \x1c-\x1f
+_ASCII_LETTERS = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+_ASCII_TO_WORDS = bytes(ord("a") if byte in _ASCII_LETTERS else ord(" ") for byte in range(256))
+_ASCII_NOT_PIECES = _ASCII_LETTERS + b" \t\n\r\f\v\x1c\x1d\x1e\x1f"
+
+
+def estimate_tokens(text: str) -> int:
+    """Offline approximation of Gemini token counts (digits, words, punctuation).
+
+    Also the chunker's budget measure, so ASCII text takes a regex-free path
+    with the same result: every byte that is not a letter or whitespace is a
+    piece of its own.
+    """
+    if text.isascii():
+        data = text.encode("ascii")
+        words = data.translate(_ASCII_TO_WORDS).split()
+        count = len(words) + len(data.translate(None, _ASCII_NOT_PIECES))
+        for word in words:
+            if len(word) > 7:
+                count += (len(word) - 1) // 7
+        return count
+    count = 0
+    for piece in _PIECES.findall(text):
+        if len(piece) == 1:
+            count += 1
+        else:
+            count += max(1, math.ceil(len(piece) / 7))
+    return count
+
+
+class LocalGeminiCounter:
+    """Exact counts from google-genai's LocalTokenizer (needs `sentencepiece`;
+    the tokenizer model is downloaded once and cached by the SDK)"""
+
+    def __init__(self, model_name: str):
+        from google.genai.local_tokenizer import LocalTokenizer
+        self.model_name = model_name
+        self._tokenizer = LocalTokenizer(model_name=model_name)
+        self._lock = threading.Lock()
+
+    def __call__(self, text: str) -> int:
+        if not text:
+            return 0
+        with self._lock:
+            return self._tokenizer.count_tokens(text).total_tokens
+
+
+@lru_cache(maxsize=None)
+def token_counter_for(model_name: str) -> TokenCounter:
+    """Counter for `model_name`. TOKEN_COUNTER=local requires the local tokenizer,
+    `estimate` never loads it, and `auto` (default) uses it when it is available."""
+    mode = os.getenv('TOKEN_COUNTER', 'auto').lower()
+    if mode != "estimate":
+        try:
+            counter = LocalGeminiCounter(model_name)
+            logger.info(f"Using the local Gemini tokenizer for {model_name}")
+            return counter
+        except Exception as e:
+            if mode == "local":
+                raise
+            logger.info(f"Local tokenizer unavailable for {model_name} ({e}); estimating token counts")
+    return estimate_tokens
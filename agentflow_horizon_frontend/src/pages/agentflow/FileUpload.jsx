@@ -7,11 +7,15 @@ import { Input } from '@/components/ui/input';
 import { toast } from 'sonner';
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
+const POLL_INTERVAL_MS = 1000;
+
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
 
 const FileUpload = () => {
   const [file, setFile] = useState(null);
   const [loading, setLoading] = useState(false);
   const [result, setResult] = useState(null);
+  const [progress, setProgress] = useState(null);
   const [documentUploaded, setDocumentUploaded] = useState(false);
   const [query, setQuery] = useState('');
   const [queryLoading, setQueryLoading] = useState(false);
@@ -55,15 +59,32 @@ const FileUpload = () => {
         }
       });
 
-      setResult(response.data);
-      if (response.data.success) {
+      if (!response.data.success) {
+        setResult(response.data);
+        toast.error(response.data.message || 'Upload failed');
+        return;
+      }
+
+      // Indexing runs in the background; poll the job until it finishes
+      let job = response.data;
+      while (job.status !== 'completed' && job.status !== 'failed') {
+        await sleep(POLL_INTERVAL_MS);
+        job = (await axios.get(`${API}/documents/jobs/${response.data.job_id}`)).data;
+        setProgress(job);
+      }
+
+      setResult(job);
+      if (job.status === 'completed') {
         toast.success('File uploaded and indexed successfully');
         setDocumentUploaded(true);
+      } else {
+        toast.error('Indexing failed: ' + job.error);
       }
     } catch (error) {
       toast.error('Upload failed: ' + (error.response?.data?.detail || error.message));
     } finally {
       setLoading(false);
+      setProgress(null);
     }
   };
 
@@ -80,7 +101,8 @@ const FileUpload = () => {
 
     setQueryLoading(true);
     try {
-      const response = await axios.post(`${API}/documents/query`, { query });
+      // Scope retrieval to the document uploaded on this page
+      const response = await axios.post(`${API}/documents/query`, { query, doc_id: result?.document_id });
       
       // Add to chat history
       setChatHistory(prev => [...prev, {
@@ -148,7 +170,7 @@ const FileUpload = () => {
               data-testid="upload-submit-btn"
             >
               {loading ? (
-                <><Loader2 className="mr-2 h-4 w-4 animate-spin" /> Uploading...</>
+                <><Loader2 className="mr-2 h-4 w-4 animate-spin" /> {progress ? `Indexing... ${progress.pages_processed}${progress.total_pages ? `/${progress.total_pages} pages` : ' blocks'}, ${progress.chunks_indexed} chunks` : 'Uploading...'}</>
               ) : (
                 <><Upload className="mr-2 h-4 w-4" /> Upload & Index</>
               )}
@@ -170,7 +192,8 @@ const FileUpload = () => {
               <p className="text-sm"><span className="font-medium">Document ID:</span> {result.document_id}</p>
               <p className="text-sm"><span className="font-medium">Filename:</span> {result.filename}</p>
               <p className="text-sm"><span className="font-medium">Characters:</span> {result.char_count.toLocaleString()}</p>
-              <p className="text-sm text-green-600">{result.message}</p>
+              <p className="text-sm"><span className="font-medium">Chunks Indexed:</span> {result.chunks_indexed.toLocaleString()}</p>
+              <p className="text-sm text-green-600">Document uploaded and indexed successfully. You can now ask questions about it.</p>
             </div>
           </CardContent>
         </Card>
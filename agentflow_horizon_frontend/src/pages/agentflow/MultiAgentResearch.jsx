@@ -1,11 +1,11 @@
 import React, { useState } from 'react';
-import axios from 'axios';
 import { Search, Loader2 } from 'lucide-react';
 import { Button } from '@/components/ui/button';
 import { Textarea } from '@/components/ui/textarea';
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card';
 import { toast } from 'sonner';
 import MarkdownRenderer from '@/components/MarkdownRenderer';
+import { postSSE } from '@/lib/sse';
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
 
@@ -21,14 +21,23 @@ const MultiAgentResearch = () => {
     }
 
     setLoading(true);
+    setResult(null);
     try {
-      const response = await axios.post(`${API}/agentflow/research`, { query });
-      setResult(response.data);
-      if (response.data.success) {
+      // Stream the report: retrieved documents arrive first, then tokens as they are generated
+      let streamError = null;
+      await postSSE(`${API}/agentflow/research/stream`, { query }, {
+        sources: (data) => setResult({ success: true, streaming: true, final_answer: '', ...data }),
+        token: ({ text }) => setResult((prev) => ({ ...prev, final_answer: (prev?.final_answer || '') + text })),
+        done: (data) => setResult(data),
+        error: ({ detail }) => { streamError = detail; },
+      });
+      if (streamError) {
+        toast.error('Research failed: ' + streamError);
+      } else {
         toast.success('Research completed successfully');
       }
     } catch (error) {
-      toast.error('Research failed: ' + (error.response?.data?.detail || error.message));
+      toast.error('Research failed: ' + error.message);
     } finally {
       setLoading(false);
     }
@@ -79,41 +88,45 @@ const MultiAgentResearch = () => {
             </CardContent>
           </Card>
 
-          <Card className="glass">
-            <CardHeader>
-              <CardTitle className="flex items-center gap-2">
-                <span>📝</span>
-                <span>Summary</span>
-              </CardTitle>
-            </CardHeader>
-            <CardContent>
-              <MarkdownRenderer content={result.summary} />
-            </CardContent>
-          </Card>
+          {!result.streaming && (
+            <>
+              <Card className="glass">
+                <CardHeader>
+                  <CardTitle className="flex items-center gap-2">
+                    <span>📝</span>
+                    <span>Summary</span>
+                  </CardTitle>
+                </CardHeader>
+                <CardContent>
+                  <MarkdownRenderer content={result.summary} />
+                </CardContent>
+              </Card>
 
-          <Card className="glass">
-            <CardHeader>
-              <CardTitle className="flex items-center gap-2">
-                <span>🏷️</span>
-                <span>Key Entities</span>
-              </CardTitle>
-            </CardHeader>
-            <CardContent>
-              <MarkdownRenderer content={result.entities} />
-            </CardContent>
-          </Card>
+              <Card className="glass">
+                <CardHeader>
+                  <CardTitle className="flex items-center gap-2">
+                    <span>🏷️</span>
+                    <span>Key Entities</span>
+                  </CardTitle>
+                </CardHeader>
+                <CardContent>
+                  <MarkdownRenderer content={result.entities} />
+                </CardContent>
+              </Card>
 
-          <Card className="glass">
-            <CardHeader>
-              <CardTitle className="flex items-center gap-2">
-                <span>😊</span>
-                <span>Sentiment Analysis</span>
-              </CardTitle>
-            </CardHeader>
-            <CardContent>
-              <MarkdownRenderer content={result.sentiment} />
-            </CardContent>
-          </Card>
+              <Card className="glass">
+                <CardHeader>
+                  <CardTitle className="flex items-center gap-2">
+                    <span>😊</span>
+                    <span>Sentiment Analysis</span>
+                  </CardTitle>
+                </CardHeader>
+                <CardContent>
+                  <MarkdownRenderer content={result.sentiment} />
+                </CardContent>
+              </Card>
+            </>
+          )}
 
           {result.retrieved_documents && result.retrieved_documents.length > 0 && (
             <Card className="glass">
@@ -1,10 +1,10 @@
 import React, { useState } from 'react';
-import axios from 'axios';
 import { Database, Loader2 } from 'lucide-react';
 import { Button } from '@/components/ui/button';
 import { Textarea } from '@/components/ui/textarea';
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card';
 import { toast } from 'sonner';
+import { postSSE } from '@/lib/sse';
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
 
@@ -20,16 +20,23 @@ const RAGQuery = () => {
     }
 
     setLoading(true);
+    setResult(null);
     try {
-      const response = await axios.post(`${API}/agentflow/rag-query`, { query });
-      setResult(response.data);
-      if (response.data.success) {
-        toast.success('Query completed successfully');
+      // Sources arrive before the answer, which then streams in token by token
+      let streamError = null;
+      await postSSE(`${API}/agentflow/rag-query/stream`, { query }, {
+        sources: ({ sources }) => setResult({ success: true, answer: '', sources }),
+        token: ({ text }) => setResult((prev) => ({ ...prev, answer: (prev?.answer || '') + text })),
+        done: (data) => setResult(data),
+        error: ({ detail }) => { streamError = detail; },
+      });
+      if (streamError) {
+        toast.error('Query failed: ' + streamError);
       } else {
-        toast.warning(response.data.message || 'No documents found');
+        toast.success('Query completed successfully');
       }
     } catch (error) {
-      toast.error('Query failed: ' + (error.response?.data?.detail || error.message));
+      toast.error('Query failed: ' + error.message);
     } finally {
       setLoading(false);
     }
@@ -82,6 +89,24 @@ const RAGQuery = () => {
             </Card>
           )}
 
+          {result.sources && result.sources.length > 0 && (
+            <Card className="glass">
+              <CardHeader>
+                <CardTitle>Sources ({result.sources.length})</CardTitle>
+              </CardHeader>
+              <CardContent>
+                <div className="space-y-4">
+                  {result.sources.map((source, idx) => (
+                    <div key={idx} className="p-4 bg-gray-50 rounded-lg">
+                      <p className="text-sm text-gray-700 mb-2">{source.chunk}</p>
+                      <div className="text-xs text-gray-500">Similarity: {source.similarity}</div>
+                    </div>
+                  ))}
+                </div>
+              </CardContent>
+            </Card>
+          )}
+
           {result.documents && result.documents.length > 0 && (
             <Card className="glass">
               <CardHeader>